@@ -13,7 +13,7 @@ from alembic import context
 # Import your models and config
 from app.config import settings
 from app.database import Base
-from app.models import User, MTAccount, Signal, SymbolMapping  # noqa: F401
+from app.models import User, MTAccount, Signal, SignalBatch, SymbolMapping, LatencyHistogram  # noqa: F401
 
 # this is the Alembic Config object
 config = context.config
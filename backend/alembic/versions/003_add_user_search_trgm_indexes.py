@@ -0,0 +1,47 @@
+"""Add pg_trgm indexes for admin user search
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # Build concurrently so the users table stays writable during the migration
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_users_email_trgm',
+            'users',
+            ['email'],
+            postgresql_using='gin',
+            postgresql_ops={'email': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'idx_users_full_name_trgm',
+            'users',
+            ['full_name'],
+            postgresql_using='gin',
+            postgresql_ops={'full_name': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_users_full_name_trgm', table_name='users', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('idx_users_email_trgm', table_name='users', postgresql_concurrently=True, if_exists=True)
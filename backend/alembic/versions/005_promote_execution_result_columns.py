@@ -0,0 +1,104 @@
+"""Promote execution_result fields into typed signal columns
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 00:00:00.000000
+
+The backfill runs in keyset-paginated batches, each committed on its own,
+so it never holds a long lock on signals. Rows that already have any typed
+value are skipped, so an interrupted upgrade can simply be re-run.
+"""
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BACKFILL_BATCH_SIZE = 5000
+
+BACKFILL_BATCH = sa.text("""
+    WITH batch AS (
+        SELECT id FROM signals
+        WHERE execution_result IS NOT NULL
+          AND id > :last_id
+          AND ticket IS NULL
+          AND executed_price IS NULL
+          AND executed_quantity IS NULL
+          AND execution_time_ms IS NULL
+          AND error_code IS NULL
+        ORDER BY id
+        LIMIT :batch_size
+    )
+    UPDATE signals AS s SET
+        ticket = (s.execution_result->>'ticket')::bigint,
+        executed_price = (s.execution_result->>'executed_price')::numeric,
+        executed_quantity = (s.execution_result->>'executed_quantity')::numeric,
+        execution_time_ms = (s.execution_result->>'execution_time_ms')::integer,
+        error_code = (s.execution_result->>'error_code')::integer
+    FROM batch
+    WHERE s.id = batch.id
+    RETURNING s.id
+""")
+
+
+def backfill_typed_columns() -> None:
+    """Copy execution_result fields into the typed columns, one committed batch at a time."""
+    connection = op.get_bind()
+    last_id = uuid.UUID(int=0)
+    while True:
+        ids = connection.execute(
+            BACKFILL_BATCH,
+            {"last_id": last_id, "batch_size": BACKFILL_BATCH_SIZE},
+        ).scalars().all()
+        if not ids:
+            break
+        last_id = max(ids)
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS keeps the upgrade re-runnable after an interrupted backfill
+    op.execute("ALTER TABLE signals ADD COLUMN IF NOT EXISTS ticket BIGINT")
+    op.execute("ALTER TABLE signals ADD COLUMN IF NOT EXISTS executed_price NUMERIC(20, 8)")
+    op.execute("ALTER TABLE signals ADD COLUMN IF NOT EXISTS executed_quantity NUMERIC(10, 4)")
+    op.execute("ALTER TABLE signals ADD COLUMN IF NOT EXISTS execution_time_ms INTEGER")
+    op.execute("ALTER TABLE signals ADD COLUMN IF NOT EXISTS error_code INTEGER")
+
+    with op.get_context().autocommit_block():
+        # Offline (--sql) runs cannot loop over batches, so only DDL is emitted
+        if not op.get_context().as_sql:
+            backfill_typed_columns()
+
+        op.create_index(
+            'idx_signals_ticket',
+            'signals',
+            ['ticket'],
+            postgresql_where=sa.text('ticket IS NOT NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'idx_signals_error_code',
+            'signals',
+            ['error_code'],
+            postgresql_where=sa.text('error_code IS NOT NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_signals_error_code', table_name='signals', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('idx_signals_ticket', table_name='signals', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('signals', 'error_code')
+    op.drop_column('signals', 'execution_time_ms')
+    op.drop_column('signals', 'executed_quantity')
+    op.drop_column('signals', 'executed_price')
+    op.drop_column('signals', 'ticket')
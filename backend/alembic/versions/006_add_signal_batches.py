@@ -0,0 +1,179 @@
+"""Split shared signal fields into signal_batches
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 00:00:00.000000
+
+A webhook fanned out to N accounts used to store its action, order type,
+price, TP/SL, comment, source and raw payload N times. They now live once
+in signal_batches; signals keep the per-account delivery fields and a
+batch_id.
+
+Existing signals are grouped into batches by user, creation time (all
+signals of one webhook share the transaction's now()) and the shared
+fields. The backfill runs in keyset-paginated batches, each committed on
+its own, and skips signals that already have a batch, so an interrupted
+upgrade can simply be re-run. A fan-out split across two pages gets two
+batches, which is harmless.
+
+Signals inserted by the old app while the pages run are picked up by a
+final pass, run under a lock that blocks further writes to signals, in
+the same transaction that makes batch_id NOT NULL and drops the old
+columns; if anything fails there, nothing of it is applied.
+
+Requires PostgreSQL 13+ for the built-in gen_random_uuid(), as the
+initial schema does.
+"""
+import uuid
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BACKFILL_BATCH_SIZE = 5000
+
+# Columns moved from signals to signal_batches
+SHARED_COLUMNS = ['action', 'order_type', 'price', 'take_profit', 'stop_loss', 'comment', 'source', 'raw_payload']
+
+BACKFILL_BATCH = sa.text("""
+    WITH page AS (
+        SELECT id FROM signals
+        WHERE batch_id IS NULL
+          AND (created_at, id) > (:last_created_at, :last_id)
+        ORDER BY created_at, id
+        LIMIT :batch_size
+    ), groups AS MATERIALIZED (
+        SELECT
+            gen_random_uuid() AS batch_id,
+            array_agg(s.id) AS ids,
+            s.user_id, s.action, s.order_type, s.price, s.take_profit,
+            s.stop_loss, s.comment, s.source, s.raw_payload, s.created_at
+        FROM signals AS s
+        JOIN page ON page.id = s.id
+        GROUP BY
+            s.user_id, s.created_at, s.action, s.order_type, s.price,
+            s.take_profit, s.stop_loss, s.comment, s.source, s.raw_payload
+    ), batches AS (
+        INSERT INTO signal_batches (
+            id, user_id, action, order_type, price, take_profit,
+            stop_loss, comment, source, raw_payload, created_at
+        )
+        SELECT
+            batch_id, user_id, action, order_type, price, take_profit,
+            stop_loss, comment, source, raw_payload, created_at
+        FROM groups
+    )
+    UPDATE signals AS s SET batch_id = g.batch_id
+    FROM groups AS g
+    WHERE s.id = ANY(g.ids)
+    RETURNING s.created_at, s.id
+""")
+
+
+def backfill_batches() -> None:
+    """Create the batches of signals that have none, page by page (each committed in an autocommit block)."""
+    connection = op.get_bind()
+    last = (datetime(1, 1, 1, tzinfo=timezone.utc), uuid.UUID(int=0))
+    while True:
+        rows = connection.execute(
+            BACKFILL_BATCH,
+            {
+                "last_created_at": last[0],
+                "last_id": last[1],
+                "batch_size": BACKFILL_BATCH_SIZE,
+            },
+        ).all()
+        if not rows:
+            break
+        last = max((row.created_at, row.id) for row in rows)
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS signal_batches (
+            id UUID NOT NULL DEFAULT gen_random_uuid(),
+            user_id UUID NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            action VARCHAR(20) NOT NULL,
+            order_type VARCHAR(20) NOT NULL DEFAULT 'market',
+            price NUMERIC(20, 8),
+            take_profit NUMERIC(20, 8),
+            stop_loss NUMERIC(20, 8),
+            comment VARCHAR(255),
+            source VARCHAR(50) NOT NULL DEFAULT 'tradingview',
+            raw_payload JSONB,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id),
+            CONSTRAINT check_batch_action CHECK (
+                action IN ('buy', 'sell', 'buy_limit', 'buy_stop', 'sell_limit', 'sell_stop', 'close', 'close_partial', 'modify')
+            ),
+            CONSTRAINT check_batch_order_type CHECK (order_type IN ('market', 'limit', 'stop'))
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS idx_signal_batches_user_id ON signal_batches (user_id)")
+    op.execute("ALTER TABLE signals ADD COLUMN IF NOT EXISTS batch_id UUID")
+
+    with op.get_context().autocommit_block():
+        # Offline (--sql) runs cannot loop over batches, so only DDL is emitted
+        if not op.get_context().as_sql:
+            backfill_batches()
+
+        op.create_index(
+            'idx_signals_batch_id',
+            'signals',
+            ['batch_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+    # Final pass over signals the old app inserted since, with their writes blocked
+    # until this transaction commits, so SET NOT NULL cannot meet a new NULL
+    op.execute("LOCK TABLE signals IN SHARE ROW EXCLUSIVE MODE")
+    if not op.get_context().as_sql:
+        backfill_batches()
+
+    op.alter_column('signals', 'batch_id', nullable=False)
+    op.create_foreign_key(
+        'fk_signals_batch_id', 'signals', 'signal_batches', ['batch_id'], ['id'], ondelete='CASCADE'
+    )
+    # Drops check_action and check_order_type along with their columns
+    for column in SHARED_COLUMNS:
+        op.execute(f"ALTER TABLE signals DROP COLUMN IF EXISTS {column}")
+
+
+def downgrade() -> None:
+    op.add_column('signals', sa.Column('action', sa.String(20), nullable=True))
+    op.add_column('signals', sa.Column('order_type', sa.String(20), nullable=True, server_default='market'))
+    op.add_column('signals', sa.Column('price', sa.Numeric(20, 8), nullable=True))
+    op.add_column('signals', sa.Column('take_profit', sa.Numeric(20, 8), nullable=True))
+    op.add_column('signals', sa.Column('stop_loss', sa.Numeric(20, 8), nullable=True))
+    op.add_column('signals', sa.Column('comment', sa.String(255), nullable=True))
+    op.add_column('signals', sa.Column('source', sa.String(50), nullable=True, server_default='tradingview'))
+    op.add_column('signals', sa.Column('raw_payload', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+    columns = ", ".join(f"{c} = b.{c}" for c in SHARED_COLUMNS)
+    op.execute(f"UPDATE signals AS s SET {columns} FROM signal_batches AS b WHERE b.id = s.batch_id")
+
+    op.alter_column('signals', 'action', nullable=False)
+    op.alter_column('signals', 'order_type', nullable=False)
+    op.alter_column('signals', 'source', nullable=False)
+    op.create_check_constraint(
+        'check_action',
+        'signals',
+        "action IN ('buy', 'sell', 'buy_limit', 'buy_stop', 'sell_limit', 'sell_stop', 'close', 'close_partial', 'modify')",
+    )
+    op.create_check_constraint('check_order_type', 'signals', "order_type IN ('market', 'limit', 'stop')")
+
+    op.drop_constraint('fk_signals_batch_id', 'signals', type_='foreignkey')
+    op.drop_index('idx_signals_batch_id', table_name='signals')
+    op.drop_column('signals', 'batch_id')
+    op.drop_index('idx_signal_batches_user_id', table_name='signal_batches')
+    op.drop_table('signal_batches')
@@ -1,31 +1,100 @@
 """
 API Dependencies for authentication and database session management.
 """
-from datetime import datetime
-from typing import Optional
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Dict, Optional, Sequence
 from uuid import UUID
 
-from fastapi import Depends, HTTPException, Query, status
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from starlette.requests import HTTPConnection
 from sqlalchemy import select, and_
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import noload
 
-from app.database import get_db
+from app.config import settings
+from app.database import BulkheadFull, RouteClass, db_bulkheads, get_db, get_session_factory, recent_writes
 from app.models.account import MTAccount
 from app.models.user import User
+from app.services import hot_queries
+from app.services.auth_cache import AccountPrincipal, UserPrincipal, auth_cache
+from app.services.delivery_sequence import delivery_sequences, etag, parse_if_none_match
+from app.services.heartbeat import heartbeats
+from app.services.poll_schedule import poll_scheduler
+from app.services.presence import presence
 from app.utils.security import verify_token
 
 
 # Security schemes
 bearer_scheme = HTTPBearer(auto_error=False)
 
+# Methods that never write
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+async def _get_principal(
+    token: str,
+    session_factory: async_sessionmaker,
+) -> Optional[UserPrincipal]:
+    """
+    Resolve an access token to a user principal.
+
+    Verified claims and principals are served from the auth cache, so a
+    repeat request skips both JWT verification and the user query. On a
+    miss the user is loaded on a short session of its own, closed before
+    the handler runs, so read endpoints hold no primary transaction for
+    authentication.
+    """
+    payload = auth_cache.get_claims(token)
+    if payload is None:
+        payload = verify_token(token, token_type="access")
+        if not payload:
+            return None
+        auth_cache.put_claims(token, payload)
+
+    user_id = payload.get("sub")
+    if not user_id:
+        return None
+
+    try:
+        user_uuid = UUID(user_id)
+    except ValueError:
+        return None
+
+    principal = auth_cache.get_user(user_uuid)
+    if principal:
+        return principal
+
+    version = auth_cache.user_version(user_uuid)
+    async with session_factory() as db:
+        result = await db.execute(
+            select(User.id, User.email, User.is_active, User.is_admin).where(User.id == user_uuid)
+        )
+        row = result.one_or_none()
+    if not row:
+        return None
+
+    principal = UserPrincipal(
+        id=row.id,
+        email=row.email,
+        is_active=row.is_active,
+        is_admin=row.is_admin,
+        version=version,
+    )
+    auth_cache.put_user(principal)
+    return principal
+
 
 async def get_current_user(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    session_factory: async_sessionmaker = Depends(get_session_factory),
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
-) -> User:
+) -> UserPrincipal:
     """
     Dependency to get the current authenticated user from JWT token.
+
+    Writes are recorded so the client's reads stay on the primary for a
+    while after (see get_read_db).
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -36,41 +105,53 @@ async def get_current_user(
     if not credentials:
         raise credentials_exception
 
-    token = credentials.credentials
-    payload = verify_token(token, token_type="access")
+    principal = await _get_principal(credentials.credentials, session_factory)
 
-    if not payload:
+    if not principal:
         raise credentials_exception
 
-    user_id = payload.get("sub")
-    if not user_id:
-        raise credentials_exception
+    if not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is disabled",
+        )
 
-    try:
-        user_uuid = UUID(user_id)
-    except ValueError:
-        raise credentials_exception
+    if request.method not in SAFE_METHODS:
+        recent_writes.record(credentials.credentials)
+
+    return principal
+
+
+async def get_current_user_model(
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    """
+    Dependency to get the full User row of the current user.
 
+    For endpoints that return or modify the user itself; everything else
+    should use the cached principal from get_current_user.
+    """
     result = await db.execute(
-        select(User).where(User.id == user_uuid)
+        select(User)
+        .options(noload(User.mt_accounts), noload(User.signals))
+        .where(User.id == current_user.id)
     )
     user = result.scalar_one_or_none()
 
     if not user:
-        raise credentials_exception
-
-    if not user.is_active:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="User account is disabled",
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
         )
 
     return user
 
 
 async def get_current_active_admin(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: UserPrincipal = Depends(get_current_user),
+) -> UserPrincipal:
     """
     Dependency to get the current admin user.
     """
@@ -82,22 +163,167 @@ async def get_current_active_admin(
     return current_user
 
 
-async def get_account_by_api_key(
-    api_key: str = Query(..., description="MT Account API key"),
-    db: AsyncSession = Depends(get_db),
-) -> MTAccount:
+@lru_cache(maxsize=None)
+def db_bulkhead(route_class: RouteClass) -> Callable[[], AsyncIterator[None]]:
     """
-    Dependency to get MT account by API key (for EA polling).
+    Dependency holding a slot of a route class's database bulkhead for the request.
+
+    Meant for route or router `dependencies`, which FastAPI enters before
+    the handler's parameter dependencies and exits after them, so the slot
+    spans the request's session from its first query to its commit.
+    Answers 503 when no slot frees up within DB_BULKHEAD_TIMEOUT_SECONDS.
     """
+    bulkhead = db_bulkheads[route_class]
+
+    async def hold_bulkhead_slot() -> AsyncIterator[None]:
+        try:
+            await bulkhead.acquire()
+        except BulkheadFull:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            yield
+        finally:
+            bulkhead.release()
+
+    return hold_bulkhead_slot
+
+
+def _client_ip(request: HTTPConnection) -> Optional[str]:
+    """Get the client IP, preferring the address set by the reverse proxy."""
+    real_ip = request.headers.get("x-real-ip")
+    if real_ip:
+        return real_ip
+    return request.client.host if request.client else None
+
+
+def _declared_poll_interval(request: HTTPConnection) -> Optional[float]:
+    """Get the poll interval an EA declares in X-EA-Poll-Interval, if valid."""
+    value = request.headers.get("x-ea-poll-interval")
+    if not value:
+        return None
+    try:
+        interval = float(value)
+    except ValueError:
+        return None
+    return interval if 0 < interval <= 3600 else None
+
+
+def record_ea_request(request: HTTPConnection, account: AccountPrincipal) -> None:
+    """Record the heartbeat and presence of an authenticated EA request or connection."""
+    # last_connected_at is written in coalesced batches
+    heartbeats.record(account.id)
+    presence.touch(
+        account.id,
+        account.user_id,
+        client_version=request.headers.get("x-ea-version"),
+        ip=_client_ip(request),
+        poll_interval=_declared_poll_interval(request),
+    )
+
+
+def schedule_next_poll(request: HTTPConnection, account: AccountPrincipal) -> Optional[int]:
+    """
+    Get the delay in milliseconds until an EA's next poll, or None if scheduling is off.
+
+    The scheduled interval also becomes the account's presence interval,
+    so an EA told to poll less often is not reported stale.
+    """
+    if not settings.POLL_SCHEDULING_ENABLED:
+        return None
+
+    delay, interval = poll_scheduler.next_poll(account.id, _declared_poll_interval(request))
+    presence.extend_poll_interval(account.id, interval / 1000)
+    return delay
+
+
+async def authenticate_api_key(api_key: str, db: AsyncSession) -> Optional[AccountPrincipal]:
+    """
+    Resolve an API key to its account, if both the account and its owner are active.
+
+    Accounts are served from the auth cache, so the EA poll loop does not
+    query for the account on every request.
+    """
+    account = auth_cache.get_account(api_key)
+    if account:
+        return account
+
+    generation = auth_cache.generation
+    result = await hot_queries.account_by_api_key.execute(db, {"api_key": api_key})
+    row = result.one_or_none()
+
+    if not row:
+        return None
+
+    account = AccountPrincipal(
+        id=row.id,
+        user_id=row.user_id,
+        is_active=row.is_active,
+        settings=row.settings,
+    )
+    auth_cache.put_account(api_key, account, generation)
+    return account
+
+
+async def authenticate_api_keys(
+    api_keys: Sequence[str],
+    db: AsyncSession,
+) -> Dict[str, AccountPrincipal]:
+    """
+    Resolve several API keys at once; invalid keys are left out.
+
+    Keys missing from the auth cache are looked up in a single query.
+    """
+    accounts = {}
+    missing = []
+    for api_key in api_keys:
+        account = auth_cache.get_account(api_key)
+        if account:
+            accounts[api_key] = account
+        else:
+            missing.append(api_key)
+
+    if not missing:
+        return accounts
+
+    generation = auth_cache.generation
     result = await db.execute(
-        select(MTAccount).where(
+        select(MTAccount.api_key, MTAccount.id, MTAccount.user_id, MTAccount.is_active, MTAccount.settings)
+        .join(User, User.id == MTAccount.user_id)
+        .where(
             and_(
-                MTAccount.api_key == api_key,
+                MTAccount.api_key.in_(missing),
                 MTAccount.is_active == True,
+                User.is_active == True,
             )
         )
     )
-    account = result.scalar_one_or_none()
+
+    for row in result.all():
+        account = AccountPrincipal(
+            id=row.id,
+            user_id=row.user_id,
+            is_active=row.is_active,
+            settings=row.settings,
+        )
+        auth_cache.put_account(row.api_key, account, generation)
+        accounts[row.api_key] = account
+
+    return accounts
+
+
+async def get_account_by_api_key(
+    request: Request,
+    api_key: str = Query(..., description="MT Account API key"),
+    db: AsyncSession = Depends(get_db),
+) -> AccountPrincipal:
+    """
+    Dependency to get MT account by API key (for EA polling).
+    """
+    account = await authenticate_api_key(api_key, db)
 
     if not account:
         raise HTTPException(
@@ -105,38 +331,62 @@ async def get_account_by_api_key(
             detail="Invalid API key",
         )
 
-    # Update last connected time
-    account.last_connected_at = datetime.utcnow()
-
+    record_ea_request(request, account)
     return account
 
 
-async def get_optional_user(
-    db: AsyncSession = Depends(get_db),
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
-) -> Optional[User]:
+async def skip_unchanged_poll(
+    request: Request,
+    api_key: str = Query(..., description="MT Account API key"),
+    since: Optional[int] = Query(
+        None, description="Delivery sequence of the last poll (X-Delivery-Sequence)"
+    ),
+    wait: int = Query(
+        0, ge=0, le=settings.LONG_POLL_MAX_SECONDS,
+        description="Seconds to wait for a new signal before answering 304",
+    ),
+) -> None:
     """
-    Dependency to optionally get the current user (doesn't raise if not authenticated).
+    Dependency answering an unchanged EA poll with 304 Not Modified.
+
+    Runs before any database dependency: if the account is in the auth
+    cache and the sequence the EA sent back (`since` or If-None-Match) is
+    still current, no signal arrived since its last poll and the request
+    is answered from memory. With `wait` the request first waits for the
+    sequence to move (long polling), woken by local commits and by the
+    signal bus. Anything else falls through to the full poll.
     """
-    if not credentials:
-        return None
+    if not settings.CONDITIONAL_POLLING_ENABLED:
+        return
 
-    token = credentials.credentials
-    payload = verify_token(token, token_type="access")
+    etags = parse_if_none_match(request.headers.get("if-none-match"))
+    if since is None and not etags:
+        return
 
-    if not payload:
-        return None
+    account = auth_cache.get_account(api_key)
+    if not account or not delivery_sequences.is_current(account.id, since, etags):
+        return
 
-    user_id = payload.get("sub")
-    if not user_id:
-        return None
+    record_ea_request(request, account)
+    sequence = delivery_sequences.current(account.id)
+    if wait and await delivery_sequences.wait(account.id, sequence, wait):
+        return
 
-    try:
-        user_uuid = UUID(user_id)
-    except ValueError:
+    headers = {"ETag": etag(sequence), "X-Delivery-Sequence": str(sequence)}
+    next_poll_ms = schedule_next_poll(request, account)
+    if next_poll_ms is not None:
+        headers["X-Next-Poll-Ms"] = str(next_poll_ms)
+    raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
+async def get_optional_user(
+    session_factory: async_sessionmaker = Depends(get_session_factory),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+) -> Optional[UserPrincipal]:
+    """
+    Dependency to optionally get the current user (doesn't raise if not authenticated).
+    """
+    if not credentials:
         return None
 
-    result = await db.execute(
-        select(User).where(User.id == user_uuid)
-    )
-    return result.scalar_one_or_none()
+    return await _get_principal(credentials.credentials, session_factory)
@@ -1,6 +1,7 @@
 """
 MT Account management endpoints.
 """
+import time
 from typing import List
 from uuid import UUID
 
@@ -8,12 +9,16 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.api.deps import get_current_user
 from app.models.account import MTAccount
 from app.models.symbol_mapping import SymbolMapping
-from app.models.user import User
+from app.services.auth_cache import UserPrincipal, auth_cache
+from app.services.delivery_sequence import delivery_sequences
+from app.services.heartbeat import heartbeats
+from app.services.presence import presence, summarize_presence
 from app.schemas.account import (
+    AccountPresenceListResponse,
     MTAccountCreate,
     MTAccountResponse,
     MTAccountUpdate,
@@ -57,10 +62,19 @@ async def get_user_account(
     return account
 
 
+def _account_response(account: MTAccount) -> MTAccountResponse:
+    """Build an account response with the latest in-memory heartbeat."""
+    response = MTAccountResponse.model_validate(account)
+    response.last_connected_at = heartbeats.last_connected_at(
+        account.id, account.last_connected_at
+    )
+    return response
+
+
 @router.get("", response_model=MTAccountListResponse)
 async def list_accounts(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ) -> MTAccountListResponse:
     """
     List all MT accounts for the current user.
@@ -71,15 +85,48 @@ async def list_accounts(
     accounts = list(result.scalars().all())
 
     return MTAccountListResponse(
-        accounts=[MTAccountResponse.model_validate(a) for a in accounts],
+        accounts=[_account_response(a) for a in accounts],
         total=len(accounts),
     )
 
 
+@router.get("/presence", response_model=AccountPresenceListResponse)
+async def list_account_presence(
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+) -> AccountPresenceListResponse:
+    """
+    Get the live EA connection status of all MT accounts of the current user.
+
+    Accounts whose EA has not connected since the server started fall back
+    to their stored last_connected_at.
+    """
+    result = await db.execute(
+        select(MTAccount.id, MTAccount.name, MTAccount.last_connected_at)
+        .where(MTAccount.user_id == current_user.id)
+        .order_by(MTAccount.created_at)
+    )
+
+    now = time.time()
+    accounts = []
+    for row in result.all():
+        record = presence.get(row.id)
+        if record is not None:
+            accounts.append(presence.describe(record, name=row.name, now=now))
+        else:
+            accounts.append(
+                presence.describe_stored(
+                    row.id, current_user.id, row.last_connected_at, name=row.name, now=now
+                )
+            )
+
+    return summarize_presence(accounts)
+
+
 @router.post("", response_model=MTAccountWithKey, status_code=status.HTTP_201_CREATED)
 async def create_account(
     account_data: MTAccountCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> MTAccount:
     """
@@ -113,20 +160,21 @@ async def create_account(
 @router.get("/{account_id}", response_model=MTAccountResponse)
 async def get_account(
     account_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
-) -> MTAccount:
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+) -> MTAccountResponse:
     """
     Get a specific MT account.
     """
-    return await get_user_account(account_id, current_user.id, db)
+    account = await get_user_account(account_id, current_user.id, db)
+    return _account_response(account)
 
 
 @router.put("/{account_id}", response_model=MTAccountResponse)
 async def update_account(
     account_id: UUID,
     account_data: MTAccountUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> MTAccount:
     """
@@ -147,6 +195,7 @@ async def update_account(
 
     await db.flush()
     await db.refresh(account)
+    auth_cache.invalidate_account_after_commit(db, account.id)
 
     return account
 
@@ -154,7 +203,7 @@ async def update_account(
 @router.delete("/{account_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_account(
     account_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> None:
     """
@@ -162,12 +211,16 @@ async def delete_account(
     """
     account = await get_user_account(account_id, current_user.id, db)
     await db.delete(account)
+    auth_cache.invalidate_account_after_commit(db, account_id)
+    heartbeats.forget(account_id)
+    presence.forget(account_id)
+    delivery_sequences.forget(account_id)
 
 
 @router.post("/{account_id}/regenerate-key", response_model=MTAccountWithKey)
 async def regenerate_api_key(
     account_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> MTAccount:
     """
@@ -179,6 +232,7 @@ async def regenerate_api_key(
 
     await db.flush()
     await db.refresh(account)
+    auth_cache.invalidate_account_after_commit(db, account.id)
 
     return account
 
@@ -188,8 +242,8 @@ async def regenerate_api_key(
 @router.get("/{account_id}/symbols", response_model=SymbolMappingListResponse)
 async def list_symbol_mappings(
     account_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ) -> SymbolMappingListResponse:
     """
     List all symbol mappings for an account.
@@ -212,7 +266,7 @@ async def list_symbol_mappings(
 async def create_symbol_mapping(
     account_id: UUID,
     mapping_data: SymbolMappingCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> SymbolMapping:
     """
@@ -257,7 +311,7 @@ async def update_symbol_mapping(
     account_id: UUID,
     symbol_id: UUID,
     mapping_data: SymbolMappingUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> SymbolMapping:
     """
@@ -299,7 +353,7 @@ async def update_symbol_mapping(
 async def delete_symbol_mapping(
     account_id: UUID,
     symbol_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> None:
     """
@@ -1,19 +1,34 @@
 """
 Admin API endpoints for user management.
 """
+import time
 from datetime import datetime, timedelta
 from math import ceil
-from typing import Optional
+from typing import Any, Dict, List, Literal, Optional, Tuple
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-
-from app.database import get_db
+from sqlalchemy.orm import noload
+
+from app.database import (
+    db_bulkheads,
+    engine,
+    get_db,
+    get_read_db,
+    pool_utilization,
+    read_replicas,
+)
 from app.api.deps import get_current_active_admin
+from app.models.account import MTAccount
 from app.models.user import User, UserTier
 from app.models.signal import Signal
+from app.services.auth_cache import UserPrincipal, auth_cache
+from app.services.hot_queries import hot_queries
+from app.services.presence import PresenceStatus, presence, summarize_presence
+from app.services.signal_bus import signal_bus
+from app.schemas.account import AccountPresenceListResponse
 from app.schemas.user import (
     AdminUserCreate,
     AdminUserUpdate,
@@ -23,7 +38,8 @@ from app.schemas.user import (
     ApprovalRequest,
     UserStatsResponse,
 )
-from app.utils.security import hash_password, generate_webhook_secret
+from app.utils import metrics
+from app.utils.security import hash_password_async, generate_webhook_secret
 
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
@@ -38,10 +54,103 @@ TIER_LIMITS = {
 }
 
 
+def _select_users():
+    """Select users without eager-loading their accounts and signals."""
+    return select(User).options(noload(User.mt_accounts), noload(User.signals))
+
+
+def _user_search(db: AsyncSession, search: str, search_mode: str):
+    """
+    Build the filter and optional ranking expression for an admin user search.
+
+    On Postgres both modes are served by the pg_trgm GIN indexes on email and
+    full_name: "contains" is a substring ILIKE, "similar" uses the trigram %
+    operator and ranks by similarity. Other databases (SQLite in tests) have
+    no trigram support, so "similar" falls back to a substring match.
+    """
+    if search_mode == "similar" and db.get_bind().dialect.name == "postgresql":
+        search_filter = User.email.op("%")(search) | User.full_name.op("%")(search)
+        search_rank = func.greatest(
+            func.similarity(User.email, search),
+            func.coalesce(func.similarity(User.full_name, search), 0),
+        )
+        return search_filter, search_rank
+
+    search_filter = User.email.ilike(f"%{search}%") | User.full_name.ilike(f"%{search}%")
+    return search_filter, None
+
+
+async def _get_user_counts(
+    db: AsyncSession,
+    user_ids: List[UUID],
+) -> Dict[UUID, Tuple[int, int]]:
+    """
+    Get (accounts_count, signals_count) for a page of users in one query.
+
+    Both counts come from grouped subqueries restricted to the given users,
+    so the cost does not grow with the size of each user's history.
+    """
+    if not user_ids:
+        return {}
+
+    accounts_subquery = (
+        select(MTAccount.user_id, func.count(MTAccount.id).label("count"))
+        .where(MTAccount.user_id.in_(user_ids))
+        .group_by(MTAccount.user_id)
+        .subquery()
+    )
+    signals_subquery = (
+        select(Signal.user_id, func.count(Signal.id).label("count"))
+        .where(Signal.user_id.in_(user_ids))
+        .group_by(Signal.user_id)
+        .subquery()
+    )
+
+    result = await db.execute(
+        select(
+            User.id,
+            func.coalesce(accounts_subquery.c.count, 0),
+            func.coalesce(signals_subquery.c.count, 0),
+        )
+        .outerjoin(accounts_subquery, accounts_subquery.c.user_id == User.id)
+        .outerjoin(signals_subquery, signals_subquery.c.user_id == User.id)
+        .where(User.id.in_(user_ids))
+    )
+    return {row[0]: (row[1], row[2]) for row in result.all()}
+
+
+def _admin_user_response(
+    user: User,
+    accounts_count: int = 0,
+    signals_count: int = 0,
+) -> AdminUserResponse:
+    """Build an admin user response from a user and its precomputed counts."""
+    return AdminUserResponse(
+        id=user.id,
+        email=user.email,
+        full_name=user.full_name,
+        webhook_secret=user.webhook_secret,
+        is_active=user.is_active,
+        is_admin=user.is_admin,
+        tier=user.tier,
+        is_approved=user.is_approved,
+        approved_at=user.approved_at,
+        approved_by=user.approved_by,
+        admin_notes=user.admin_notes,
+        max_accounts=user.max_accounts,
+        max_signals_per_day=user.max_signals_per_day,
+        settings=user.settings,
+        created_at=user.created_at,
+        updated_at=user.updated_at,
+        accounts_count=accounts_count,
+        signals_count=signals_count,
+    )
+
+
 @router.get("/stats", response_model=UserStatsResponse)
 async def get_admin_stats(
-    db: AsyncSession = Depends(get_db),
-    current_admin: User = Depends(get_current_active_admin),
+    db: AsyncSession = Depends(get_read_db),
+    current_admin: UserPrincipal = Depends(get_current_active_admin),
 ) -> UserStatsResponse:
     """Get admin dashboard statistics."""
     now = datetime.utcnow()
@@ -100,26 +209,74 @@ async def get_admin_stats(
     )
 
 
+@router.get("/metrics", response_model=Dict[str, Any])
+async def get_metrics(
+    current_admin: UserPrincipal = Depends(get_current_active_admin),
+) -> Dict[str, Any]:
+    """
+    Get in-process metrics of the worker serving this request.
+
+    Timings, database bulkhead and pool occupancy, read replica health,
+    hot query cache hits and signal bus state.
+    """
+    return {
+        "timings": metrics.snapshot(),
+        "db_bulkheads": {name: b.stats() for name, b in db_bulkheads.items()},
+        "db_pool": {"checked_out": engine.pool.checkedout(), "utilization": round(pool_utilization(), 3)},
+        "db_read_replicas": read_replicas.stats(),
+        "db_hot_queries": {name: q.stats() for name, q in hot_queries.items()},
+        "signal_bus": signal_bus.stats(),
+    }
+
+
+@router.get("/presence", response_model=AccountPresenceListResponse)
+async def list_presence(
+    status_filter: Optional[PresenceStatus] = Query(None, alias="status"),
+    user_id: Optional[UUID] = Query(None),
+    current_admin: UserPrincipal = Depends(get_current_active_admin),
+) -> AccountPresenceListResponse:
+    """
+    Get the live connection status of every EA seen by this worker (admin only).
+
+    Served from the in-memory presence registry; accounts that have not
+    connected since startup are not listed.
+    """
+    now = time.time()
+    records = presence.for_user(user_id) if user_id else presence
+    accounts = [presence.describe(record, now=now) for record in records]
+    summary = summarize_presence(accounts)
+
+    if status_filter:
+        summary.accounts = [a for a in summary.accounts if a.status == status_filter]
+
+    return summary
+
+
 @router.get("/users", response_model=UserListResponse)
 async def list_users(
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
     search: Optional[str] = None,
+    search_mode: Literal["contains", "similar"] = Query(
+        "contains",
+        description="'contains' for substring match, 'similar' for trigram similarity ranking",
+    ),
     tier: Optional[str] = None,
     is_active: Optional[bool] = None,
     is_approved: Optional[bool] = None,
     is_admin: Optional[bool] = None,
-    db: AsyncSession = Depends(get_db),
-    current_admin: User = Depends(get_current_active_admin),
+    db: AsyncSession = Depends(get_read_db),
+    current_admin: UserPrincipal = Depends(get_current_active_admin),
 ) -> UserListResponse:
     """List all users with pagination and filters."""
     # Build query
-    query = select(User)
+    query = _select_users()
     count_query = select(func.count(User.id))
+    search_rank = None
 
     # Apply filters
     if search:
-        search_filter = User.email.ilike(f"%{search}%") | User.full_name.ilike(f"%{search}%")
+        search_filter, search_rank = _user_search(db, search, search_mode)
         query = query.where(search_filter)
         count_query = count_query.where(search_filter)
 
@@ -143,38 +300,24 @@ async def list_users(
     total_result = await db.execute(count_query)
     total = total_result.scalar() or 0
 
-    # Paginate
+    # Paginate, best matches first when ranking by similarity
     offset = (page - 1) * per_page
-    query = query.order_by(User.created_at.desc()).offset(offset).limit(per_page)
+    if search_rank is not None:
+        query = query.order_by(search_rank.desc(), User.created_at.desc())
+    else:
+        query = query.order_by(User.created_at.desc())
+    query = query.offset(offset).limit(per_page)
 
     # Execute
     result = await db.execute(query)
     users = result.scalars().all()
 
-    # Build response with stats
-    user_responses = []
-    for user in users:
-        user_response = AdminUserResponse(
-            id=user.id,
-            email=user.email,
-            full_name=user.full_name,
-            webhook_secret=user.webhook_secret,
-            is_active=user.is_active,
-            is_admin=user.is_admin,
-            tier=user.tier,
-            is_approved=user.is_approved,
-            approved_at=user.approved_at,
-            approved_by=user.approved_by,
-            admin_notes=user.admin_notes,
-            max_accounts=user.max_accounts,
-            max_signals_per_day=user.max_signals_per_day,
-            settings=user.settings,
-            created_at=user.created_at,
-            updated_at=user.updated_at,
-            accounts_count=len(user.mt_accounts) if user.mt_accounts else 0,
-            signals_count=len(user.signals) if user.signals else 0,
-        )
-        user_responses.append(user_response)
+    # Build response with stats for the whole page in one query
+    counts = await _get_user_counts(db, [user.id for user in users])
+    user_responses = [
+        _admin_user_response(user, *counts.get(user.id, (0, 0)))
+        for user in users
+    ]
 
     return UserListResponse(
         users=user_responses,
@@ -188,11 +331,11 @@ async def list_users(
 @router.get("/users/{user_id}", response_model=AdminUserResponse)
 async def get_user(
     user_id: UUID,
-    db: AsyncSession = Depends(get_db),
-    current_admin: User = Depends(get_current_active_admin),
+    db: AsyncSession = Depends(get_read_db),
+    current_admin: UserPrincipal = Depends(get_current_active_admin),
 ) -> AdminUserResponse:
     """Get detailed user information."""
-    result = await db.execute(select(User).where(User.id == user_id))
+    result = await db.execute(_select_users().where(User.id == user_id))
     user = result.scalar_one_or_none()
 
     if not user:
@@ -201,37 +344,19 @@ async def get_user(
             detail="User not found",
         )
 
-    return AdminUserResponse(
-        id=user.id,
-        email=user.email,
-        full_name=user.full_name,
-        webhook_secret=user.webhook_secret,
-        is_active=user.is_active,
-        is_admin=user.is_admin,
-        tier=user.tier,
-        is_approved=user.is_approved,
-        approved_at=user.approved_at,
-        approved_by=user.approved_by,
-        admin_notes=user.admin_notes,
-        max_accounts=user.max_accounts,
-        max_signals_per_day=user.max_signals_per_day,
-        settings=user.settings,
-        created_at=user.created_at,
-        updated_at=user.updated_at,
-        accounts_count=len(user.mt_accounts) if user.mt_accounts else 0,
-        signals_count=len(user.signals) if user.signals else 0,
-    )
+    counts = await _get_user_counts(db, [user.id])
+    return _admin_user_response(user, *counts.get(user.id, (0, 0)))
 
 
 @router.post("/users", response_model=AdminUserResponse, status_code=status.HTTP_201_CREATED)
 async def create_user(
     user_data: AdminUserCreate,
     db: AsyncSession = Depends(get_db),
-    current_admin: User = Depends(get_current_active_admin),
+    current_admin: UserPrincipal = Depends(get_current_active_admin),
 ) -> AdminUserResponse:
     """Create a new user (admin only)."""
     # Check if email exists
-    existing = await db.execute(select(User).where(User.email == user_data.email))
+    existing = await db.execute(select(User.id).where(User.email == user_data.email))
     if existing.scalar_one_or_none():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -244,7 +369,7 @@ async def create_user(
     # Create user
     user = User(
         email=user_data.email,
-        password_hash=hash_password(user_data.password),
+        password_hash=await hash_password_async(user_data.password),
         full_name=user_data.full_name,
         webhook_secret=generate_webhook_secret(),
         is_admin=user_data.is_admin,
@@ -262,26 +387,7 @@ async def create_user(
     await db.flush()
     await db.refresh(user)
 
-    return AdminUserResponse(
-        id=user.id,
-        email=user.email,
-        full_name=user.full_name,
-        webhook_secret=user.webhook_secret,
-        is_active=user.is_active,
-        is_admin=user.is_admin,
-        tier=user.tier,
-        is_approved=user.is_approved,
-        approved_at=user.approved_at,
-        approved_by=user.approved_by,
-        admin_notes=user.admin_notes,
-        max_accounts=user.max_accounts,
-        max_signals_per_day=user.max_signals_per_day,
-        settings=user.settings,
-        created_at=user.created_at,
-        updated_at=user.updated_at,
-        accounts_count=0,
-        signals_count=0,
-    )
+    return _admin_user_response(user)
 
 
 @router.put("/users/{user_id}", response_model=AdminUserResponse)
@@ -289,10 +395,10 @@ async def update_user(
     user_id: UUID,
     user_data: AdminUserUpdate,
     db: AsyncSession = Depends(get_db),
-    current_admin: User = Depends(get_current_active_admin),
+    current_admin: UserPrincipal = Depends(get_current_active_admin),
 ) -> AdminUserResponse:
     """Update a user (admin only)."""
-    result = await db.execute(select(User).where(User.id == user_id))
+    result = await db.execute(_select_users().where(User.id == user_id))
     user = result.scalar_one_or_none()
 
     if not user:
@@ -315,7 +421,7 @@ async def update_user(
     if user_data.email is not None:
         # Check if new email exists
         existing = await db.execute(
-            select(User).where(User.email == user_data.email, User.id != user_id)
+            select(User.id).where(User.email == user_data.email, User.id != user_id)
         )
         if existing.scalar_one_or_none():
             raise HTTPException(
@@ -325,7 +431,7 @@ async def update_user(
         user.email = user_data.email
 
     if user_data.password is not None:
-        user.password_hash = hash_password(user_data.password)
+        user.password_hash = await hash_password_async(user_data.password)
 
     if user_data.is_admin is not None:
         user.is_admin = user_data.is_admin
@@ -358,34 +464,17 @@ async def update_user(
 
     await db.flush()
     await db.refresh(user)
+    auth_cache.invalidate_user_after_commit(db, user.id)
 
-    return AdminUserResponse(
-        id=user.id,
-        email=user.email,
-        full_name=user.full_name,
-        webhook_secret=user.webhook_secret,
-        is_active=user.is_active,
-        is_admin=user.is_admin,
-        tier=user.tier,
-        is_approved=user.is_approved,
-        approved_at=user.approved_at,
-        approved_by=user.approved_by,
-        admin_notes=user.admin_notes,
-        max_accounts=user.max_accounts,
-        max_signals_per_day=user.max_signals_per_day,
-        settings=user.settings,
-        created_at=user.created_at,
-        updated_at=user.updated_at,
-        accounts_count=len(user.mt_accounts) if user.mt_accounts else 0,
-        signals_count=len(user.signals) if user.signals else 0,
-    )
+    counts = await _get_user_counts(db, [user.id])
+    return _admin_user_response(user, *counts.get(user.id, (0, 0)))
 
 
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
     user_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_admin: User = Depends(get_current_active_admin),
+    current_admin: UserPrincipal = Depends(get_current_active_admin),
 ) -> None:
     """Delete a user (admin only)."""
     result = await db.execute(select(User).where(User.id == user_id))
@@ -406,6 +495,7 @@ async def delete_user(
 
     await db.delete(user)
     await db.flush()
+    auth_cache.invalidate_user_after_commit(db, user_id)
 
 
 @router.post("/users/{user_id}/approve", response_model=AdminUserResponse)
@@ -413,10 +503,10 @@ async def approve_user(
     user_id: UUID,
     approval_data: ApprovalRequest,
     db: AsyncSession = Depends(get_db),
-    current_admin: User = Depends(get_current_active_admin),
+    current_admin: UserPrincipal = Depends(get_current_active_admin),
 ) -> AdminUserResponse:
     """Approve or reject a user (admin only)."""
-    result = await db.execute(select(User).where(User.id == user_id))
+    result = await db.execute(_select_users().where(User.id == user_id))
     user = result.scalar_one_or_none()
 
     if not user:
@@ -436,26 +526,8 @@ async def approve_user(
     await db.flush()
     await db.refresh(user)
 
-    return AdminUserResponse(
-        id=user.id,
-        email=user.email,
-        full_name=user.full_name,
-        webhook_secret=user.webhook_secret,
-        is_active=user.is_active,
-        is_admin=user.is_admin,
-        tier=user.tier,
-        is_approved=user.is_approved,
-        approved_at=user.approved_at,
-        approved_by=user.approved_by,
-        admin_notes=user.admin_notes,
-        max_accounts=user.max_accounts,
-        max_signals_per_day=user.max_signals_per_day,
-        settings=user.settings,
-        created_at=user.created_at,
-        updated_at=user.updated_at,
-        accounts_count=len(user.mt_accounts) if user.mt_accounts else 0,
-        signals_count=len(user.signals) if user.signals else 0,
-    )
+    counts = await _get_user_counts(db, [user.id])
+    return _admin_user_response(user, *counts.get(user.id, (0, 0)))
 
 
 @router.post("/users/{user_id}/upgrade-tier", response_model=AdminUserResponse)
@@ -463,10 +535,10 @@ async def upgrade_user_tier(
     user_id: UUID,
     tier_data: TierUpdateRequest,
     db: AsyncSession = Depends(get_db),
-    current_admin: User = Depends(get_current_active_admin),
+    current_admin: UserPrincipal = Depends(get_current_active_admin),
 ) -> AdminUserResponse:
     """Upgrade or change a user's tier (admin only)."""
-    result = await db.execute(select(User).where(User.id == user_id))
+    result = await db.execute(_select_users().where(User.id == user_id))
     user = result.scalar_one_or_none()
 
     if not user:
@@ -489,36 +561,18 @@ async def upgrade_user_tier(
     await db.flush()
     await db.refresh(user)
 
-    return AdminUserResponse(
-        id=user.id,
-        email=user.email,
-        full_name=user.full_name,
-        webhook_secret=user.webhook_secret,
-        is_active=user.is_active,
-        is_admin=user.is_admin,
-        tier=user.tier,
-        is_approved=user.is_approved,
-        approved_at=user.approved_at,
-        approved_by=user.approved_by,
-        admin_notes=user.admin_notes,
-        max_accounts=user.max_accounts,
-        max_signals_per_day=user.max_signals_per_day,
-        settings=user.settings,
-        created_at=user.created_at,
-        updated_at=user.updated_at,
-        accounts_count=len(user.mt_accounts) if user.mt_accounts else 0,
-        signals_count=len(user.signals) if user.signals else 0,
-    )
+    counts = await _get_user_counts(db, [user.id])
+    return _admin_user_response(user, *counts.get(user.id, (0, 0)))
 
 
 @router.post("/users/{user_id}/toggle-admin", response_model=AdminUserResponse)
 async def toggle_admin_status(
     user_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_admin: User = Depends(get_current_active_admin),
+    current_admin: UserPrincipal = Depends(get_current_active_admin),
 ) -> AdminUserResponse:
     """Toggle a user's admin status (admin only)."""
-    result = await db.execute(select(User).where(User.id == user_id))
+    result = await db.execute(_select_users().where(User.id == user_id))
     user = result.scalar_one_or_none()
 
     if not user:
@@ -538,24 +592,7 @@ async def toggle_admin_status(
 
     await db.flush()
     await db.refresh(user)
+    auth_cache.invalidate_user_after_commit(db, user.id)
 
-    return AdminUserResponse(
-        id=user.id,
-        email=user.email,
-        full_name=user.full_name,
-        webhook_secret=user.webhook_secret,
-        is_active=user.is_active,
-        is_admin=user.is_admin,
-        tier=user.tier,
-        is_approved=user.is_approved,
-        approved_at=user.approved_at,
-        approved_by=user.approved_by,
-        admin_notes=user.admin_notes,
-        max_accounts=user.max_accounts,
-        max_signals_per_day=user.max_signals_per_day,
-        settings=user.settings,
-        created_at=user.created_at,
-        updated_at=user.updated_at,
-        accounts_count=len(user.mt_accounts) if user.mt_accounts else 0,
-        signals_count=len(user.signals) if user.signals else 0,
-    )
+    counts = await _get_user_counts(db, [user.id])
+    return _admin_user_response(user, *counts.get(user.id, (0, 0)))
@@ -0,0 +1,121 @@
+"""
+Analytics endpoints for signal execution quality.
+"""
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_read_db
+from app.api.deps import get_current_user
+from app.services.auth_cache import UserPrincipal
+from app.schemas.analytics import (
+    FillQualityGroup,
+    FillQualityGroupBy,
+    FillQualityReportResponse,
+    HistogramBucket,
+    LatencyGroup,
+    LatencyGroupBy,
+    LatencyReportResponse,
+    LatencyStats,
+)
+from app.services.analytics import LATENCY_METRICS, AnalyticsService
+from app.utils.histogram import Histogram
+
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+
+def _latency_stats(histogram: Histogram) -> LatencyStats:
+    """Summarize a histogram as percentiles plus its buckets."""
+    return LatencyStats(
+        count=histogram.total,
+        mean_ms=round(histogram.mean, 1) if histogram.mean is not None else None,
+        p50_ms=histogram.percentile(50),
+        p90_ms=histogram.percentile(90),
+        p99_ms=histogram.percentile(99),
+        max_ms=histogram.max if histogram.total else None,
+        histogram=[
+            HistogramBucket(lower_ms=b["lower"], upper_ms=b["upper"], count=b["count"])
+            for b in histogram.buckets()
+        ],
+    )
+
+
+@router.get("/latency", response_model=LatencyReportResponse)
+async def get_latency_report(
+    group_by: LatencyGroupBy = Query("account"),
+    account_id: Optional[UUID] = Query(None),
+    symbol: Optional[str] = Query(None),
+    from_date: Optional[datetime] = Query(None),
+    to_date: Optional[datetime] = Query(None),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+) -> LatencyReportResponse:
+    """
+    Get signal latency percentiles and histograms per account, symbol or hour.
+
+    Metrics: delivery_ms (webhook to EA), execution_ms (EA to result),
+    total_ms (webhook to result) and ea_execution_ms (reported by the EA).
+    """
+    analytics = AnalyticsService(db)
+
+    groups = await analytics.get_latency_histograms(
+        user_id=current_user.id,
+        group_by=group_by,
+        account_id=account_id,
+        symbol=symbol,
+        from_date=from_date,
+        to_date=to_date,
+    )
+
+    return LatencyReportResponse(
+        group_by=group_by,
+        groups=[
+            LatencyGroup(
+                key=key,
+                metrics={
+                    metric: _latency_stats(metrics[metric])
+                    for metric in LATENCY_METRICS
+                    if metric in metrics
+                },
+            )
+            for key, metrics in groups.items()
+        ],
+    )
+
+
+@router.get("/fill-quality", response_model=FillQualityReportResponse)
+async def get_fill_quality_report(
+    group_by: FillQualityGroupBy = Query("account"),
+    account_id: Optional[UUID] = Query(None),
+    symbol: Optional[str] = Query(None),
+    from_date: Optional[datetime] = Query(None),
+    to_date: Optional[datetime] = Query(None),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+) -> FillQualityReportResponse:
+    """
+    Get slippage, fill ratio and failure codes per account, symbol or broker.
+
+    Slippage is in basis points of the requested price, positive when the
+    fill was worse than requested. Market orders without a requested price
+    are excluded from slippage.
+    """
+    analytics = AnalyticsService(db)
+
+    groups = await analytics.get_fill_quality(
+        user_id=current_user.id,
+        group_by=group_by,
+        account_id=account_id,
+        symbol=symbol,
+        from_date=from_date,
+        to_date=to_date,
+    )
+
+    return FillQualityReportResponse(
+        group_by=group_by,
+        groups=[FillQualityGroup(**group) for group in groups],
+    )
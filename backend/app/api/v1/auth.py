@@ -5,7 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user_model
 from app.models.user import User
 from app.schemas.user import (
     UserCreate,
@@ -104,7 +104,7 @@ async def refresh_token(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_model),
 ) -> User:
     """
     Get current authenticated user info.
@@ -115,7 +115,7 @@ async def get_current_user_info(
 @router.put("/me", response_model=UserResponse)
 async def update_current_user(
     user_data: UserUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_model),
     db: AsyncSession = Depends(get_db),
 ) -> User:
     """
@@ -140,7 +140,7 @@ async def update_current_user(
 
 @router.post("/regenerate-webhook-secret", response_model=dict)
 async def regenerate_webhook_secret(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_model),
     db: AsyncSession = Depends(get_db),
 ) -> dict:
     """
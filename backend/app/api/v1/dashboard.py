@@ -8,20 +8,25 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import func, select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.api.deps import get_current_user, get_current_active_admin
+from app.database import get_db, get_read_db
+from app.api.deps import db_bulkhead, get_current_user, get_current_active_admin
 from app.models.account import MTAccount
 from app.models.signal import Signal
-from app.models.user import User
+from app.models.signal_batch import SignalBatch
+from app.services.auth_cache import UserPrincipal
 
 
 router = APIRouter(tags=["Dashboard"])
 
 
-@router.get("/dashboard/stats", response_model=Dict[str, Any])
+@router.get(
+    "/dashboard/stats",
+    response_model=Dict[str, Any],
+    dependencies=[Depends(db_bulkhead("interactive"))],
+)
 async def get_dashboard_stats(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ) -> Dict[str, Any]:
     """
     Get dashboard statistics for the current user.
@@ -122,7 +127,8 @@ async def get_dashboard_stats(
 
     # Get recent signals
     recent_signals_result = await db.execute(
-        select(Signal)
+        select(Signal.id, Signal.symbol, SignalBatch.action, Signal.status, Signal.created_at)
+        .join(Signal.batch)
         .where(Signal.user_id == current_user.id)
         .order_by(Signal.created_at.desc())
         .limit(10)
@@ -135,7 +141,7 @@ async def get_dashboard_stats(
             "status": s.status,
             "created_at": s.created_at.isoformat(),
         }
-        for s in recent_signals_result.scalars().all()
+        for s in recent_signals_result.all()
     ]
 
     return {
@@ -168,11 +174,14 @@ async def health_check() -> Dict[str, str]:
 
 @router.post("/system/kill-switch", status_code=status.HTTP_200_OK)
 async def activate_kill_switch(
-    current_user: User = Depends(get_current_active_admin),
+    current_user: UserPrincipal = Depends(get_current_active_admin),
     db: AsyncSession = Depends(get_db),
 ) -> Dict[str, Any]:
     """
     Emergency kill switch - cancels all pending signals (admin only).
+
+    Deliberately outside every database bulkhead, so it works even when
+    all route classes are saturated.
     """
     from sqlalchemy import update
 
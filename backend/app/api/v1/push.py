@@ -0,0 +1,206 @@
+"""
+Push endpoints delivering signals to EAs over WebSocket and Server-Sent Events.
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+from uuid import UUID
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from starlette.websockets import WebSocketState
+
+from app.api.deps import authenticate_api_key, record_ea_request
+from app.config import settings
+from app.database import db_bulkheads, get_session_factory
+from app.schemas.signal import BatchSignalResultRequest
+from app.services.auth_cache import AccountPrincipal
+from app.services.signal_push import PushChannel, PushFormat, render_ping, render_push_message
+from app.utils.ea_protocol import FIELD_SEPARATOR
+
+
+router = APIRouter(prefix="/signals", tags=["Signal Push"])
+logger = logging.getLogger(__name__)
+
+
+async def _authenticate(api_key: str, session_factory: async_sessionmaker) -> Optional[AccountPrincipal]:
+    """Resolve an API key in a short session, closed before the connection starts idling."""
+    async with db_bulkheads["delivery"].slot(), session_factory() as db:
+        account = await authenticate_api_key(api_key, db)
+        await db.commit()
+    return account
+
+
+async def _handle_message(
+    websocket: WebSocket,
+    channel: PushChannel,
+    format: PushFormat,
+    message: str,
+) -> None:
+    """Apply one client message: an ack, execution results or a ping."""
+    if format == "compact":
+        kind, _, body = message.strip().partition(FIELD_SEPARATOR)
+        if kind == "A":
+            channel.ack([UUID(hex=s) for s in body.split(",") if s])
+        elif kind != "P":
+            raise ValueError(f"Unknown message type {kind!r}")
+        return
+
+    data = json.loads(message)
+    kind = data.get("type") if isinstance(data, dict) else None
+    if kind == "ack":
+        channel.ack([UUID(s) for s in data.get("signal_ids", [])])
+    elif kind == "results":
+        batch = BatchSignalResultRequest.model_validate(data)
+        response = await channel.report_results(batch.results)
+        await websocket.send_text(
+            json.dumps({"type": "results", **response.model_dump(mode="json")})
+        )
+    elif kind != "ping":
+        raise ValueError(f"Unknown message type {kind!r}")
+
+
+async def _receive_messages(websocket: WebSocket, channel: PushChannel, format: PushFormat) -> None:
+    """Read client messages until the connection closes."""
+    while True:
+        message = await websocket.receive_text()
+        record_ea_request(websocket, channel.account)
+        try:
+            await _handle_message(websocket, channel, format, message)
+        except (ValueError, ValidationError) as e:
+            # json.JSONDecodeError is a ValueError
+            detail = str(e).splitlines()[0]
+            if format == "compact":
+                await websocket.send_text(f"E|{detail}\n")
+            else:
+                await websocket.send_text(json.dumps({"type": "error", "detail": detail}))
+
+
+@router.websocket("/ws")
+async def signal_websocket(
+    websocket: WebSocket,
+    api_key: str = Query(..., description="MT Account API key"),
+    format: PushFormat = Query("json", description="Message format"),
+    session_factory: async_sessionmaker = Depends(get_session_factory),
+):
+    """
+    Push signals to an EA over a WebSocket.
+
+    Pending signals (or a ping, if there are none) are sent on connect,
+    and new signals as soon as they are committed. Signals are marked
+    sent when pushed, like a poll, so a signal is never delivered twice;
+    the client's acks (and result reports) are receipts only.
+    """
+    account = await _authenticate(api_key, session_factory)
+    if not account:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid API key")
+        return
+
+    await websocket.accept()
+    record_ea_request(websocket, account)
+    channel = PushChannel(account, session_factory)
+    receiver = asyncio.create_task(_receive_messages(websocket, channel, format))
+
+    try:
+        connected = True
+        while True:
+            rendered = await channel.fetch()
+            if rendered:
+                message = render_push_message(rendered, format, datetime.now(timezone.utc))
+                await websocket.send_text(message.decode("utf-8"))
+            elif connected:
+                # Nothing pending: confirm the connection with a ping
+                await websocket.send_text(render_ping(format, datetime.now(timezone.utc)).decode("ascii"))
+            connected = False
+
+            waiter = asyncio.create_task(channel.wait(settings.PUSH_HEARTBEAT_SECONDS))
+            done, _ = await asyncio.wait({waiter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                waiter.cancel()
+                break
+
+            if not waiter.result():
+                await websocket.send_text(render_ping(format, datetime.now(timezone.utc)).decode("ascii"))
+                record_ea_request(websocket, account)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        try:
+            await receiver
+        except (asyncio.CancelledError, WebSocketDisconnect):
+            pass
+        except Exception as e:
+            logger.error(f"Push connection of account {account.id} failed: {e}")
+
+        if websocket.client_state == WebSocketState.CONNECTED:
+            try:
+                await websocket.close()
+            except RuntimeError:
+                pass
+
+    if channel.unacked:
+        logger.warning(
+            f"Push connection of account {account.id} closed with {len(channel.unacked)} "
+            f"signals pushed but not acked; they are not delivered again"
+        )
+
+
+def _sse_event(event: str, payload: bytes) -> bytes:
+    """Frame a payload as one Server-Sent Event, one data line per payload line."""
+    data = b"".join(b"data: " + line + b"\n" for line in payload.rstrip(b"\n").split(b"\n"))
+    return b"event: " + event.encode("ascii") + b"\n" + data + b"\n"
+
+
+@router.get("/stream")
+async def signal_stream(
+    request: Request,
+    api_key: str = Query(..., description="MT Account API key"),
+    format: PushFormat = Query("json", description="Event payload format"),
+    session_factory: async_sessionmaker = Depends(get_session_factory),
+) -> StreamingResponse:
+    """
+    Push signals to an EA or dashboard as Server-Sent Events.
+
+    Signals are marked sent when pushed, like a poll. Idle streams get a comment line every PUSH_HEARTBEAT_SECONDS.
+    """
+    account = await _authenticate(api_key, session_factory)
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid API key",
+        )
+
+    record_ea_request(request, account)
+    channel = PushChannel(account, session_factory)
+
+    async def events() -> AsyncIterator[bytes]:
+        while True:
+            rendered = await channel.fetch()
+            if rendered:
+                yield _sse_event(
+                    "signals", render_push_message(rendered, format, datetime.now(timezone.utc))
+                )
+
+            if not await channel.wait(settings.PUSH_HEARTBEAT_SECONDS):
+                yield b": ping\n\n"
+                record_ea_request(request, account)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
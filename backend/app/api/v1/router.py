@@ -1,22 +1,30 @@
 """
 Main API v1 router that combines all endpoint routers.
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
+from app.api.deps import db_bulkhead
 from app.api.v1.auth import router as auth_router
 from app.api.v1.webhooks import router as webhooks_router
+from app.api.v1.push import router as push_router
 from app.api.v1.signals import router as signals_router
 from app.api.v1.accounts import router as accounts_router
 from app.api.v1.dashboard import router as dashboard_router
 from app.api.v1.admin import router as admin_router
+from app.api.v1.analytics import router as analytics_router
 
 
 api_router = APIRouter()
 
-# Include all routers
-api_router.include_router(auth_router)
-api_router.include_router(webhooks_router)
+# Include all routers. Each route class holds a slot of its own database
+# bulkhead; signal and dashboard routes mix classes and assign them per
+# route, and push connections take delivery slots per unit of work.
+api_router.include_router(auth_router, dependencies=[Depends(db_bulkhead("interactive"))])
+api_router.include_router(webhooks_router, dependencies=[Depends(db_bulkhead("ingest"))])
+# Before signals_router, whose /signals/{signal_id} would shadow /signals/stream
+api_router.include_router(push_router)
 api_router.include_router(signals_router)
-api_router.include_router(accounts_router)
+api_router.include_router(accounts_router, dependencies=[Depends(db_bulkhead("interactive"))])
 api_router.include_router(dashboard_router)
-api_router.include_router(admin_router)
+api_router.include_router(admin_router, dependencies=[Depends(db_bulkhead("interactive"))])
+api_router.include_router(analytics_router, dependencies=[Depends(db_bulkhead("bulk"))])
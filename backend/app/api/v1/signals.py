@@ -4,87 +4,214 @@ Signal endpoints for EA polling and signal management.
 import csv
 import io
 import logging
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Literal, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.api.deps import get_current_user, get_account_by_api_key
-from app.models.account import MTAccount
-from app.models.user import User
+from app.database import get_db, get_read_db
+from app.models.signal import Signal
+from app.models.signal_batch import SignalBatch
+from app.api.deps import (
+    authenticate_api_keys,
+    db_bulkhead,
+    get_current_user,
+    get_account_by_api_key,
+    record_ea_request,
+    schedule_next_poll,
+    skip_unchanged_poll,
+)
+from app.services.auth_cache import AccountPrincipal, UserPrincipal
 from app.schemas.signal import (
-    PendingSignal,
+    BatchPendingSignalsResponse,
+    BatchPollRequest,
+    BatchSignalResultRequest,
+    BatchSignalResultResponse,
     PendingSignalsResponse,
     SignalListResponse,
     SignalResponse,
     SignalResult,
 )
-from app.services.signal_processor import SignalProcessor
+from app.services.signal_processor import (
+    SIGNAL_LIST_COLUMNS,
+    SIGNAL_PAYLOAD_COLUMNS,
+    SignalProcessor,
+)
+from app.services.delivery_cache import delivery_payloads
+from app.services.delivery_sequence import delivery_sequences, etag
+from app.utils.ea_protocol import (
+    COMPACT_MEDIA_TYPE,
+    render_json_batch_poll_response,
+    render_json_poll_response,
+    render_poll_response,
+)
 
 
 router = APIRouter(prefix="/signals", tags=["Signals"])
 logger = logging.getLogger(__name__)
 
+# The columns the CSV export writes
+EXPORT_COLUMNS = (
+    Signal.id,
+    Signal.symbol,
+    SignalBatch.action,
+    SignalBatch.order_type,
+    Signal.quantity,
+    SignalBatch.price,
+    SignalBatch.take_profit,
+    SignalBatch.stop_loss,
+    Signal.status,
+    SignalBatch.comment,
+    Signal.created_at,
+    Signal.executed_at,
+    Signal.error_message,
+)
 
-@router.get("/pending", response_model=PendingSignalsResponse)
+
+@router.get(
+    "/pending",
+    response_model=PendingSignalsResponse,
+    # Runs before the dependencies below, so an unchanged poll never opens a session
+    # or takes a bulkhead slot
+    dependencies=[Depends(skip_unchanged_poll), Depends(db_bulkhead("delivery"))],
+    responses={304: {"description": "No new signals since the given delivery sequence"}},
+)
 async def get_pending_signals(
-    account: MTAccount = Depends(get_account_by_api_key),
+    request: Request,
+    format: Literal["json", "compact"] = Query("json", description="Response format"),
+    account: AccountPrincipal = Depends(get_account_by_api_key),
     db: AsyncSession = Depends(get_db),
-) -> PendingSignalsResponse:
+):
     """
     Get pending signals for an MT account (EA polling endpoint).
 
     This endpoint is called by the Expert Advisor to fetch new signals.
-    Signals are marked as 'sent' after being retrieved.
+    Signals are claimed (marked as 'sent') in the statement that retrieves them.
+
+    With format=compact the response is the plain-text line protocol
+    described in app.utils.ea_protocol instead of JSON.
+
+    The response carries the account's delivery sequence as ETag and
+    X-Delivery-Sequence; sending it back as `since` or If-None-Match
+    returns 304 until a new signal arrives.
+
+    Every poll response, 304 included, carries the delay until the EA's
+    next scheduled poll in X-Next-Poll-Ms (and next_poll_ms in JSON).
     """
     processor = SignalProcessor(db)
 
+    # Captured before the query: a signal committed after this point
+    # advances the sequence, so the next poll cannot skip it
+    sequence = delivery_sequences.current(account.id)
+    headers = {"ETag": etag(sequence), "X-Delivery-Sequence": str(sequence)}
+
     # Log entry
     logger.info(f"Checking pending signals for account {account.id}")
 
-    # Get pending signals
-    signals = await processor.get_pending_signals(account.id)
-    
+    # Claim pending signals: marked sent in the same statement that selects them, so a
+    # signal claimed concurrently by a batch poll or push connection is never sent twice
+    signals = await processor.claim_pending_signals([account.id])
+
     if signals:
-        logger.info(f"Found {len(signals)} pending signals for account {account.id}: {[str(s.id) for s in signals]}")
+        logger.info(f"Claimed {len(signals)} pending signals for account {account.id}: {[str(s.id) for s in signals]}")
     else:
         logger.debug(f"No pending signals for account {account.id}")
 
-    # Convert to response format and mark as sent
-    pending_signals = []
+    rendered = [delivery_payloads.get_or_render(signal) for signal in signals]
     for signal in signals:
-        pending_signals.append(
-            PendingSignal(
-                id=signal.id,
-                symbol=signal.symbol,
-                action=signal.action,
-                order_type=signal.order_type,
-                quantity=signal.quantity,
-                price=signal.price,
-                take_profit=signal.take_profit,
-                stop_loss=signal.stop_loss,
-                comment=signal.comment,
-            )
+        delivery_payloads.discard(signal.id)
+
+    next_poll_ms = schedule_next_poll(request, account)
+    if next_poll_ms is not None:
+        headers["X-Next-Poll-Ms"] = str(next_poll_ms)
+
+    # Concatenate the payloads pre-rendered at signal creation
+    if format == "compact":
+        return Response(
+            render_poll_response([r.compact for r in rendered], datetime.now(timezone.utc)),
+            media_type=COMPACT_MEDIA_TYPE,
+            headers=headers,
         )
-        # Mark as sent
-        await processor.mark_signal_sent(signal.id)
-        logger.info(f"Marked signal {signal.id} as sent")
 
-    return PendingSignalsResponse(
-        signals=pending_signals,
-        server_time=datetime.utcnow(),
+    return Response(
+        render_json_poll_response([r.json for r in rendered], datetime.utcnow(), next_poll_ms),
+        media_type="application/json",
+        headers=headers,
     )
 
 
-@router.post("/{signal_id}/result", response_model=SignalResponse)
+@router.post(
+    "/pending/batch",
+    response_model=BatchPendingSignalsResponse,
+    dependencies=[Depends(db_bulkhead("delivery"))],
+)
+async def get_pending_signals_batch(
+    request: Request,
+    batch: BatchPollRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get pending signals for several MT accounts at once (multi-account polling).
+
+    For terminals or relays serving several accounts from one machine.
+    API keys go in the body; the response has one entry per key, in
+    request order, with `error` set for invalid keys. The signals of all
+    accounts are claimed (marked as 'sent') in a single statement.
+    """
+    principals = await authenticate_api_keys(batch.api_keys, db)
+    accounts = list({a.id: a for a in principals.values()}.values())
+    if not accounts:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid API key",
+        )
+
+    for account in accounts:
+        record_ea_request(request, account)
+
+    signals = await SignalProcessor(db).claim_pending_signals([a.id for a in accounts])
+
+    rendered = {account.id: [] for account in accounts}
+    for signal in signals:
+        rendered[signal.account_id].append(delivery_payloads.get_or_render(signal).json)
+        delivery_payloads.discard(signal.id)
+
+    if signals:
+        logger.info(
+            f"Batch poll claimed {len(signals)} signals for {len(accounts)} accounts"
+        )
+
+    # The batch polls as one client, on the schedule of its first account
+    next_poll_ms = schedule_next_poll(request, accounts[0])
+    headers = {}
+    if next_poll_ms is not None:
+        headers["X-Next-Poll-Ms"] = str(next_poll_ms)
+
+    entries = []
+    for api_key in batch.api_keys:
+        account = principals.get(api_key)
+        # A key listed twice gets its signals once
+        entries.append((account.id, rendered.pop(account.id, [])) if account else (None, None))
+
+    return Response(
+        render_json_batch_poll_response(entries, datetime.utcnow(), next_poll_ms),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+@router.post(
+    "/{signal_id}/result",
+    response_model=SignalResponse,
+    dependencies=[Depends(db_bulkhead("delivery"))],
+)
 async def report_signal_result(
     signal_id: UUID,
     result: SignalResult,
-    account: MTAccount = Depends(get_account_by_api_key),
+    account: AccountPrincipal = Depends(get_account_by_api_key),
     db: AsyncSession = Depends(get_db),
 ) -> SignalResponse:
     """
@@ -109,8 +236,8 @@ async def report_signal_result(
             detail="Signal does not belong to this account",
         )
 
-    # Update signal with result
-    updated_signal = await processor.update_signal_result(signal_id, result)
+    # Update the signal already loaded above
+    updated_signal = await processor.apply_signal_result(signal, result)
 
     if result.success:
         logger.info(
@@ -125,7 +252,36 @@ async def report_signal_result(
     return updated_signal
 
 
-@router.get("", response_model=SignalListResponse)
+@router.post(
+    "/results",
+    response_model=BatchSignalResultResponse,
+    dependencies=[Depends(db_bulkhead("delivery"))],
+)
+async def report_signal_results(
+    batch: BatchSignalResultRequest,
+    account: AccountPrincipal = Depends(get_account_by_api_key),
+    db: AsyncSession = Depends(get_db),
+) -> BatchSignalResultResponse:
+    """
+    Report execution results for many signals at once (from EA).
+
+    Signals that do not exist or belong to another account are listed in
+    the response and skipped; the rest are updated.
+    """
+    processor = SignalProcessor(db)
+
+    response = await processor.update_signal_results(account.id, batch.results)
+
+    logger.info(
+        f"Batch result report from account {account.id}: "
+        f"{response.updated} updated, {len(response.not_found)} not found, "
+        f"{len(response.forbidden)} forbidden"
+    )
+
+    return response
+
+
+@router.get("", response_model=SignalListResponse, dependencies=[Depends(db_bulkhead("interactive"))])
 async def list_signals(
     account_id: Optional[UUID] = Query(None),
     status: Optional[str] = Query(None),
@@ -134,13 +290,18 @@ async def list_signals(
     to_date: Optional[datetime] = Query(None),
     page: int = Query(1, ge=1),
     per_page: int = Query(50, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    include_payload: bool = Query(False, description="Include raw_payload and execution_result"),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ) -> SignalListResponse:
     """
     List signals for the current user with filters.
+
+    The JSONB `raw_payload` and `execution_result` are null unless
+    include_payload is set; GET /signals/{id} always has them.
     """
     processor = SignalProcessor(db)
+    columns = SIGNAL_LIST_COLUMNS + SIGNAL_PAYLOAD_COLUMNS if include_payload else SIGNAL_LIST_COLUMNS
 
     signals, total = await processor.get_signals(
         user_id=current_user.id,
@@ -151,6 +312,7 @@ async def list_signals(
         to_date=to_date,
         page=page,
         per_page=per_page,
+        columns=columns,
     )
 
     return SignalListResponse(
@@ -162,15 +324,15 @@ async def list_signals(
     )
 
 
-@router.get("/export")
+@router.get("/export", dependencies=[Depends(db_bulkhead("bulk"))])
 async def export_signals(
     account_id: Optional[UUID] = Query(None),
     status: Optional[str] = Query(None),
     symbol: Optional[str] = Query(None),
     from_date: Optional[datetime] = Query(None),
     to_date: Optional[datetime] = Query(None),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ) -> StreamingResponse:
     """
     Export signals to CSV.
@@ -187,6 +349,7 @@ async def export_signals(
         to_date=to_date,
         page=1,
         per_page=10000,  # Max for export
+        columns=EXPORT_COLUMNS,
     )
 
     # Create CSV
@@ -229,11 +392,15 @@ async def export_signals(
     )
 
 
-@router.get("/{signal_id}", response_model=SignalResponse)
+@router.get(
+    "/{signal_id}",
+    response_model=SignalResponse,
+    dependencies=[Depends(db_bulkhead("interactive"))],
+)
 async def get_signal(
     signal_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ) -> SignalResponse:
     """
     Get a specific signal by ID.
@@ -251,10 +418,14 @@ async def get_signal(
     return signal
 
 
-@router.delete("/{signal_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/{signal_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(db_bulkhead("interactive"))],
+)
 async def cancel_signal(
     signal_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> None:
     """
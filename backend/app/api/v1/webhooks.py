@@ -102,25 +102,39 @@ async def receive_tradingview_webhook(
     processor = SignalProcessor(db)
 
     try:
-        signals = await processor.create_signal_from_webhook(user, payload)
+        fanout = await processor.create_signal_from_webhook(user, payload)
+        signals = fanout.signals
 
         if not signals:
             return WebhookResponse(
                 success=False,
-                message="No active accounts found to receive signal",
+                message=(
+                    f"All {fanout.skipped} target EA(s) are offline, signal skipped"
+                    if fanout.skipped
+                    else "No active accounts found to receive signal"
+                ),
                 signals_created=0,
+                signals_skipped=fanout.skipped,
             )
 
         logger.info(
             f"Created {len(signals)} signals for user {user.id}: "
             f"{payload.symbol} {payload.action}"
+            f" (skipped {fanout.skipped} offline, {fanout.short_ttl} short TTL)"
         )
 
+        message = f"Signal queued for {len(signals)} account(s)"
+        if fanout.skipped:
+            message += f", skipped {fanout.skipped} offline account(s)"
+
         return WebhookResponse(
             success=True,
             signal_id=signals[0].id if len(signals) == 1 else None,
-            message=f"Signal queued for {len(signals)} account(s)",
+            batch_id=signals[0].batch_id,
+            message=message,
             signals_created=len(signals),
+            signals_skipped=fanout.skipped,
+            signals_short_ttl=fanout.short_ttl,
         )
 
     except Exception as e:
@@ -2,7 +2,7 @@
 Application configuration using Pydantic Settings.
 """
 from functools import lru_cache
-from typing import List
+from typing import List, Literal
 from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
@@ -22,11 +22,28 @@ class Settings(BaseSettings):
     DATABASE_ECHO: bool = False
     DATABASE_POOL_SIZE: int = 20
     DATABASE_MAX_OVERFLOW: int = 10
-
-    @field_validator("DATABASE_URL", mode="before")
+    DATABASE_PREPARE_CONNECTIONS: int = 4  # Pooled connections the hot queries are prepared on at startup (0 = off)
+    DATABASE_READ_URL: str = ""  # Optional comma-separated read replicas for read-only endpoints (empty = primary)
+    DATABASE_READ_POOL_SIZE: int = 10  # Per replica
+    DATABASE_READ_MAX_OVERFLOW: int = 5
+    DATABASE_READ_MAX_LAG_SECONDS: float = 5.0  # Reads skip a replica while it lags more
+    DATABASE_READ_LAG_CHECK_SECONDS: float = 5.0  # How often replica health and lag are checked
+    DATABASE_READ_CHECK_TIMEOUT_SECONDS: float = 2.0  # A replica not answering the check in time is skipped
+    DATABASE_READ_YOUR_WRITES_SECONDS: float = 10.0  # Reads stay on the primary this long after a client's write
+
+    # Database Bulkheads (concurrent sessions per route class, all sharing the pool)
+    DB_BULKHEAD_INGEST: int = 8  # Webhooks
+    DB_BULKHEAD_DELIVERY: int = 14  # EA polls, results and push
+    DB_BULKHEAD_INTERACTIVE: int = 6  # Dashboard, accounts, auth and admin
+    DB_BULKHEAD_BULK: int = 2  # CSV exports and analytics reports
+    DB_BULKHEAD_TIMEOUT_SECONDS: float = 10.0  # Wait for a slot before answering 503
+
+    @field_validator("DATABASE_URL", "DATABASE_READ_URL", mode="before")
     @classmethod
     def convert_database_url(cls, v):
         """Convert postgresql:// to postgresql+asyncpg:// for async SQLAlchemy."""
+        if isinstance(v, str) and "," in v:
+            return ",".join(cls.convert_database_url(u.strip()) for u in v.split(",") if u.strip())
         if isinstance(v, str) and v:
             # Railway provides postgresql:// but asyncpg needs postgresql+asyncpg://
             if v.startswith("postgresql://") and "+asyncpg" not in v:
@@ -40,14 +57,29 @@ class Settings(BaseSettings):
     REDIS_URL: str = "redis://localhost:6379/0"
     REDIS_SIGNAL_EXPIRE_SECONDS: int = 60
 
+    # Signal Bus (cross-worker wakeups)
+    SIGNAL_BUS_BACKEND: Literal["local", "postgres", "redis"] = "postgres"  # Falls back to local off Postgres
+    SIGNAL_BUS_CHANNEL: str = "signal_wakeups"
+    SIGNAL_BUS_RECONNECT_SECONDS: float = 1.0
+    SIGNAL_BUS_PING_SECONDS: float = 5.0  # Liveness probe interval (and timeout) of the bus connection
+    LONG_POLL_MAX_SECONDS: int = 25  # Upper bound of the `wait` parameter of EA polls
+    PUSH_HEARTBEAT_SECONDS: int = 15  # Keepalive interval of idle push connections
+
     # JWT Authentication
     JWT_SECRET_KEY: str = "jwt-secret-key-change-in-production"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 hours
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    AUTH_TOKEN_CACHE_SIZE: int = 10000  # Verified access tokens kept per worker
+    AUTH_USER_CACHE_SIZE: int = 10000  # User principals kept per worker
+    AUTH_USER_CACHE_TTL_SECONDS: int = 30  # Bounds staleness across workers
+    AUTH_API_KEY_CACHE_SIZE: int = 10000  # EA API keys kept per worker
+    AUTH_API_KEY_CACHE_TTL_SECONDS: int = 30  # Bounds staleness across workers
 
     # Security
     BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2  # Threads dedicated to bcrypt
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 32  # Queued + running bcrypt calls
     API_KEY_LENGTH: int = 64
     WEBHOOK_SECRET_LENGTH: int = 64
     PASSWORD_RESET_TOKEN_EXPIRE_MINUTES: int = 30
@@ -59,6 +91,25 @@ class Settings(BaseSettings):
     # Signal Settings
     SIGNAL_EXPIRY_SECONDS: int = 60
     MAX_PENDING_SIGNALS_PER_ACCOUNT: int = 50
+    OFFLINE_SIGNAL_POLICY: Literal["skip", "queue", "deliver"] = "deliver"  # Default for offline EAs
+    OFFLINE_SIGNAL_TTL_SECONDS: int = 10  # Expiry of signals queued for offline EAs
+    DELIVERY_CACHE_SIZE: int = 50000  # Pre-rendered pending signal payloads kept per worker
+    CONDITIONAL_POLLING_ENABLED: bool = True  # Answer unchanged EA polls with 304 from memory
+
+    # EA Poll Scheduling
+    POLL_SCHEDULING_ENABLED: bool = True  # Send EAs the time of their next poll (next_poll_ms)
+    POLL_INTERVAL_MS: int = 2000  # Base interval; EAs declaring a longer one keep theirs
+    POLL_INTERVAL_MAX_MS: int = 10000  # Cap of the stretched interval
+    POLL_IDLE_SECONDS: int = 900  # Accounts without a signal this long poll at half rate (0 = never)
+    POLL_LOAD_THRESHOLD: float = 0.75  # DB pool utilization above which intervals stretch
+    POLL_SCHEDULE_SLOTS: int = 200  # Phases per interval that polls are spread over
+
+    # EA Heartbeats and Presence
+    HEARTBEAT_RESOLUTION_SECONDS: int = 30  # Min change before last_connected_at is rewritten
+    HEARTBEAT_FLUSH_INTERVAL_SECONDS: int = 10  # How often queued heartbeats are written
+    PRESENCE_MIN_ONLINE_SECONDS: int = 10  # EAs seen this recently are always online
+    PRESENCE_ONLINE_POLL_MULTIPLIER: float = 3.0  # Missed polls before an EA turns stale
+    PRESENCE_OFFLINE_SECONDS: int = 300  # Stale EAs turn offline after this
 
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:3000"]
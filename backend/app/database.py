@@ -1,8 +1,17 @@
 """
 Database configuration and session management.
 """
-from typing import AsyncGenerator
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Dict, List, Literal, Optional, Tuple
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.exc import InterfaceError, OperationalError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
@@ -10,6 +19,13 @@ from sqlalchemy.ext.asyncio import (
 from sqlalchemy.orm import declarative_base
 
 from app.config import settings
+from app.utils import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+RouteClass = Literal["ingest", "delivery", "interactive", "bulk"]
 
 # Create async engine
 engine = create_async_engine(
@@ -20,6 +36,23 @@ engine = create_async_engine(
     pool_pre_ping=True,
 )
 
+# Reads on the primary share its pool, in autocommit mode: no BEGIN/COMMIT round trips
+primary_read_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+
+# Optional read replicas
+replica_engines = [
+    create_async_engine(
+        url,
+        echo=settings.DATABASE_ECHO,
+        pool_size=settings.DATABASE_READ_POOL_SIZE,
+        max_overflow=settings.DATABASE_READ_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        isolation_level="AUTOCOMMIT",
+    )
+    for url in settings.DATABASE_READ_URL.split(",")
+    if url
+]
+
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -33,6 +66,284 @@ AsyncSessionLocal = async_sessionmaker(
 Base = declarative_base()
 
 
+class BulkheadFull(Exception):
+    """Raised when no bulkhead slot became free within the timeout."""
+
+
+class Bulkhead:
+    """
+    Cap on the sessions one class of routes may hold at once.
+
+    All route classes share the engine's pool, but each may only use
+    `limit` sessions concurrently, so a burst in one class (e.g. several
+    large CSV exports) queues on its own semaphore instead of taking
+    every pooled connection from EA delivery. Time spent waiting for a
+    slot is recorded as the `db.wait.<class>` timing.
+    """
+
+    def __init__(self, name: str, limit: int, timeout: float):
+        self.name = name
+        self.limit = limit
+        self.timeout = timeout
+        self.in_use = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(limit)
+        self._wait = metrics.timing(f"db.wait.{name}")
+
+    async def acquire(self) -> None:
+        """Take a slot, waiting up to `timeout` seconds; raises BulkheadFull after that."""
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            self._wait.observe(0.0)
+        else:
+            started = time.perf_counter()
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise BulkheadFull(self.name) from None
+            finally:
+                self.waiting -= 1
+                self._wait.observe(time.perf_counter() - started)
+        self.in_use += 1
+
+    def release(self) -> None:
+        """Return a slot taken with acquire()."""
+        self.in_use -= 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a slot for the duration of a block."""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        """Current occupancy of the bulkhead."""
+        return {
+            "limit": self.limit,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+        }
+
+
+db_bulkheads: Dict[RouteClass, Bulkhead] = {
+    name: Bulkhead(name, limit, settings.DB_BULKHEAD_TIMEOUT_SECONDS)
+    for name, limit in (
+        ("ingest", settings.DB_BULKHEAD_INGEST),
+        ("delivery", settings.DB_BULKHEAD_DELIVERY),
+        ("interactive", settings.DB_BULKHEAD_INTERACTIVE),
+        ("bulk", settings.DB_BULKHEAD_BULK),
+    )
+}
+
+
+# Whether the replica's WAL receiver is streaming, and the seconds it is behind:
+# 0 when it has replayed everything it received (an idle primary would
+# otherwise look like growing lag). A replica whose receiver disconnected
+# has also replayed everything it received, so only a streaming one is
+# trusted. pg_stat_wal_receiver shows its status only to superusers and
+# members of pg_read_all_stats.
+REPLICA_LAG_SQL = text("""
+    SELECT
+        EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') AS streaming,
+        CASE
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END AS lag
+""")
+
+
+class ReadReplica:
+    """
+    A read replica and its last measured replication lag.
+
+    A replica is healthy while its lag, measured by the replica set's
+    background check, is within `max_lag_seconds`. One that cannot be
+    measured, or fails a read with a connection error, is unhealthy until
+    the next check succeeds.
+    """
+
+    def __init__(self, engine: AsyncEngine, max_lag_seconds: float, check_timeout: float):
+        self.engine = engine
+        self.max_lag_seconds = max_lag_seconds
+        self.check_timeout = check_timeout
+        self.lag: Optional[float] = None
+        self.reads = 0
+        self.failures = 0
+
+    @property
+    def healthy(self) -> bool:
+        """Whether reads may go to the replica."""
+        return self.lag is not None and self.lag <= self.max_lag_seconds
+
+    async def _probe(self) -> Tuple[bool, float]:
+        """Whether the replica is streaming from the primary, and its lag in seconds."""
+        async with self.engine.connect() as conn:
+            row = (await conn.execute(REPLICA_LAG_SQL)).one()
+        return bool(row.streaming), float(row.lag or 0)
+
+    async def check(self) -> Optional[float]:
+        """Measure the replication lag in seconds; None if the replica is unreachable or not streaming."""
+        try:
+            streaming, lag = await asyncio.wait_for(self._probe(), self.check_timeout)
+        except (SQLAlchemyError, OSError, asyncio.TimeoutError) as e:
+            if self.lag is not None:
+                logger.warning(f"Read replica {self.engine.url.host} check failed: {e!r}")
+            self.lag = None
+            return None
+
+        if not streaming:
+            # Its lag would read 0 however far behind it falls
+            if self.lag is not None:
+                logger.warning(f"Read replica {self.engine.url.host} is not streaming from the primary")
+            self.lag = None
+            return None
+
+        self.lag = lag
+        return self.lag
+
+    def mark_failed(self, error: Exception) -> None:
+        """Take the replica out of rotation after a failed read, until its next check."""
+        self.failures += 1
+        if self.lag is not None:
+            logger.warning(f"Read replica {self.engine.url.host} failed a read: {error!r}")
+        self.lag = None
+
+    def stats(self) -> dict:
+        """Last measured state of the replica."""
+        return {
+            "host": self.engine.url.host,
+            "lag_seconds": round(self.lag, 3) if self.lag is not None else None,
+            "max_lag_seconds": self.max_lag_seconds,
+            "healthy": self.healthy,
+            "reads": self.reads,
+            "failures": self.failures,
+        }
+
+
+class ReadReplicaSet:
+    """
+    Read replicas used round-robin.
+
+    A background task checks every replica each `check_seconds`, so reads
+    never wait on a health check; `pick()` returns the next healthy
+    replica, or None (read from the primary) when none is.
+    """
+
+    def __init__(self, replicas: List[ReadReplica], check_seconds: float):
+        self.replicas = replicas
+        self.check_seconds = check_seconds
+        self._next = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.replicas)
+
+    def pick(self) -> Optional[ReadReplica]:
+        """Get the next healthy replica in rotation."""
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self._next]
+            self._next = (self._next + 1) % len(self.replicas)
+            if replica.healthy:
+                replica.reads += 1
+                return replica
+        return None
+
+    async def check_all(self) -> None:
+        """Check every replica concurrently."""
+        await asyncio.gather(*(r.check() for r in self.replicas))
+
+    async def _run(self) -> None:
+        while True:
+            await self.check_all()
+            await asyncio.sleep(self.check_seconds)
+
+    def start(self) -> None:
+        """Start the health checks (no-op without replicas)."""
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the health checks."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> List[dict]:
+        """Last measured state of each replica."""
+        return [r.stats() for r in self.replicas]
+
+
+read_replicas = ReadReplicaSet(
+    [
+        ReadReplica(
+            replica_engine,
+            max_lag_seconds=settings.DATABASE_READ_MAX_LAG_SECONDS,
+            check_timeout=settings.DATABASE_READ_CHECK_TIMEOUT_SECONDS,
+        )
+        for replica_engine in replica_engines
+    ],
+    check_seconds=settings.DATABASE_READ_LAG_CHECK_SECONDS,
+)
+
+
+class RecentWrites:
+    """
+    Clients that wrote within the last `window_seconds`.
+
+    Keyed by bearer token, so a dashboard reading right after its own
+    change (e.g. the account list after adding an account) is sent to the
+    primary instead of a replica that may not have replayed the change
+    yet. Tracked per worker and capped at `max_entries` clients, oldest
+    dropped first.
+    """
+
+    def __init__(self, window_seconds: float, max_entries: int = 10000):
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self._writes: "OrderedDict[str, float]" = OrderedDict()
+
+    def record(self, key: str, now: Optional[float] = None) -> None:
+        """Note a write by a client."""
+        self._writes[key] = time.monotonic() if now is None else now
+        self._writes.move_to_end(key)
+        while len(self._writes) > self.max_entries:
+            self._writes.popitem(last=False)
+
+    def recent(self, key: Optional[str], now: Optional[float] = None) -> bool:
+        """Whether a client wrote within the window."""
+        if key is None:
+            return False
+        written_at = self._writes.get(key)
+        if written_at is None:
+            return False
+        now = time.monotonic() if now is None else now
+        if now - written_at < self.window_seconds:
+            return True
+        del self._writes[key]
+        return False
+
+
+recent_writes = RecentWrites(settings.DATABASE_READ_YOUR_WRITES_SECONDS)
+
+
+def bearer_token(request: Request) -> Optional[str]:
+    """The bearer token of a request, if any."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    return token if scheme.lower() == "bearer" and token else None
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency that provides a database session.
@@ -49,10 +360,51 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency that provides a session for read-only endpoints.
+
+    Reads go round-robin to the healthy read replicas, and to the primary
+    when none is configured or healthy, or when the client wrote within
+    DATABASE_READ_YOUR_WRITES_SECONDS. A replica failing the read with a
+    connection error leaves the rotation until its next health check.
+    Either way the connection runs in autocommit mode and the session is
+    never committed, so a read costs only its own queries.
+    """
+    replica = None
+    if not recent_writes.recent(bearer_token(request)):
+        replica = read_replicas.pick()
+
+    bind = replica.engine if replica is not None else primary_read_engine
+    async with AsyncSessionLocal(bind=bind) as session:
+        try:
+            yield session
+        except (OperationalError, InterfaceError, OSError) as e:
+            if replica is not None:
+                replica.mark_failed(e)
+            raise
+
+
+def get_session_factory() -> async_sessionmaker:
+    """
+    Dependency that provides the session factory.
+
+    For long-lived connections (push channels) that open a short session
+    per unit of work instead of holding one for their whole lifetime.
+    """
+    return AsyncSessionLocal
+
+
+def pool_utilization() -> float:
+    """Fraction of the connection pool, overflow included, currently checked out."""
+    capacity = settings.DATABASE_POOL_SIZE + max(0, settings.DATABASE_MAX_OVERFLOW)
+    return engine.pool.checkedout() / capacity if capacity > 0 else 0.0
+
+
 async def init_db() -> None:
     """Initialize database tables."""
     # Import all models so they are registered with Base.metadata
-    from app.models import user, account, signal, symbol_mapping  # noqa: F401
+    from app.models import user, account, signal, signal_batch, symbol_mapping, latency_histogram  # noqa: F401
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -61,3 +413,5 @@ async def init_db() -> None:
 async def close_db() -> None:
     """Close database connections."""
     await engine.dispose()
+    for replica_engine in replica_engines:
+        await replica_engine.dispose()
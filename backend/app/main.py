@@ -9,8 +9,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from app.config import settings
-from app.database import init_db, close_db
+from app.database import engine, init_db, close_db, read_replicas
 from app.api.v1.router import api_router
+from app.services.heartbeat import heartbeats
+from app.services.hot_queries import prepare_hot_queries
+from app.services.signal_bus import signal_bus
+from app.utils.security import shutdown_password_executor
 
 
 # Configure logging
@@ -37,12 +41,28 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to initialize database: {e}")
         raise
 
+    connections = min(settings.DATABASE_PREPARE_CONNECTIONS, settings.DATABASE_POOL_SIZE)
+    if connections > 0:
+        try:
+            await prepare_hot_queries(engine, connections)
+        except Exception as e:
+            # Only a warm-up: the queries compile and prepare on first use anyway
+            logger.warning(f"Failed to prepare hot queries: {e}")
+
+    heartbeats.start()
+    signal_bus.start()
+    read_replicas.start()
+
     yield
 
     # Shutdown
     logger.info("Shutting down...")
+    await read_replicas.stop()
+    await signal_bus.stop()
+    await heartbeats.stop()
     await close_db()
     logger.info("Database connections closed")
+    shutdown_password_executor()
 
 
 # Create FastAPI application
@@ -4,6 +4,8 @@ SQLAlchemy models for the Trading Signal Bridge.
 from app.models.user import User
 from app.models.account import MTAccount
 from app.models.signal import Signal
+from app.models.signal_batch import SignalBatch
 from app.models.symbol_mapping import SymbolMapping
+from app.models.latency_histogram import LatencyHistogram
 
-__all__ = ["User", "MTAccount", "Signal", "SymbolMapping"]
+__all__ = ["User", "MTAccount", "Signal", "SignalBatch", "SymbolMapping", "LatencyHistogram"]
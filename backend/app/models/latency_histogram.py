@@ -0,0 +1,66 @@
+"""
+Latency histogram model for per-account, per-symbol, per-hour signal latency.
+"""
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, String, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class LatencyHistogram(Base):
+    """
+    Aggregated signal latency histograms for one account, symbol and hour.
+
+    `histograms` maps a metric name to a serialized app.utils.histogram.Histogram.
+    Rows are updated as execution results are reported and merged at query
+    time, so reports never need to scan raw signal rows.
+    """
+
+    __tablename__ = "latency_histograms"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    account_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("mt_accounts.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    symbol: Mapped[str] = mapped_column(
+        String(50),
+        nullable=False,
+    )
+    hour: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+    )
+    histograms: Mapped[dict] = mapped_column(
+        JSONB,
+        default=dict,
+        nullable=False,
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        UniqueConstraint("account_id", "symbol", "hour", name="uq_latency_account_symbol_hour"),
+        Index("idx_latency_histograms_user_hour", "user_id", "hour"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<LatencyHistogram(account_id={self.account_id}, symbol={self.symbol}, hour={self.hour})>"
@@ -1,12 +1,12 @@
 """
-Signal model for trading signals.
+Signal model: the delivery of a signal batch to one MT account.
 """
 import uuid
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from typing import TYPE_CHECKING
 
-from sqlalchemy import DateTime, ForeignKey, Index, Numeric, String, Text, func
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, Numeric, String, Text, func
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -14,11 +14,19 @@ from app.database import Base
 
 if TYPE_CHECKING:
     from app.models.account import MTAccount
+    from app.models.signal_batch import SignalBatch
     from app.models.user import User
 
 
 class Signal(Base):
-    """Signal model representing trading signals."""
+    """
+    A trading signal as delivered to one MT account.
+
+    The fields shared by every account a webhook fans out to (action,
+    order type, price, TP/SL, comment, source and the raw payload) live
+    once on its SignalBatch, which is always joined in, and are exposed
+    here read-only. In SQL, select them from SignalBatch.
+    """
 
     __tablename__ = "signals"
 
@@ -39,41 +47,21 @@ class Signal(Base):
         nullable=True,
         index=True,
     )
+    batch_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("signal_batches.id", ondelete="CASCADE"),
+        nullable=False,
+    )
 
-    # Signal details
+    # Per-account signal details: mapped symbol and scaled quantity
     symbol: Mapped[str] = mapped_column(
         String(50),
         nullable=False,
     )
-    action: Mapped[str] = mapped_column(
-        String(20),
-        nullable=False,
-    )  # buy, sell, buy_limit, buy_stop, sell_limit, sell_stop, close, close_partial, modify
-    order_type: Mapped[str] = mapped_column(
-        String(20),
-        default="market",
-        nullable=False,
-    )  # market, limit, stop
     quantity: Mapped[Decimal | None] = mapped_column(
         Numeric(10, 4),
         nullable=True,
     )
-    price: Mapped[Decimal | None] = mapped_column(
-        Numeric(20, 8),
-        nullable=True,
-    )
-    take_profit: Mapped[Decimal | None] = mapped_column(
-        Numeric(20, 8),
-        nullable=True,
-    )
-    stop_loss: Mapped[Decimal | None] = mapped_column(
-        Numeric(20, 8),
-        nullable=True,
-    )
-    comment: Mapped[str | None] = mapped_column(
-        String(255),
-        nullable=True,
-    )
 
     # Status tracking
     status: Mapped[str] = mapped_column(
@@ -81,26 +69,41 @@ class Signal(Base):
         default="pending",
         nullable=False,
     )  # pending, sent, executed, partial, failed, expired, cancelled
-    source: Mapped[str] = mapped_column(
-        String(50),
-        default="tradingview",
-        nullable=False,
-    )
 
-    # Metadata
-    raw_payload: Mapped[dict | None] = mapped_column(
-        JSONB,
-        nullable=True,
-    )
+    # Metadata (deferred: loaded only with undefer_group("payload"))
     execution_result: Mapped[dict | None] = mapped_column(
         JSONB,
         nullable=True,
+        deferred=True,
+        deferred_group="payload",
     )
     error_message: Mapped[str | None] = mapped_column(
         Text,
         nullable=True,
     )
 
+    # Execution result fields (typed copies of execution_result for querying)
+    ticket: Mapped[int | None] = mapped_column(
+        BigInteger,
+        nullable=True,
+    )
+    executed_price: Mapped[Decimal | None] = mapped_column(
+        Numeric(20, 8),
+        nullable=True,
+    )
+    executed_quantity: Mapped[Decimal | None] = mapped_column(
+        Numeric(10, 4),
+        nullable=True,
+    )
+    execution_time_ms: Mapped[int | None] = mapped_column(
+        Integer,
+        nullable=True,
+    )
+    error_code: Mapped[int | None] = mapped_column(
+        Integer,
+        nullable=True,
+    )
+
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -130,17 +133,59 @@ class Signal(Base):
         "MTAccount",
         back_populates="signals",
     )
+    batch: Mapped["SignalBatch"] = relationship(
+        "SignalBatch",
+        lazy="joined",
+        innerjoin=True,
+    )
 
     __table_args__ = (
         Index("idx_signals_user_id", "user_id"),
         Index("idx_signals_account_id", "account_id"),
+        Index("idx_signals_batch_id", "batch_id"),
         Index("idx_signals_status", "status"),
         Index("idx_signals_created_at", "created_at"),
+        Index("idx_signals_ticket", "ticket", postgresql_where=ticket.isnot(None)),
+        Index("idx_signals_error_code", "error_code", postgresql_where=error_code.isnot(None)),
     )
 
     def __repr__(self) -> str:
         return f"<Signal(id={self.id}, symbol={self.symbol}, action={self.action}, status={self.status})>"
 
+    # Fields shared by the batch
+    @property
+    def action(self) -> str:
+        return self.batch.action
+
+    @property
+    def order_type(self) -> str:
+        return self.batch.order_type
+
+    @property
+    def price(self) -> Decimal | None:
+        return self.batch.price
+
+    @property
+    def take_profit(self) -> Decimal | None:
+        return self.batch.take_profit
+
+    @property
+    def stop_loss(self) -> Decimal | None:
+        return self.batch.stop_loss
+
+    @property
+    def comment(self) -> str | None:
+        return self.batch.comment
+
+    @property
+    def source(self) -> str:
+        return self.batch.source
+
+    @property
+    def raw_payload(self) -> dict | None:
+        """The webhook payload; needs undefer_group("payload") on the batch to be loaded."""
+        return self.batch.raw_payload
+
     @property
     def is_expired(self) -> bool:
         """Check if the signal has expired."""
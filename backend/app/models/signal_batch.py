@@ -0,0 +1,88 @@
+"""
+Signal batch model: one webhook, fanned out to the user's accounts.
+"""
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import DateTime, ForeignKey, Index, Numeric, String, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class SignalBatch(Base):
+    """
+    The account-independent part of a signal, stored once per webhook.
+
+    Each target account gets a thin Signal (delivery) row referencing the
+    batch, holding only what differs per account: the mapped symbol, the
+    scaled quantity, the delivery status and execution result.
+    """
+
+    __tablename__ = "signal_batches"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    # Signal details, as received
+    action: Mapped[str] = mapped_column(
+        String(20),
+        nullable=False,
+    )
+    order_type: Mapped[str] = mapped_column(
+        String(20),
+        default="market",
+        nullable=False,
+    )
+    price: Mapped[Decimal | None] = mapped_column(
+        Numeric(20, 8),
+        nullable=True,
+    )
+    take_profit: Mapped[Decimal | None] = mapped_column(
+        Numeric(20, 8),
+        nullable=True,
+    )
+    stop_loss: Mapped[Decimal | None] = mapped_column(
+        Numeric(20, 8),
+        nullable=True,
+    )
+    comment: Mapped[str | None] = mapped_column(
+        String(255),
+        nullable=True,
+    )
+    source: Mapped[str] = mapped_column(
+        String(50),
+        default="tradingview",
+        nullable=False,
+    )
+
+    # Original webhook payload (deferred: loaded only with undefer_group("payload"))
+    raw_payload: Mapped[dict | None] = mapped_column(
+        JSONB,
+        nullable=True,
+        deferred=True,
+        deferred_group="payload",
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        Index("idx_signal_batches_user_id", "user_id"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<SignalBatch(id={self.id}, action={self.action}, user_id={self.user_id})>"
@@ -59,3 +59,25 @@ class MTAccountListResponse(BaseModel):
 
     accounts: List[MTAccountResponse]
     total: int
+
+
+class AccountPresence(BaseModel):
+    """Schema for the live connection status of an MT account's EA."""
+
+    account_id: UUID
+    user_id: UUID
+    name: Optional[str] = None
+    status: Literal["online", "stale", "offline"]
+    last_seen_at: Optional[datetime] = None
+    poll_interval_seconds: Optional[float] = None
+    client_version: Optional[str] = None
+    ip: Optional[str] = None
+
+
+class AccountPresenceListResponse(BaseModel):
+    """Schema for EA connection statuses with per-status counts."""
+
+    accounts: List[AccountPresence]
+    online: int
+    stale: int
+    offline: int
@@ -0,0 +1,68 @@
+"""
+Analytics-related Pydantic schemas.
+"""
+from typing import Dict, List, Literal, Optional
+
+from pydantic import BaseModel
+
+
+LatencyGroupBy = Literal["account", "symbol", "hour"]
+
+FillQualityGroupBy = Literal["account", "symbol", "broker"]
+
+
+class HistogramBucket(BaseModel):
+    """Schema for one histogram bucket (inclusive bounds in milliseconds)."""
+
+    lower_ms: int
+    upper_ms: int
+    count: int
+
+
+class LatencyStats(BaseModel):
+    """Schema for latency percentiles and histogram of one metric."""
+
+    count: int
+    mean_ms: Optional[float] = None
+    p50_ms: Optional[int] = None
+    p90_ms: Optional[int] = None
+    p99_ms: Optional[int] = None
+    max_ms: Optional[int] = None
+    histogram: List[HistogramBucket]
+
+
+class LatencyGroup(BaseModel):
+    """Schema for latency metrics of one account, symbol or hour."""
+
+    key: str
+    metrics: Dict[str, LatencyStats]
+
+
+class LatencyReportResponse(BaseModel):
+    """Schema for the latency analytics report."""
+
+    group_by: LatencyGroupBy
+    groups: List[LatencyGroup]
+
+
+class FillQualityGroup(BaseModel):
+    """Schema for fill quality of one account, symbol or broker."""
+
+    key: str
+    results: int
+    filled: int
+    failed: int
+    fill_rate: float
+    avg_fill_ratio: Optional[float] = None
+    slippage_samples: int
+    avg_slippage_bps: Optional[float] = None
+    median_slippage_bps: Optional[float] = None
+    p95_slippage_bps: Optional[float] = None
+    failure_codes: Dict[str, int]
+
+
+class FillQualityReportResponse(BaseModel):
+    """Schema for the fill quality report."""
+
+    group_by: FillQualityGroupBy
+    groups: List[FillQualityGroup]
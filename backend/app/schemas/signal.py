@@ -16,6 +16,12 @@ SignalAction = Literal[
 
 OrderType = Literal["market", "limit", "stop"]
 
+# Largest number of results an EA may report in one batch
+MAX_BATCH_RESULTS = 200
+
+# Largest number of accounts polled in one batch
+MAX_BATCH_POLL_ACCOUNTS = 50
+
 SignalStatus = Literal[
     "pending", "sent", "executed", "partial", "failed", "expired", "cancelled"
 ]
@@ -51,6 +57,11 @@ class SignalResponse(SignalBase):
     raw_payload: Optional[dict] = None
     execution_result: Optional[dict] = None
     error_message: Optional[str] = None
+    ticket: Optional[int] = None
+    executed_price: Optional[Decimal] = None
+    executed_quantity: Optional[Decimal] = None
+    execution_time_ms: Optional[int] = None
+    error_code: Optional[int] = None
     created_at: datetime
     sent_at: Optional[datetime] = None
     executed_at: Optional[datetime] = None
@@ -79,6 +90,29 @@ class PendingSignalsResponse(BaseModel):
 
     signals: List[PendingSignal]
     server_time: datetime
+    next_poll_ms: Optional[int] = None  # Server-assigned delay until the next poll
+
+
+class BatchPollRequest(BaseModel):
+    """Schema for polling several MT accounts at once."""
+
+    api_keys: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_POLL_ACCOUNTS)
+
+
+class AccountPendingSignals(BaseModel):
+    """Pending signals of one account in a batch poll; error is set for an invalid API key."""
+
+    account_id: Optional[UUID] = None
+    signals: List[PendingSignal] = Field(default_factory=list)
+    error: Optional[str] = None
+
+
+class BatchPendingSignalsResponse(BaseModel):
+    """Schema for batch poll response, one entry per requested API key in request order."""
+
+    accounts: List[AccountPendingSignals]
+    server_time: datetime
+    next_poll_ms: Optional[int] = None
 
 
 class SignalResult(BaseModel):
@@ -93,6 +127,26 @@ class SignalResult(BaseModel):
     error_message: Optional[str] = None
 
 
+class SignalResultItem(SignalResult):
+    """Schema for one execution result in a batch report."""
+
+    signal_id: UUID
+
+
+class BatchSignalResultRequest(BaseModel):
+    """Schema for a batch of execution results from EA."""
+
+    results: List[SignalResultItem] = Field(..., min_length=1, max_length=MAX_BATCH_RESULTS)
+
+
+class BatchSignalResultResponse(BaseModel):
+    """Schema for the outcome of a batch result report."""
+
+    updated: int
+    not_found: List[UUID] = Field(default_factory=list)
+    forbidden: List[UUID] = Field(default_factory=list)
+
+
 class SignalListResponse(BaseModel):
     """Schema for paginated list of signals."""
 
@@ -36,5 +36,8 @@ class WebhookResponse(BaseModel):
 
     success: bool
     signal_id: Optional[UUID] = None
+    batch_id: Optional[UUID] = None  # Shared by all signals created for the webhook
     message: str
     signals_created: Optional[int] = None
+    signals_skipped: Optional[int] = None  # Offline EAs with the "skip" policy
+    signals_short_ttl: Optional[int] = None  # Offline EAs with the "queue" policy
@@ -0,0 +1,359 @@
+"""
+Analytics service for signal execution latency and fill quality.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import and_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.account import MTAccount
+from app.models.latency_histogram import LatencyHistogram
+from app.models.signal import Signal
+from app.models.signal_batch import SignalBatch
+from app.schemas.signal import SignalResult
+from app.utils.histogram import Histogram
+
+
+# Latency metrics tracked per account, symbol and hour (all in milliseconds)
+LATENCY_METRICS = (
+    "delivery_ms",      # webhook received -> sent to EA
+    "execution_ms",     # sent to EA -> result reported
+    "total_ms",         # webhook received -> result reported
+    "ea_execution_ms",  # execution time reported by the EA
+)
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes as UTC."""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _elapsed_ms(start: datetime, end: datetime) -> int:
+    """Get milliseconds elapsed between two datetimes."""
+    return int((_as_utc(end) - _as_utc(start)).total_seconds() * 1000)
+
+
+def summarize_fill_quality(
+    keys: Sequence[str],
+    actions: Sequence[str],
+    requested_price: Sequence,
+    executed_price: Sequence,
+    requested_quantity: Sequence,
+    executed_quantity: Sequence,
+    success: Sequence[bool],
+    error_codes: Sequence,
+) -> List[dict]:
+    """
+    Compute fill quality per group from column arrays, one entry per result.
+
+    Slippage is signed so that positive means a worse price than requested
+    (paid more on buys, received less on sells) and is reported in basis
+    points of the requested price. Rows without a requested price (market
+    orders), and close and modify actions, which have no entry direction,
+    count towards fill rate and fill ratio but not slippage. All
+    per-row work is vectorized; only the per-group percentiles loop, and
+    that loop is over groups rather than rows.
+    """
+    if len(keys) == 0:
+        return []
+
+    group_keys, groups = np.unique(np.asarray(keys, dtype=object), return_inverse=True)
+    group_count = len(group_keys)
+
+    actions = np.asarray(actions, dtype=str)
+    is_buy = np.char.startswith(actions, "buy")
+    is_entry = is_buy | np.char.startswith(actions, "sell")
+    requested_price = np.asarray(requested_price, dtype=float)
+    executed_price = np.asarray(executed_price, dtype=float)
+    requested_quantity = np.asarray(requested_quantity, dtype=float)
+    executed_quantity = np.asarray(executed_quantity, dtype=float)
+    success = np.asarray(success, dtype=bool)
+    error_codes = np.asarray([code if code is not None else 0 for code in error_codes], dtype=np.int64)
+
+    totals = np.bincount(groups, minlength=group_count)
+    filled = np.bincount(groups, weights=success.astype(float), minlength=group_count)
+
+    # Slippage in basis points, positive = adverse
+    with np.errstate(divide="ignore", invalid="ignore"):
+        direction = np.where(is_buy, 1.0, -1.0)
+        slippage_bps = (executed_price - requested_price) * direction / requested_price * 10000
+        fill_ratio = executed_quantity / requested_quantity
+
+    has_slippage = success & is_entry & np.isfinite(slippage_bps) & (requested_price > 0)
+    slippage_counts = np.bincount(groups[has_slippage], minlength=group_count)
+    slippage_sums = np.bincount(groups[has_slippage], weights=slippage_bps[has_slippage], minlength=group_count)
+
+    has_fill_ratio = success & np.isfinite(fill_ratio) & (requested_quantity > 0)
+    fill_ratio_counts = np.bincount(groups[has_fill_ratio], minlength=group_count)
+    fill_ratio_sums = np.bincount(groups[has_fill_ratio], weights=fill_ratio[has_fill_ratio], minlength=group_count)
+
+    # Sort slippage by group so each group's values are one contiguous slice
+    slippage_groups = groups[has_slippage]
+    order = np.lexsort((slippage_bps[has_slippage], slippage_groups))
+    sorted_slippage = slippage_bps[has_slippage][order]
+    bounds = np.searchsorted(slippage_groups[order], np.arange(group_count + 1))
+
+    # Count (group, error code) pairs among failures
+    failed = ~success
+    failure_pairs, failure_counts = (
+        np.unique(np.stack([groups[failed], error_codes[failed]], axis=1), axis=0, return_counts=True)
+        if failed.any()
+        else (np.empty((0, 2), dtype=np.int64), np.empty(0, dtype=np.int64))
+    )
+
+    summaries = []
+    for index, key in enumerate(group_keys):
+        group_slippage = sorted_slippage[bounds[index]:bounds[index + 1]]
+        has_group_slippage = slippage_counts[index] > 0
+        pair_mask = failure_pairs[:, 0] == index
+        summaries.append({
+            "key": key,
+            "results": int(totals[index]),
+            "filled": int(filled[index]),
+            "failed": int(totals[index] - filled[index]),
+            "fill_rate": round(float(filled[index] / totals[index]), 4),
+            "avg_fill_ratio": (
+                round(float(fill_ratio_sums[index] / fill_ratio_counts[index]), 4)
+                if fill_ratio_counts[index] else None
+            ),
+            "slippage_samples": int(slippage_counts[index]),
+            "avg_slippage_bps": (
+                round(float(slippage_sums[index] / slippage_counts[index]), 2)
+                if has_group_slippage else None
+            ),
+            "median_slippage_bps": (
+                round(float(np.percentile(group_slippage, 50)), 2) if has_group_slippage else None
+            ),
+            "p95_slippage_bps": (
+                round(float(np.percentile(group_slippage, 95)), 2) if has_group_slippage else None
+            ),
+            "failure_codes": {
+                str(int(code)): int(count)
+                for code, count in zip(failure_pairs[pair_mask, 1], failure_counts[pair_mask])
+            },
+        })
+
+    return summaries
+
+
+class AnalyticsService:
+    """Service for recording and reporting signal analytics."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def record_signal_latency(
+        self,
+        signal: Signal,
+        result: SignalResult,
+        reported_at: datetime,
+    ) -> None:
+        """Add a reported result to its account/symbol/hour latency histograms."""
+        await self.record_signal_latencies([(signal, result)], reported_at)
+
+    async def record_signal_latencies(
+        self,
+        reports: Sequence[Tuple[Signal, SignalResult]],
+        reported_at: datetime,
+    ) -> None:
+        """
+        Add reported results to their latency histograms.
+
+        Reports are grouped by account/symbol/hour first, so each histogram
+        row is locked and rewritten once per call. Rows are locked in a
+        stable order to avoid deadlocks between concurrent batches.
+        """
+        grouped: Dict[Tuple[UUID, str, datetime], Tuple[Signal, List[Dict[str, int]]]] = {}
+
+        for signal, result in reports:
+            if signal.account_id is None:
+                continue
+
+            samples = {"total_ms": _elapsed_ms(signal.created_at, reported_at)}
+            if signal.sent_at:
+                samples["delivery_ms"] = _elapsed_ms(signal.created_at, signal.sent_at)
+                samples["execution_ms"] = _elapsed_ms(signal.sent_at, reported_at)
+            if result.execution_time_ms is not None:
+                samples["ea_execution_ms"] = result.execution_time_ms
+
+            hour = _as_utc(signal.created_at).replace(minute=0, second=0, microsecond=0)
+            key = (signal.account_id, signal.symbol, hour)
+            grouped.setdefault(key, (signal, []))[1].append(samples)
+
+        for key in sorted(grouped, key=lambda k: (str(k[0]), k[1], k[2])):
+            signal, sample_sets = grouped[key]
+            row = await self._get_or_create_histogram_row(signal, key[2])
+
+            stored = row.histograms or {}
+            histograms = {metric: Histogram.from_dict(data) for metric, data in stored.items()}
+            for samples in sample_sets:
+                for metric, value in samples.items():
+                    histograms.setdefault(metric, Histogram()).record(value)
+
+            # Reassign so the JSONB change is flushed
+            row.histograms = {metric: h.to_dict() for metric, h in histograms.items()}
+
+    async def _get_or_create_histogram_row(
+        self,
+        signal: Signal,
+        hour: datetime,
+    ) -> LatencyHistogram:
+        """Get the locked histogram row for a signal's account/symbol/hour, creating it if needed."""
+        query = (
+            select(LatencyHistogram)
+            .where(
+                and_(
+                    LatencyHistogram.account_id == signal.account_id,
+                    LatencyHistogram.symbol == signal.symbol,
+                    LatencyHistogram.hour == hour,
+                )
+            )
+            .with_for_update()
+        )
+
+        result = await self.db.execute(query)
+        row = result.scalar_one_or_none()
+        if row:
+            return row
+
+        row = LatencyHistogram(
+            user_id=signal.user_id,
+            account_id=signal.account_id,
+            symbol=signal.symbol,
+            hour=hour,
+            histograms={},
+        )
+        try:
+            async with self.db.begin_nested():
+                self.db.add(row)
+        except IntegrityError:
+            # Another report created the row concurrently; lock and use theirs
+            result = await self.db.execute(query)
+            row = result.scalar_one()
+
+        return row
+
+    async def get_latency_histograms(
+        self,
+        user_id: UUID,
+        group_by: str = "account",
+        account_id: Optional[UUID] = None,
+        symbol: Optional[str] = None,
+        from_date: Optional[datetime] = None,
+        to_date: Optional[datetime] = None,
+    ) -> Dict[str, Dict[str, Histogram]]:
+        """
+        Get merged latency histograms grouped by account, symbol or hour.
+
+        Returns a mapping of group key to {metric: Histogram}.
+        """
+        query = select(
+            LatencyHistogram.account_id,
+            LatencyHistogram.symbol,
+            LatencyHistogram.hour,
+            LatencyHistogram.histograms,
+        ).where(LatencyHistogram.user_id == user_id)
+
+        if account_id:
+            query = query.where(LatencyHistogram.account_id == account_id)
+        if symbol:
+            query = query.where(LatencyHistogram.symbol == symbol)
+        if from_date:
+            query = query.where(LatencyHistogram.hour >= from_date)
+        if to_date:
+            query = query.where(LatencyHistogram.hour <= to_date)
+
+        result = await self.db.execute(query)
+
+        groups: Dict[str, Dict[str, Histogram]] = {}
+        for row in result.all():
+            if group_by == "symbol":
+                key = row.symbol
+            elif group_by == "hour":
+                key = _as_utc(row.hour).isoformat()
+            else:
+                key = str(row.account_id)
+
+            metrics = groups.setdefault(key, {})
+            for metric, data in row.histograms.items():
+                metrics.setdefault(metric, Histogram()).merge(Histogram.from_dict(data))
+
+        return dict(sorted(groups.items()))
+
+    async def get_fill_quality(
+        self,
+        user_id: UUID,
+        group_by: str = "account",
+        account_id: Optional[UUID] = None,
+        symbol: Optional[str] = None,
+        from_date: Optional[datetime] = None,
+        to_date: Optional[datetime] = None,
+    ) -> List[dict]:
+        """
+        Get slippage, fill ratio and failure codes grouped by account, symbol or broker.
+
+        Only the typed result columns needed are selected (never the JSONB
+        blobs), then summarized in bulk by summarize_fill_quality().
+        """
+        query = (
+            select(
+                Signal.account_id,
+                Signal.symbol,
+                MTAccount.broker,
+                SignalBatch.action,
+                SignalBatch.price,
+                Signal.executed_price,
+                Signal.quantity,
+                Signal.executed_quantity,
+                Signal.status,
+                Signal.error_code,
+            )
+            .join(MTAccount, MTAccount.id == Signal.account_id)
+            .join(Signal.batch)
+            .where(
+                and_(
+                    Signal.user_id == user_id,
+                    Signal.status.in_(("executed", "failed")),
+                )
+            )
+        )
+
+        if account_id:
+            query = query.where(Signal.account_id == account_id)
+        if symbol:
+            query = query.where(Signal.symbol == symbol)
+        if from_date:
+            query = query.where(Signal.created_at >= from_date)
+        if to_date:
+            query = query.where(Signal.created_at <= to_date)
+
+        result = await self.db.execute(query)
+        rows = result.all()
+        if not rows:
+            return []
+
+        (
+            account_ids, symbols, brokers, actions, prices, executed_prices,
+            quantities, executed_quantities, statuses, error_codes,
+        ) = zip(*rows)
+        if group_by == "symbol":
+            keys = symbols
+        elif group_by == "broker":
+            keys = [broker or "unknown" for broker in brokers]
+        else:
+            keys = [str(account_id) for account_id in account_ids]
+
+        return summarize_fill_quality(
+            keys=keys,
+            actions=actions,
+            requested_price=prices,
+            executed_price=executed_prices,
+            requested_quantity=quantities,
+            executed_quantity=executed_quantities,
+            success=[status == "executed" for status in statuses],
+            error_codes=error_codes,
+        )
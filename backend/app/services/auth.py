@@ -11,9 +11,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
 from app.models.user import User
 from app.schemas.user import UserCreate, Token
+from app.services import hot_queries
 from app.utils.security import (
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_password_async,
     generate_webhook_secret,
     create_access_token,
     create_refresh_token,
@@ -45,9 +46,7 @@ class AuthService:
 
     async def get_user_by_webhook_secret(self, secret: str) -> Optional[User]:
         """Get a user by webhook secret."""
-        result = await self.db.execute(
-            select(User).where(User.webhook_secret == secret)
-        )
+        result = await hot_queries.user_by_webhook_secret.execute(self.db, {"secret": secret})
         return result.scalar_one_or_none()
 
     async def create_user(self, user_data: UserCreate) -> User:
@@ -60,7 +59,7 @@ class AuthService:
         # Create user
         user = User(
             email=user_data.email,
-            password_hash=hash_password(user_data.password),
+            password_hash=await hash_password_async(user_data.password),
             full_name=user_data.full_name,
             webhook_secret=generate_webhook_secret(),
         )
@@ -78,7 +77,7 @@ class AuthService:
         if not user:
             return None
 
-        if not verify_password(password, user.password_hash):
+        if not await verify_password_async(password, user.password_hash):
             return None
 
         if not user.is_active:
@@ -124,7 +123,7 @@ class AuthService:
 
     async def update_password(self, user: User, new_password: str) -> None:
         """Update user password."""
-        user.password_hash = hash_password(new_password)
+        user.password_hash = await hash_password_async(new_password)
         await self.db.flush()
 
     async def create_password_reset_token_for_user(self, email: str) -> Optional[str]:
@@ -157,7 +156,7 @@ class AuthService:
         if not user or not user.is_active:
             return False
         
-        user.password_hash = hash_password(new_password)
+        user.password_hash = await hash_password_async(new_password)
         await self.db.flush()
         return True
 
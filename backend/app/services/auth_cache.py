@@ -0,0 +1,258 @@
+"""
+In-process caches for verified JWT claims, user principals and EA API keys.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+
+# Session.info keys collecting users and accounts to invalidate once the session commits
+_PENDING_USERS_KEY = "auth_cache_users"
+_PENDING_ACCOUNTS_KEY = "auth_cache_accounts"
+
+
+@dataclass(frozen=True, slots=True)
+class UserPrincipal:
+    """Slim authenticated user, enough for authorization checks and scoping queries."""
+
+    id: UUID
+    email: str
+    is_active: bool
+    is_admin: bool
+    version: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class AccountPrincipal:
+    """Slim MT account authenticated by API key, enough to serve EA requests."""
+
+    id: UUID
+    user_id: UUID
+    is_active: bool
+    settings: Dict[str, Any]
+
+
+class AuthCache:
+    """
+    Bounded LRU caches for decoded access tokens and user principals.
+
+    Token claims are keyed by a SHA-256 digest of the token and kept until
+    the token's own `exp`, so a cached token is never accepted past its
+    expiry. Principals expire after a TTL and are versioned per user:
+    invalidate_user() bumps the version, which drops the cached principal
+    and rejects any principal loaded from the database before the bump.
+    Versions are drawn from the global invalidation generation and only
+    the most recent max_users are kept; an evicted user reports the
+    highest version evicted so far, which still rejects every principal
+    loaded before its own bump.
+
+    API keys are keyed by digest as well and checked against both the
+    account's and its owner's version, so invalidate_account() and
+    invalidate_user() also retire every cached key they affect. Since the
+    account behind a key is unknown until it is loaded, a key is only
+    cached if no invalidation at all happened while it was being loaded.
+    Account versions are bounded to max_api_keys the same way.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        max_users: int,
+        user_ttl_seconds: float,
+        max_api_keys: int,
+        api_key_ttl_seconds: float,
+    ):
+        self.max_tokens = max_tokens
+        self.max_users = max_users
+        self.user_ttl_seconds = user_ttl_seconds
+        self.max_api_keys = max_api_keys
+        self.api_key_ttl_seconds = api_key_ttl_seconds
+        self._claims: "OrderedDict[bytes, tuple[dict, float]]" = OrderedDict()
+        self._users: "OrderedDict[UUID, tuple[UserPrincipal, float]]" = OrderedDict()
+        self._accounts: "OrderedDict[bytes, tuple[AccountPrincipal, int, int, float]]" = OrderedDict()
+        self._versions: "OrderedDict[UUID, int]" = OrderedDict()
+        self._evicted_user_version = 0
+        self._account_versions: "OrderedDict[UUID, int]" = OrderedDict()
+        self._evicted_account_version = 0
+        self._generation = 0
+
+    @staticmethod
+    def _token_key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get_claims(self, token: str) -> Optional[dict]:
+        """Get cached claims for a token that has not expired."""
+        key = self._token_key(token)
+        entry = self._claims.get(key)
+        if entry is None:
+            return None
+
+        claims, expires_at = entry
+        if time.time() >= expires_at:
+            del self._claims[key]
+            return None
+
+        self._claims.move_to_end(key)
+        return claims
+
+    def put_claims(self, token: str, claims: dict) -> None:
+        """Cache verified claims until the token's expiry."""
+        expires_at = claims.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            return
+
+        key = self._token_key(token)
+        self._claims[key] = (claims, float(expires_at))
+        self._claims.move_to_end(key)
+        while len(self._claims) > self.max_tokens:
+            self._claims.popitem(last=False)
+
+    def user_version(self, user_id: UUID) -> int:
+        """Get the current invalidation version of a user."""
+        return self._versions.get(user_id, self._evicted_user_version)
+
+    def get_user(self, user_id: UUID) -> Optional[UserPrincipal]:
+        """Get a cached principal that is current and within its TTL."""
+        entry = self._users.get(user_id)
+        if entry is None:
+            return None
+
+        principal, cached_at = entry
+        if (
+            principal.version != self.user_version(user_id)
+            or time.monotonic() - cached_at >= self.user_ttl_seconds
+        ):
+            del self._users[user_id]
+            return None
+
+        self._users.move_to_end(user_id)
+        return principal
+
+    def put_user(self, principal: UserPrincipal) -> None:
+        """Cache a principal unless the user was invalidated after it was loaded."""
+        if principal.version != self.user_version(principal.id):
+            return
+
+        self._users[principal.id] = (principal, time.monotonic())
+        self._users.move_to_end(principal.id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+
+    def invalidate_user(self, user_id: UUID) -> None:
+        """Drop a user's cached principal, e.g. after deactivation or an admin change."""
+        self._generation += 1
+        self._versions[user_id] = self._generation
+        self._versions.move_to_end(user_id)
+        while len(self._versions) > self.max_users:
+            _, version = self._versions.popitem(last=False)
+            self._evicted_user_version = max(self._evicted_user_version, version)
+        self._users.pop(user_id, None)
+
+    def invalidate_user_after_commit(self, session: AsyncSession, user_id: UUID) -> None:
+        """
+        Invalidate a user once `session` commits.
+
+        Invalidating earlier would let a concurrent request load the old,
+        still committed row under the new version and cache it.
+        """
+        session.info.setdefault(_PENDING_USERS_KEY, set()).add(user_id)
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped by every invalidation, captured before loading an API key."""
+        return self._generation
+
+    def get_account(self, api_key: str) -> Optional[AccountPrincipal]:
+        """Get the cached account for an API key that is current and within its TTL."""
+        key = self._token_key(api_key)
+        entry = self._accounts.get(key)
+        if entry is None:
+            return None
+
+        principal, account_version, user_version, cached_at = entry
+        if (
+            account_version != self.account_version(principal.id)
+            or user_version != self.user_version(principal.user_id)
+            or time.monotonic() - cached_at >= self.api_key_ttl_seconds
+        ):
+            del self._accounts[key]
+            return None
+
+        self._accounts.move_to_end(key)
+        return principal
+
+    def put_account(self, api_key: str, principal: AccountPrincipal, generation: int) -> None:
+        """Cache the account for an API key unless anything was invalidated since `generation`."""
+        if generation != self._generation:
+            return
+
+        key = self._token_key(api_key)
+        self._accounts[key] = (
+            principal,
+            self.account_version(principal.id),
+            self.user_version(principal.user_id),
+            time.monotonic(),
+        )
+        self._accounts.move_to_end(key)
+        while len(self._accounts) > self.max_api_keys:
+            self._accounts.popitem(last=False)
+
+    def account_version(self, account_id: UUID) -> int:
+        """Get the current invalidation version of an account."""
+        return self._account_versions.get(account_id, self._evicted_account_version)
+
+    def invalidate_account(self, account_id: UUID) -> None:
+        """Retire cached API keys of an account, e.g. after a key rotation, update or delete."""
+        self._generation += 1
+        self._account_versions[account_id] = self._generation
+        self._account_versions.move_to_end(account_id)
+        while len(self._account_versions) > self.max_api_keys:
+            _, version = self._account_versions.popitem(last=False)
+            self._evicted_account_version = max(self._evicted_account_version, version)
+
+    def invalidate_account_after_commit(self, session: AsyncSession, account_id: UUID) -> None:
+        """
+        Invalidate an account's API keys once `session` commits.
+
+        Invalidating earlier would let a concurrent poll load the old,
+        still committed key under the new generation and cache it.
+        """
+        session.info.setdefault(_PENDING_ACCOUNTS_KEY, set()).add(account_id)
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        self._claims.clear()
+        self._users.clear()
+        self._accounts.clear()
+
+
+auth_cache = AuthCache(
+    max_tokens=settings.AUTH_TOKEN_CACHE_SIZE,
+    max_users=settings.AUTH_USER_CACHE_SIZE,
+    user_ttl_seconds=settings.AUTH_USER_CACHE_TTL_SECONDS,
+    max_api_keys=settings.AUTH_API_KEY_CACHE_SIZE,
+    api_key_ttl_seconds=settings.AUTH_API_KEY_CACHE_TTL_SECONDS,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    for user_id in session.info.pop(_PENDING_USERS_KEY, ()):
+        auth_cache.invalidate_user(user_id)
+    for account_id in session.info.pop(_PENDING_ACCOUNTS_KEY, ()):
+        auth_cache.invalidate_account(account_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(_PENDING_USERS_KEY, None)
+    session.info.pop(_PENDING_ACCOUNTS_KEY, None)
@@ -0,0 +1,117 @@
+"""
+Pre-rendered EA delivery payloads.
+
+A pending signal is immutable once created, so its poll payloads (JSON
+and compact line) are rendered once at creation and reused by every poll
+until the signal expires.
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timezone
+from typing import Optional
+from uuid import UUID
+
+from app.config import settings
+from app.models.signal import Signal
+from app.schemas.signal import PendingSignal
+from app.utils import metrics
+from app.utils.ea_protocol import render_signal_line
+
+
+@dataclass(frozen=True, slots=True)
+class RenderedSignal:
+    """Delivery payloads of one signal, UTF-8 encoded."""
+
+    json: bytes
+    compact: bytes
+
+
+def render_signal(signal: Signal) -> RenderedSignal:
+    """
+    Render the JSON and compact delivery payloads of a signal.
+
+    Takes a Signal or a row of SIGNAL_DELIVERY_COLUMNS alike.
+    """
+    with metrics.timing("delivery.render").time():
+        pending = PendingSignal(
+            id=signal.id,
+            symbol=signal.symbol,
+            action=signal.action,
+            order_type=signal.order_type,
+            quantity=signal.quantity,
+            price=signal.price,
+            take_profit=signal.take_profit,
+            stop_loss=signal.stop_loss,
+            comment=signal.comment,
+        )
+        return RenderedSignal(
+            json=pending.model_dump_json().encode("utf-8"),
+            compact=render_signal_line(
+                signal.id,
+                signal.symbol,
+                signal.action,
+                signal.order_type,
+                signal.quantity,
+                signal.price,
+                signal.take_profit,
+                signal.stop_loss,
+                signal.comment,
+            ).encode("utf-8"),
+        )
+
+
+class DeliveryPayloadCache:
+    """
+    Bounded cache of rendered payloads, each kept until its signal expires.
+
+    Signals missing from the cache (e.g. created before a restart) are
+    rendered on demand and cached then.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[UUID, tuple[RenderedSignal, float]]" = OrderedDict()
+
+    def put(self, signal: Signal) -> RenderedSignal:
+        """Render a signal and cache its payloads until it expires."""
+        rendered = render_signal(signal)
+        expires_at = signal.expires_at
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+
+        self._entries[signal.id] = (rendered, expires_at.timestamp())
+        self._entries.move_to_end(signal.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return rendered
+
+    def get(self, signal_id: UUID) -> Optional[RenderedSignal]:
+        """Get the cached payloads of a signal that has not expired."""
+        entry = self._entries.get(signal_id)
+        if entry is None:
+            return None
+
+        rendered, expires_at = entry
+        if time.time() >= expires_at:
+            del self._entries[signal_id]
+            return None
+
+        return rendered
+
+    def get_or_render(self, signal: Signal) -> RenderedSignal:
+        """Get the cached payloads of a signal, rendering them on a miss."""
+        rendered = self.get(signal.id)
+        if rendered is None:
+            rendered = self.put(signal)
+        return rendered
+
+    def discard(self, signal_id: UUID) -> None:
+        """Drop the payloads of a signal that will not be delivered again."""
+        self._entries.pop(signal_id, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+delivery_payloads = DeliveryPayloadCache(max_entries=settings.DELIVERY_CACHE_SIZE)
@@ -0,0 +1,170 @@
+"""
+Per-account delivery sequence numbers for conditional EA polling.
+
+Every committed signal advances its account's sequence. A poll returns
+the sequence it was answered at (as ETag and X-Delivery-Sequence); an EA
+that sends it back with `since` or If-None-Match gets a 304 from memory
+until the sequence moves again, without a database session. Long polls
+wait on the sequence instead of querying for new signals.
+"""
+import asyncio
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+
+# Session.info key collecting accounts to advance once the session commits
+_PENDING_KEY = "delivery_sequence_accounts"
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class DeliverySequences:
+    """
+    In-memory delivery sequence per account.
+
+    Sequences are millisecond timestamps that only move forward, so an
+    account that never received a signal in this process reports the
+    startup time, and a sequence handed out before a restart can never
+    match one handed out after it.
+    """
+
+    def __init__(self):
+        self._base = _now_ms()
+        self._sequences: Dict[UUID, int] = {}
+        self._waiters: Dict[UUID, Set[asyncio.Future]] = {}
+        self._commit_subscribers: List[Callable[[Set[UUID]], None]] = []
+
+    def current(self, account_id: UUID) -> int:
+        """Get the current delivery sequence of an account."""
+        return self._sequences.get(account_id, self._base)
+
+    def advance(self, account_id: UUID) -> int:
+        """Advance an account's sequence after a new signal became visible."""
+        sequence = max(self.current(account_id) + 1, _now_ms())
+        self._sequences[account_id] = sequence
+
+        for waiter in self._waiters.pop(account_id, ()):
+            if not waiter.done():
+                waiter.set_result(sequence)
+        return sequence
+
+    def rebase(self) -> None:
+        """
+        Move every sequence forward, e.g. after wakeups from other workers
+        may have been missed. Each EA then does one full poll.
+        """
+        self._base = max(_now_ms(), self._base + 1)
+        for account_id in list(self._sequences) + list(self._waiters):
+            self.advance(account_id)
+
+    async def wait(self, account_id: UUID, sequence: int, timeout: float) -> bool:
+        """
+        Wait until an account's sequence moves past `sequence`.
+
+        Returns False if it did not within `timeout` seconds.
+        """
+        if self.current(account_id) != sequence:
+            return True
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(account_id, set()).add(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            waiters = self._waiters.get(account_id)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[account_id]
+
+    def subscribe_commits(self, callback: Callable[[Set[UUID]], None]) -> None:
+        """Call `callback` with the accounts of every commit that created signals."""
+        self._commit_subscribers.append(callback)
+
+    def unsubscribe_commits(self, callback: Callable[[Set[UUID]], None]) -> None:
+        """Stop calling a callback registered with subscribe_commits()."""
+        if callback in self._commit_subscribers:
+            self._commit_subscribers.remove(callback)
+
+    def _committed(self, account_ids: Set[UUID]) -> None:
+        for account_id in account_ids:
+            self.advance(account_id)
+        for callback in self._commit_subscribers:
+            callback(account_ids)
+
+    def advance_after_commit(self, session: AsyncSession, account_id: UUID) -> None:
+        """
+        Advance an account's sequence once `session` commits.
+
+        Advancing earlier would let a concurrent poll hand out the new
+        sequence before the signal is visible to its query.
+        """
+        session.info.setdefault(_PENDING_KEY, set()).add(account_id)
+
+    def is_current(
+        self,
+        account_id: UUID,
+        since: Optional[int] = None,
+        etags: Iterable[str] = (),
+    ) -> bool:
+        """Check whether the sequence an EA sent back is still current."""
+        sequence = self.current(account_id)
+        if since is not None and since == sequence:
+            return True
+        return str(sequence) in etags
+
+    def forget(self, account_id: UUID) -> None:
+        """Drop the sequence of an account, e.g. after it was deleted."""
+        self._sequences.pop(account_id, None)
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests waiting for a sequence to move."""
+        return sum(len(w) for w in self._waiters.values())
+
+    def __len__(self) -> int:
+        return len(self._sequences)
+
+
+def etag(sequence: int) -> str:
+    """Format a delivery sequence as a strong ETag."""
+    return f'"{sequence}"'
+
+
+def parse_if_none_match(value: Optional[str]) -> List[str]:
+    """Get the opaque tags of an If-None-Match header, without quotes or W/ prefix."""
+    if not value:
+        return []
+
+    tags = []
+    for tag in value.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tags.append(tag.strip('"'))
+    return tags
+
+
+delivery_sequences = DeliverySequences()
+
+
+@event.listens_for(Session, "after_commit")
+def _advance_committed(session: Session) -> None:
+    account_ids = session.info.pop(_PENDING_KEY, None)
+    if account_ids:
+        delivery_sequences._committed(account_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,146 @@
+"""
+Coalesced EA heartbeats.
+
+EA polls record heartbeats in memory; a background task persists them to
+mt_accounts.last_connected_at in one bulk UPDATE per flush interval.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import case, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.account import MTAccount
+
+
+logger = logging.getLogger(__name__)
+
+# Accounts per UPDATE statement, keeps the bound parameter count reasonable
+FLUSH_CHUNK_SIZE = 1000
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes (SQLite) as UTC."""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class HeartbeatTracker:
+    """
+    In-memory table of the latest heartbeat per account.
+
+    A heartbeat is only queued for writing when it moves the persisted
+    last_connected_at by at least `resolution_seconds`, so an EA polling
+    every 2 seconds costs one row update per resolution window instead
+    of one per poll. Reads of last seen times come from memory.
+    """
+
+    def __init__(self, resolution_seconds: float, flush_interval_seconds: float):
+        self.resolution = timedelta(seconds=resolution_seconds)
+        self.flush_interval_seconds = flush_interval_seconds
+        self._seen: Dict[UUID, datetime] = {}
+        self._persisted: Dict[UUID, datetime] = {}
+        self._dirty: Dict[UUID, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, account_id: UUID, seen_at: Optional[datetime] = None) -> None:
+        """Record a heartbeat from an account."""
+        seen_at = seen_at or datetime.now(timezone.utc)
+        self._seen[account_id] = seen_at
+
+        persisted = self._persisted.get(account_id)
+        if persisted is None or seen_at - persisted >= self.resolution:
+            self._dirty[account_id] = seen_at
+
+    def last_seen(self, account_id: UUID) -> Optional[datetime]:
+        """Get the latest heartbeat of an account seen by this worker."""
+        return self._seen.get(account_id)
+
+    def last_connected_at(self, account_id: UUID, stored: Optional[datetime]) -> Optional[datetime]:
+        """Get the newer of the in-memory heartbeat and a stored last_connected_at."""
+        seen = self._seen.get(account_id)
+        if stored is None:
+            return seen
+        if seen is None:
+            return stored
+        return max(seen, _as_utc(stored))
+
+    def forget(self, account_id: UUID) -> None:
+        """Drop all heartbeat state of an account, e.g. after it was deleted."""
+        self._seen.pop(account_id, None)
+        self._persisted.pop(account_id, None)
+        self._dirty.pop(account_id, None)
+
+    @property
+    def pending(self) -> int:
+        """Number of heartbeats waiting to be flushed."""
+        return len(self._dirty)
+
+    async def flush(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+    ) -> int:
+        """Persist queued heartbeats; returns the number of accounts written."""
+        if not self._dirty:
+            return 0
+
+        dirty, self._dirty = self._dirty, {}
+        items = list(dirty.items())
+
+        try:
+            async with session_factory() as session:
+                for start in range(0, len(items), FLUSH_CHUNK_SIZE):
+                    chunk = dict(items[start:start + FLUSH_CHUNK_SIZE])
+                    await session.execute(
+                        update(MTAccount)
+                        .where(MTAccount.id.in_(chunk.keys()))
+                        .values(last_connected_at=case(chunk, value=MTAccount.id))
+                        .execution_options(synchronize_session=False)
+                    )
+                await session.commit()
+        except Exception:
+            # Requeue unless a newer heartbeat arrived meanwhile
+            for account_id, seen_at in dirty.items():
+                self._dirty.setdefault(account_id, seen_at)
+            raise
+
+        self._persisted.update(dirty)
+        return len(dirty)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush heartbeats: {e}")
+
+    def start(self) -> None:
+        """Start the background flush task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background flush task and write what is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush heartbeats on shutdown: {e}")
+
+
+heartbeats = HeartbeatTracker(
+    resolution_seconds=settings.HEARTBEAT_RESOLUTION_SECONDS,
+    flush_interval_seconds=settings.HEARTBEAT_FLUSH_INTERVAL_SECONDS,
+)
@@ -0,0 +1,234 @@
+"""
+Statements of the hot query paths, built once.
+
+The webhook secret and API key lookups, the symbol mapping lookup, the
+poll's pending select and claim, and the result report queries run on
+every webhook, poll and report. Built inline they cost a statement
+construction and a cache key traversal per call; here each is a
+module-level statement with bound parameters, whose cache key is
+memoized and whose compiled form stays in SQLAlchemy's compiled cache.
+At startup every hot query is run once on a few pooled connections so
+asyncpg has them prepared before the first request.
+
+Each execution is timed as `db.query.<name>`; the one-off compile at
+startup, i.e. what an uncached call would pay on top, as
+`db.compile.<name>`. Compiled cache hits and misses are counted per
+query.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from sqlalchemy import and_, bindparam, event, select, update
+from sqlalchemy.engine import Engine, Result
+from sqlalchemy.engine.default import CACHE_HIT
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import noload
+from sqlalchemy.sql import Executable
+
+from app.models.account import MTAccount
+from app.models.signal import Signal
+from app.models.signal_batch import SignalBatch
+from app.models.symbol_mapping import SymbolMapping
+from app.models.user import User
+from app.utils import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class HotQuery:
+    """
+    A statement built once and executed with parameters.
+
+    `warm_params` returns parameters matching no rows, used to compile
+    and prepare the statement at startup; None leaves it unwarmed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        statement: Executable,
+        warm_params: Optional[Callable[[], Dict[str, Any]]] = None,
+    ):
+        self.name = name
+        self.statement = statement.execution_options(hot_query=name)
+        self.warm_params = warm_params
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._timing = metrics.timing(f"db.query.{name}")
+
+    async def execute(self, db: AsyncSession, params: Any) -> Result:
+        """Execute the statement with one parameter dict, or a list of them for executemany."""
+        started = time.perf_counter()
+        try:
+            return await db.execute(self.statement, params)
+        finally:
+            self._timing.observe(time.perf_counter() - started)
+
+    def stats(self) -> dict:
+        """Compiled cache hits and misses of the statement in this worker."""
+        return {"cache_hits": self.cache_hits, "cache_misses": self.cache_misses}
+
+
+# What EA delivery renders and caches, selected joined to the batch; no JSONB
+SIGNAL_DELIVERY_COLUMNS = (
+    Signal.id,
+    Signal.account_id,
+    Signal.symbol,
+    SignalBatch.action,
+    SignalBatch.order_type,
+    Signal.quantity,
+    SignalBatch.price,
+    SignalBatch.take_profit,
+    SignalBatch.stop_loss,
+    SignalBatch.comment,
+    Signal.created_at,
+    Signal.expires_at,
+)
+
+
+def _no_rows() -> Dict[str, Any]:
+    return {"account_ids": [uuid.UUID(int=0)], "now": datetime.now(timezone.utc)}
+
+
+user_by_webhook_secret = HotQuery(
+    "user_by_webhook_secret",
+    # Webhooks never use the user's signals; selectin-loading them would read every one
+    select(User).options(noload(User.signals)).where(User.webhook_secret == bindparam("secret")),
+    lambda: {"secret": ""},
+)
+
+account_by_api_key = HotQuery(
+    "account_by_api_key",
+    select(MTAccount.id, MTAccount.user_id, MTAccount.is_active, MTAccount.settings)
+    .join(User, User.id == MTAccount.user_id)
+    .where(
+        and_(
+            MTAccount.api_key == bindparam("api_key"),
+            MTAccount.is_active == True,
+            User.is_active == True,
+        )
+    ),
+    lambda: {"api_key": ""},
+)
+
+symbol_mapping = HotQuery(
+    "symbol_mapping",
+    select(SymbolMapping).where(
+        and_(
+            SymbolMapping.account_id == bindparam("account_id"),
+            SymbolMapping.tradingview_symbol == bindparam("symbol"),
+        )
+    ),
+    lambda: {"account_id": uuid.UUID(int=0), "symbol": ""},
+)
+
+pending_signals = HotQuery(
+    "pending_signals",
+    select(*SIGNAL_DELIVERY_COLUMNS).join(Signal.batch).where(
+        and_(
+            Signal.account_id == bindparam("account_id"),
+            Signal.status == "pending",
+            Signal.expires_at > bindparam("now"),
+        )
+    ).order_by(Signal.created_at.asc()),
+    lambda: {"account_id": uuid.UUID(int=0), "now": datetime.now(timezone.utc)},
+)
+
+claim_pending_signals = HotQuery(
+    "claim_pending_signals",
+    update(Signal)
+    .where(
+        and_(
+            Signal.account_id.in_(bindparam("account_ids", expanding=True)),
+            Signal.status == "pending",
+            Signal.expires_at > bindparam("now"),
+        )
+    )
+    .values(status="sent", sent_at=bindparam("now"))
+    .returning(Signal.id)
+    .execution_options(synchronize_session=False),
+    _no_rows,
+)
+
+delivery_rows = HotQuery(
+    "delivery_rows",
+    select(*SIGNAL_DELIVERY_COLUMNS)
+    .join(Signal.batch)
+    .where(Signal.id.in_(bindparam("signal_ids", expanding=True)))
+    .order_by(Signal.created_at.asc()),
+    lambda: {"signal_ids": [uuid.UUID(int=0)]},
+)
+
+result_signals = HotQuery(
+    "result_signals",
+    select(
+        Signal.id,
+        Signal.user_id,
+        Signal.account_id,
+        Signal.symbol,
+        Signal.created_at,
+        Signal.sent_at,
+        Signal.execution_result.is_(None).label("first_report"),
+    ).where(Signal.id.in_(bindparam("signal_ids", expanding=True))),
+    lambda: {"signal_ids": [uuid.UUID(int=0)]},
+)
+
+# Bulk UPDATE by primary key; executemany, so prepared on its first use
+update_signal_results = HotQuery("update_signal_results", update(Signal))
+
+hot_queries: Dict[str, HotQuery] = {
+    q.name: q
+    for q in (
+        user_by_webhook_secret,
+        account_by_api_key,
+        symbol_mapping,
+        pending_signals,
+        claim_pending_signals,
+        delivery_rows,
+        result_signals,
+        update_signal_results,
+    )
+}
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _count_cache_hits(conn, cursor, statement, parameters, context, executemany) -> None:
+    name = context.execution_options.get("hot_query") if context is not None else None
+    query = hot_queries.get(name) if name else None
+    if query is None:
+        return
+    if context.cache_hit == CACHE_HIT:
+        query.cache_hits += 1
+    else:
+        query.cache_misses += 1
+
+
+async def _warm_connection(engine: AsyncEngine, queries: Sequence[HotQuery]) -> None:
+    async with engine.connect() as conn:
+        async with AsyncSession(bind=conn) as session:
+            for query in queries:
+                await session.execute(query.statement, query.warm_params())
+            await session.rollback()
+
+
+async def prepare_hot_queries(engine: AsyncEngine, connections: int) -> None:
+    """
+    Compile the hot queries and prepare them on `connections` pooled connections.
+
+    Statements are run with parameters that match no rows, in
+    transactions that are rolled back.
+    """
+    queries = [q for q in hot_queries.values() if q.warm_params is not None]
+    for query in queries:
+        started = time.perf_counter()
+        query.statement.compile(dialect=engine.dialect)
+        metrics.timing(f"db.compile.{query.name}").observe(time.perf_counter() - started)
+
+    # Held concurrently, so each warms a different pooled connection
+    await asyncio.gather(*(_warm_connection(engine, queries) for _ in range(connections)))
+    logger.info(f"Prepared {len(queries)} hot queries on {connections} connections")
@@ -0,0 +1,156 @@
+"""
+Server-assigned EA poll schedule.
+
+EAs left to their own timers poll in lockstep after restarts and market
+opens, hitting the database pool in bursts. Instead every poll response
+tells the EA when to poll next (`next_poll_ms`): each account holds a
+slot within the poll interval, so polls are spread evenly across it, and
+the interval itself stretches for idle accounts and while the pool is
+busy.
+"""
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+from uuid import UUID
+
+from app.config import settings
+from app.database import pool_utilization
+from app.services.delivery_sequence import delivery_sequences
+
+
+# Interval multiplier of accounts without a signal for `idle_seconds`
+IDLE_INTERVAL_FACTOR = 2
+
+
+class PollScheduler:
+    """
+    Slot allocator for EA polls.
+
+    The interval is divided into `slots` equal phases. A new account gets
+    the least occupied slot, preferring the one its id hashes to so that
+    workers mostly agree; the slot is kept while the account keeps
+    polling and released after `release_seconds` without a poll. An
+    account polls at `slot / slots` of the way through each interval,
+    whatever the interval currently is.
+    """
+
+    def __init__(
+        self,
+        slots: int,
+        base_interval_ms: int,
+        max_interval_ms: int,
+        idle_seconds: float,
+        load_threshold: float,
+        release_seconds: float,
+        load: Callable[[], float] = pool_utilization,
+    ):
+        self.slots = slots
+        self.base_interval_ms = base_interval_ms
+        self.max_interval_ms = max(max_interval_ms, base_interval_ms)
+        self.idle_seconds = idle_seconds
+        self.load_threshold = load_threshold
+        self.release_seconds = release_seconds
+        self.load = load
+        self._assignments: "OrderedDict[UUID, Tuple[int, float]]" = OrderedDict()
+        self._occupancy: List[int] = [0] * slots
+
+    def __len__(self) -> int:
+        return len(self._assignments)
+
+    def occupancy(self) -> List[int]:
+        """Number of accounts holding each slot."""
+        return list(self._occupancy)
+
+    def _release_expired(self, now: float) -> None:
+        # Assignments are kept in order of their last poll
+        while self._assignments:
+            account_id, (slot, last_poll) = next(iter(self._assignments.items()))
+            if now - last_poll < self.release_seconds:
+                return
+            del self._assignments[account_id]
+            self._occupancy[slot] -= 1
+
+    def slot(self, account_id: UUID, now: Optional[float] = None) -> int:
+        """Get the slot of an account, assigning one on its first poll."""
+        now = time.time() if now is None else now
+        self._release_expired(now)
+
+        assignment = self._assignments.get(account_id)
+        if assignment is not None:
+            slot = assignment[0]
+            self._assignments.move_to_end(account_id)
+        else:
+            preferred = account_id.int % self.slots
+            least = min(self._occupancy)
+            slot = next(
+                s for s in (
+                    (preferred + i) % self.slots for i in range(self.slots)
+                ) if self._occupancy[s] == least
+            )
+            self._occupancy[slot] += 1
+
+        self._assignments[account_id] = (slot, now)
+        return slot
+
+    def interval_ms(
+        self,
+        account_id: UUID,
+        declared_interval: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> int:
+        """
+        Get the current poll interval of an account.
+
+        Starts from the base interval or the interval the EA declares,
+        whichever is longer, doubles for accounts without a signal for
+        `idle_seconds`, and stretches up to twice as the pool utilization
+        climbs from `load_threshold` to full; capped at `max_interval_ms`.
+        """
+        now = time.time() if now is None else now
+        interval = float(self.base_interval_ms)
+        if declared_interval:
+            interval = max(interval, declared_interval * 1000)
+
+        # The delivery sequence is the time of the account's latest signal
+        idle_ms = now * 1000 - delivery_sequences.current(account_id)
+        if self.idle_seconds and idle_ms > self.idle_seconds * 1000:
+            interval *= IDLE_INTERVAL_FACTOR
+
+        load = self.load()
+        if load > self.load_threshold:
+            interval *= 1 + min(1.0, (load - self.load_threshold) / (1 - self.load_threshold))
+
+        return int(min(interval, self.max_interval_ms))
+
+    def next_poll(
+        self,
+        account_id: UUID,
+        declared_interval: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> Tuple[int, int]:
+        """
+        Schedule the next poll of an account.
+
+        Returns the delay until the start of its slot in milliseconds and
+        the interval it was computed for. A poll landing right on its slot
+        is sent a full interval ahead; one arriving early or late by up to
+        a quarter interval is pulled back onto its slot.
+        """
+        now = time.time() if now is None else now
+        interval = self.interval_ms(account_id, declared_interval, now)
+        phase = self.slot(account_id, now) * interval // self.slots
+
+        delay = (phase - int(now * 1000)) % interval
+        if delay < interval // 4:
+            delay += interval
+        return delay, interval
+
+
+poll_scheduler = PollScheduler(
+    slots=settings.POLL_SCHEDULE_SLOTS,
+    base_interval_ms=settings.POLL_INTERVAL_MS,
+    max_interval_ms=settings.POLL_INTERVAL_MAX_MS,
+    idle_seconds=settings.POLL_IDLE_SECONDS,
+    load_threshold=settings.POLL_LOAD_THRESHOLD,
+    release_seconds=settings.PRESENCE_OFFLINE_SECONDS,
+)
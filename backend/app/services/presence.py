@@ -0,0 +1,243 @@
+"""
+Live EA presence registry.
+
+Every authenticated EA request updates a compact in-memory record per
+account, so online status is answered without touching the database.
+"""
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Literal, Optional, Set
+from uuid import UUID
+
+from app.config import settings
+from app.schemas.account import AccountPresence, AccountPresenceListResponse
+
+
+PresenceStatus = Literal["online", "stale", "offline"]
+
+# Weight of the newest gap in the smoothed poll interval
+POLL_INTERVAL_ALPHA = 0.2
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[float]:
+    """Convert a stored datetime to a Unix timestamp, treating naive values (SQLite) as UTC."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+@dataclass(slots=True)
+class PresenceRecord:
+    """Latest EA activity of one account."""
+
+    account_id: UUID
+    user_id: UUID
+    last_seen: float  # Unix timestamp
+    poll_interval: Optional[float] = None  # Seconds
+    client_version: Optional[str] = None
+    ip: Optional[str] = None
+
+    @property
+    def last_seen_at(self) -> datetime:
+        return datetime.fromtimestamp(self.last_seen, tz=timezone.utc)
+
+
+class PresenceRegistry:
+    """
+    In-memory presence records indexed by account and by user.
+
+    An EA is online while its last request is within a few of its own
+    poll intervals, stale until `offline_seconds`, and offline after that.
+    """
+
+    def __init__(
+        self,
+        min_online_seconds: float,
+        online_poll_multiplier: float,
+        offline_seconds: float,
+    ):
+        self.min_online_seconds = min_online_seconds
+        self.online_poll_multiplier = online_poll_multiplier
+        self.offline_seconds = offline_seconds
+        self._records: Dict[UUID, PresenceRecord] = {}
+        self._by_user: Dict[UUID, Set[UUID]] = {}
+
+    def touch(
+        self,
+        account_id: UUID,
+        user_id: UUID,
+        client_version: Optional[str] = None,
+        ip: Optional[str] = None,
+        poll_interval: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> PresenceRecord:
+        """
+        Record a request from an EA.
+
+        `poll_interval` is the interval the EA declares; without it the
+        interval is estimated from the gaps between requests.
+        """
+        now = time.time() if now is None else now
+        record = self._records.get(account_id)
+
+        if record is None:
+            record = PresenceRecord(account_id=account_id, user_id=user_id, last_seen=now)
+            self._records[account_id] = record
+            self._by_user.setdefault(user_id, set()).add(account_id)
+        else:
+            gap = now - record.last_seen
+            if poll_interval is None and 0 < gap < self.offline_seconds:
+                if record.poll_interval is None:
+                    record.poll_interval = gap
+                else:
+                    record.poll_interval += POLL_INTERVAL_ALPHA * (gap - record.poll_interval)
+            record.last_seen = max(record.last_seen, now)
+
+        if poll_interval is not None:
+            record.poll_interval = poll_interval
+        if client_version:
+            record.client_version = client_version[:64]
+        if ip is not None:
+            record.ip = ip
+
+        return record
+
+    def extend_poll_interval(self, account_id: UUID, poll_interval: float) -> None:
+        """Raise an account's poll interval to one the server scheduled, if longer."""
+        record = self._records.get(account_id)
+        if record is not None and (record.poll_interval or 0) < poll_interval:
+            record.poll_interval = poll_interval
+
+    def get(self, account_id: UUID) -> Optional[PresenceRecord]:
+        """Get the presence record of an account, if it was ever seen."""
+        return self._records.get(account_id)
+
+    def status_at(
+        self,
+        last_seen: Optional[float],
+        poll_interval: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> PresenceStatus:
+        """Classify a last seen time as online, stale or offline."""
+        if last_seen is None:
+            return "offline"
+
+        now = time.time() if now is None else now
+        age = now - last_seen
+        online_window = max(
+            self.min_online_seconds,
+            (poll_interval or 0) * self.online_poll_multiplier,
+        )
+
+        if age <= online_window:
+            return "online"
+        if age <= self.offline_seconds:
+            return "stale"
+        return "offline"
+
+    def status(self, account_id: UUID, now: Optional[float] = None) -> PresenceStatus:
+        """Get the presence status of an account."""
+        record = self._records.get(account_id)
+        if record is None:
+            return "offline"
+        return self.status_at(record.last_seen, record.poll_interval, now)
+
+    def account_status(
+        self,
+        account_id: UUID,
+        last_connected_at: Optional[datetime],
+        now: Optional[float] = None,
+    ) -> PresenceStatus:
+        """
+        Get the status of an account from the newer of its local record and stored last_connected_at.
+
+        With several workers the EA may be polling another one, which
+        flushes a newer last_connected_at than this worker's record.
+        """
+        stored = _timestamp(last_connected_at)
+        record = self._records.get(account_id)
+        if record is None:
+            return self.status_at(stored, now=now)
+        last_seen = record.last_seen if stored is None else max(record.last_seen, stored)
+        return self.status_at(last_seen, record.poll_interval, now)
+
+    def for_user(self, user_id: UUID) -> List[PresenceRecord]:
+        """Get the presence records of a user's accounts."""
+        return [self._records[a] for a in self._by_user.get(user_id, ())]
+
+    def __iter__(self) -> Iterator[PresenceRecord]:
+        return iter(list(self._records.values()))
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def describe(
+        self,
+        record: PresenceRecord,
+        name: Optional[str] = None,
+        now: Optional[float] = None,
+    ) -> AccountPresence:
+        """Build the API representation of a presence record."""
+        return AccountPresence(
+            account_id=record.account_id,
+            user_id=record.user_id,
+            name=name,
+            status=self.status_at(record.last_seen, record.poll_interval, now),
+            last_seen_at=record.last_seen_at,
+            poll_interval_seconds=(
+                round(record.poll_interval, 2) if record.poll_interval is not None else None
+            ),
+            client_version=record.client_version,
+            ip=record.ip,
+        )
+
+    def describe_stored(
+        self,
+        account_id: UUID,
+        user_id: UUID,
+        last_connected_at: Optional[datetime],
+        name: Optional[str] = None,
+        now: Optional[float] = None,
+    ) -> AccountPresence:
+        """Build the API representation of an account not seen since startup."""
+        if last_connected_at is not None and last_connected_at.tzinfo is None:
+            last_connected_at = last_connected_at.replace(tzinfo=timezone.utc)
+
+        return AccountPresence(
+            account_id=account_id,
+            user_id=user_id,
+            name=name,
+            status=self.status_at(_timestamp(last_connected_at), now=now),
+            last_seen_at=last_connected_at,
+        )
+
+    def forget(self, account_id: UUID) -> None:
+        """Drop the record of an account, e.g. after it was deleted."""
+        record = self._records.pop(account_id, None)
+        if record is None:
+            return
+
+        accounts = self._by_user.get(record.user_id)
+        if accounts is not None:
+            accounts.discard(account_id)
+            if not accounts:
+                del self._by_user[record.user_id]
+
+
+def summarize_presence(accounts: List[AccountPresence]) -> AccountPresenceListResponse:
+    """Wrap presence entries with per-status counts."""
+    counts = {"online": 0, "stale": 0, "offline": 0}
+    for account in accounts:
+        counts[account.status] += 1
+
+    return AccountPresenceListResponse(accounts=accounts, **counts)
+
+
+presence = PresenceRegistry(
+    min_online_seconds=settings.PRESENCE_MIN_ONLINE_SECONDS,
+    online_poll_multiplier=settings.PRESENCE_ONLINE_POLL_MULTIPLIER,
+    offline_seconds=settings.PRESENCE_OFFLINE_SECONDS,
+)
@@ -0,0 +1,362 @@
+"""
+Cross-worker signal wakeups.
+
+Commits that create signals are published on a notification bus. Every
+other worker advances the delivery sequences of the accounts named, which
+wakes its waiting polls and push connections and retires the 304 fast
+path for them. Postgres LISTEN/NOTIFY is the default backend and Redis
+pub/sub the alternative; a single worker needs no bus ("local").
+"""
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy.engine import make_url
+
+from app.config import settings
+from app.services.delivery_sequence import delivery_sequences
+from app.utils import metrics
+
+
+logger = logging.getLogger(__name__)
+
+# Account ids per message, keeps NOTIFY payloads well under Postgres' 8000 byte limit
+MESSAGE_CHUNK_SIZE = 200
+
+# Message asking every worker to rebase all sequences
+REBASE_ALL = "*"
+
+
+def encode_message(
+    origin: str,
+    account_ids: Optional[Iterable[UUID]],
+    sent_at: Optional[float] = None,
+) -> str:
+    """
+    Encode a wakeup as `<origin>:<sent at, ms>:<account hex ids, comma separated>`.
+
+    Without account ids the message asks for a rebase of all accounts.
+    """
+    sent_at = time.time() if sent_at is None else sent_at
+    body = REBASE_ALL if account_ids is None else ",".join(a.hex for a in account_ids)
+    return f"{origin}:{int(sent_at * 1000)}:{body}"
+
+
+def decode_message(payload: str) -> Tuple[str, float, Optional[List[UUID]]]:
+    """Decode a wakeup; the account list is None for a rebase of all accounts."""
+    origin, sent_at, body = payload.split(":", 2)
+    if body == REBASE_ALL:
+        return origin, int(sent_at) / 1000, None
+    return origin, int(sent_at) / 1000, [UUID(hex=a) for a in body.split(",") if a]
+
+
+class SignalBus:
+    """
+    In-process bus: local commits already advance local sequences, so
+    there is nothing to publish. Subclasses connect to a broker, publish
+    this worker's commits and apply the other workers' messages.
+
+    Any doubt about lost messages (a dropped connection or a failed
+    publish) is resolved by rebasing: after reconnecting, a worker rebases
+    its own sequences and, if it dropped a publish, asks every other
+    worker to do the same. Each EA then does one full poll. Broker
+    connections are probed every `ping_seconds`, so a half-open one
+    (dropped by a NAT or proxy without a reset) is failed and reconnected
+    even on a worker that never publishes.
+    """
+
+    backend = "local"
+
+    def __init__(self, channel: str = "", reconnect_seconds: float = 1.0, ping_seconds: float = 5.0):
+        self.channel = channel
+        self.reconnect_seconds = reconnect_seconds
+        self.ping_seconds = ping_seconds
+        self.worker_id = uuid.uuid4().hex[:12]
+        self.connected = False
+        self.published = 0
+        self.received = 0
+        self._missed = False
+        self._task: Optional[asyncio.Task] = None
+        self._sends: Set[asyncio.Task] = set()
+
+    # Broker hooks, overridden by subclasses; the local bus has no broker
+
+    async def _connect(self) -> None:
+        """Open the broker connection and subscribe to the channel."""
+
+    async def _wait_closed(self) -> None:
+        """Return once the broker connection is lost; the local bus never loses it."""
+        await asyncio.Event().wait()
+
+    async def _send(self, payload: str) -> None:
+        """Publish one encoded message on the channel."""
+
+    async def _disconnect(self) -> None:
+        """Close the broker connection, if open."""
+
+    def _fail(self) -> None:
+        """Drop the broker connection so the run loop reconnects."""
+
+    def publish(self, account_ids: Set[UUID]) -> None:
+        """Publish the accounts of a local commit; runs from the after-commit hook."""
+        if self.backend == "local":
+            return
+        if not self.connected:
+            self._missed = True
+            return
+
+        ids = sorted(account_ids)
+        for start in range(0, len(ids), MESSAGE_CHUNK_SIZE):
+            task = asyncio.get_running_loop().create_task(
+                self._publish(encode_message(self.worker_id, ids[start:start + MESSAGE_CHUNK_SIZE]))
+            )
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+
+    async def _publish(self, payload: str) -> None:
+        try:
+            await self._send(payload)
+            self.published += 1
+        except Exception as e:
+            logger.error(f"Failed to publish signal wakeup: {e}")
+            self._missed = True
+            self._fail()
+
+    def _receive(self, payload: str) -> None:
+        """Apply a message from the broker."""
+        try:
+            origin, sent_at, account_ids = decode_message(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed signal wakeup: {payload[:100]}")
+            return
+
+        if origin == self.worker_id:
+            return
+
+        self.received += 1
+        metrics.timing("signal_bus.latency").observe(max(0.0, time.time() - sent_at))
+        if account_ids is None:
+            delivery_sequences.rebase()
+            return
+        for account_id in account_ids:
+            delivery_sequences.advance(account_id)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._connect()
+                self.connected = True
+                logger.info(f"Signal bus connected ({self.backend}, channel {self.channel})")
+
+                # Messages may have been lost while disconnected
+                delivery_sequences.rebase()
+                if self._missed:
+                    self._missed = False
+                    await self._send(encode_message(self.worker_id, None))
+
+                await self._wait_closed()
+                logger.warning("Signal bus connection lost")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Signal bus error ({self.backend}): {e}")
+            finally:
+                self.connected = False
+                try:
+                    await self._disconnect()
+                except Exception:
+                    pass
+
+            await asyncio.sleep(self.reconnect_seconds)
+
+    def start(self) -> None:
+        """Subscribe to local commits and connect to the broker."""
+        delivery_sequences.subscribe_commits(self.publish)
+        if self.backend != "local" and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop publishing and close the broker connection."""
+        delivery_sequences.unsubscribe_commits(self.publish)
+        if self._sends:
+            await asyncio.gather(*self._sends, return_exceptions=True)
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Bus state for the metrics endpoint."""
+        return {
+            "backend": self.backend,
+            "worker_id": self.worker_id,
+            "connected": self.connected or self.backend == "local",
+            "published": self.published,
+            "received": self.received,
+            "waiting": delivery_sequences.waiting,
+        }
+
+
+class PostgresSignalBus(SignalBus):
+    """Wakeups over Postgres LISTEN/NOTIFY on a dedicated asyncpg connection."""
+
+    backend = "postgres"
+
+    def __init__(self, dsn: str, channel: str, reconnect_seconds: float = 1.0, ping_seconds: float = 5.0):
+        super().__init__(channel, reconnect_seconds, ping_seconds)
+        self.dsn = dsn
+        self._connection = None
+        self._closed = asyncio.Event()
+        self._lock = asyncio.Lock()
+
+    async def _connect(self) -> None:
+        import asyncpg
+
+        self._closed = asyncio.Event()
+        self._connection = await asyncpg.connect(self.dsn)
+        self._connection.add_termination_listener(lambda connection: self._closed.set())
+        await self._connection.add_listener(self.channel, self._on_notify)
+
+    def _on_notify(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        self._receive(payload)
+
+    async def _ping(self) -> None:
+        async with self._lock:
+            await self._connection.fetchval("SELECT 1")
+
+    async def _wait_closed(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._closed.wait(), self.ping_seconds)
+                return
+            except asyncio.TimeoutError:
+                pass
+
+            # The termination listener never fires on a half-open connection
+            try:
+                await asyncio.wait_for(self._ping(), self.ping_seconds)
+            except Exception as e:
+                logger.warning(f"Signal bus liveness probe failed: {e!r}")
+                self._fail()
+                return
+
+    async def _send(self, payload: str) -> None:
+        async with self._lock:
+            await self._connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+    async def _disconnect(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None and not connection.is_closed():
+            try:
+                await connection.close(timeout=5)
+            except Exception:
+                # A half-open connection cannot close gracefully
+                connection.terminate()
+
+    def _fail(self) -> None:
+        self._closed.set()
+
+
+class RedisSignalBus(SignalBus):
+    """Wakeups over Redis pub/sub."""
+
+    backend = "redis"
+
+    def __init__(self, url: str, channel: str, reconnect_seconds: float = 1.0, ping_seconds: float = 5.0):
+        super().__init__(channel, reconnect_seconds, ping_seconds)
+        self.url = url
+        self._redis = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._failed = False
+        self._last_reply = 0.0
+
+    async def _connect(self) -> None:
+        from redis import asyncio as aioredis
+
+        self._redis = aioredis.from_url(self.url)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self.channel)
+
+    async def _listen(self) -> None:
+        async for message in self._pubsub.listen():
+            # Pongs to the liveness pings arrive here too
+            self._last_reply = time.monotonic()
+            if message["type"] == "message":
+                self._receive(message["data"].decode("utf-8"))
+
+    async def _wait_closed(self) -> None:
+        self._failed = False
+        self._last_reply = time.monotonic()
+        self._listener = asyncio.create_task(self._listen())
+        try:
+            while True:
+                done, _ = await asyncio.wait({self._listener}, timeout=self.ping_seconds)
+                if done:
+                    break
+
+                # A PING on the subscribed connection is answered through listen()
+                if time.monotonic() - self._last_reply > 2 * self.ping_seconds:
+                    logger.warning("Signal bus liveness probe failed: no reply to pings")
+                    self._fail()
+                    break
+                try:
+                    await asyncio.wait_for(self._pubsub.ping(), self.ping_seconds)
+                except Exception as e:
+                    logger.warning(f"Signal bus liveness probe failed: {e!r}")
+                    self._fail()
+                    break
+            await self._listener
+        except asyncio.CancelledError:
+            if not self._failed:
+                raise
+        finally:
+            if not self._listener.done():
+                self._listener.cancel()
+            self._listener = None
+
+    async def _send(self, payload: str) -> None:
+        await self._redis.publish(self.channel, payload)
+
+    async def _disconnect(self) -> None:
+        pubsub, self._pubsub = self._pubsub, None
+        client, self._redis = self._redis, None
+        if pubsub is not None:
+            await pubsub.aclose()
+        if client is not None:
+            await client.aclose()
+
+    def _fail(self) -> None:
+        if self._listener is not None:
+            self._failed = True
+            self._listener.cancel()
+
+
+def create_signal_bus() -> SignalBus:
+    """Create the bus selected by SIGNAL_BUS_BACKEND."""
+    backend = settings.SIGNAL_BUS_BACKEND
+    channel = settings.SIGNAL_BUS_CHANNEL
+    reconnect_seconds = settings.SIGNAL_BUS_RECONNECT_SECONDS
+    ping_seconds = settings.SIGNAL_BUS_PING_SECONDS
+
+    if backend == "redis":
+        return RedisSignalBus(settings.REDIS_URL, channel, reconnect_seconds, ping_seconds)
+
+    if backend == "postgres":
+        url = make_url(settings.DATABASE_URL)
+        if url.get_backend_name() == "postgresql":
+            dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+            return PostgresSignalBus(dsn, channel, reconnect_seconds, ping_seconds)
+        logger.info(f"Signal bus: {url.get_backend_name()} has no LISTEN/NOTIFY, using local")
+
+    return SignalBus()
+
+
+signal_bus = create_signal_bus()
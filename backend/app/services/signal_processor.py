@@ -1,21 +1,69 @@
 """
 Signal processing service for handling trading signals.
 """
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
-from typing import List, Optional
+from typing import List, Literal, Optional, Sequence
 from uuid import UUID
 
-from sqlalchemy import and_, select, update
+from sqlalchemy import Row, and_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute, joinedload, undefer_group
 
 from app.config import settings
 from app.models.account import MTAccount
 from app.models.signal import Signal
+from app.models.signal_batch import SignalBatch
 from app.models.symbol_mapping import SymbolMapping
 from app.models.user import User
-from app.schemas.signal import SignalResult
+from app.schemas.signal import BatchSignalResultResponse, SignalResult, SignalResultItem
 from app.schemas.webhook import WebhookPayload
+from app.services.analytics import AnalyticsService
+from app.services.delivery_cache import delivery_payloads
+from app.services import hot_queries
+from app.services.delivery_sequence import delivery_sequences
+from app.services.presence import presence
+
+
+OfflinePolicy = Literal["skip", "queue", "deliver"]
+
+# Every field of a signal listing but the JSONB payloads; selected joined to the batch
+SIGNAL_LIST_COLUMNS = tuple(
+    getattr(Signal, c.key)
+    for c in Signal.__table__.columns
+    if c.key not in ("batch_id", "execution_result")
+) + (
+    SignalBatch.action,
+    SignalBatch.order_type,
+    SignalBatch.price,
+    SignalBatch.take_profit,
+    SignalBatch.stop_loss,
+    SignalBatch.comment,
+    SignalBatch.source,
+)
+SIGNAL_PAYLOAD_COLUMNS = (SignalBatch.raw_payload, Signal.execution_result)
+
+OFFLINE_POLICIES = ("skip", "queue", "deliver")
+
+
+def offline_policy(account: MTAccount) -> OfflinePolicy:
+    """Get what to do with signals for an account whose EA is offline."""
+    policy = (account.settings or {}).get("offline_policy")
+    if policy in OFFLINE_POLICIES:
+        return policy
+    return settings.OFFLINE_SIGNAL_POLICY
+
+
+@dataclass
+class SignalFanout:
+    """Signals created for one webhook, and how many accounts the offline policy affected."""
+
+    batch: Optional[SignalBatch] = None
+    signals: List[Signal] = field(default_factory=list)
+    skipped: int = 0
+    short_ttl: int = 0
 
 
 class SignalProcessor:
@@ -28,40 +76,78 @@ class SignalProcessor:
         self,
         user: User,
         payload: WebhookPayload,
-    ) -> List[Signal]:
+    ) -> SignalFanout:
         """
         Create signals from a webhook payload.
         If account_id is specified, create one signal.
         Otherwise, create signals for all active accounts.
+
+        Accounts whose EA is offline get their offline policy applied:
+        the signal is skipped, queued with a short TTL, or delivered.
+
+        The payload is stored once, as a SignalBatch; each account gets a
+        thin signal row referencing it.
         """
-        signals = []
+        fanout = SignalFanout()
 
         if payload.account_id:
             # Create signal for specific account
             account = await self._get_user_account(user.id, payload.account_id)
-            if account and account.is_active:
-                signal = await self._create_signal(user, account, payload)
-                signals.append(signal)
+            accounts = [account] if account and account.is_active else []
         else:
             # Create signals for all active accounts
             accounts = await self._get_active_accounts(user.id)
-            for account in accounts:
-                signal = await self._create_signal(user, account, payload)
-                signals.append(signal)
+
+        now = time.time()
+        for account in accounts:
+            ttl_seconds = settings.SIGNAL_EXPIRY_SECONDS
+
+            if presence.account_status(account.id, account.last_connected_at, now) == "offline":
+                policy = offline_policy(account)
+                if policy == "skip":
+                    fanout.skipped += 1
+                    continue
+                if policy == "queue":
+                    ttl_seconds = min(ttl_seconds, settings.OFFLINE_SIGNAL_TTL_SECONDS)
+                    fanout.short_ttl += 1
+
+            if fanout.batch is None:
+                fanout.batch = self._create_batch(user, payload)
+            signal = await self._create_signal(fanout.batch, account, payload, ttl_seconds)
+            fanout.signals.append(signal)
 
         await self.db.flush()
 
         # Refresh all signals to get their IDs
-        for signal in signals:
+        for signal in fanout.signals:
             await self.db.refresh(signal)
+            delivery_payloads.put(signal)
+            delivery_sequences.advance_after_commit(self.db, signal.account_id)
 
-        return signals
+        return fanout
+
+    def _create_batch(self, user: User, payload: WebhookPayload) -> SignalBatch:
+        """Create the batch holding the fields shared by every account's signal."""
+        batch = SignalBatch(
+            user_id=user.id,
+            action=payload.action,
+            order_type=payload.order_type,
+            price=payload.price,
+            take_profit=payload.take_profit,
+            stop_loss=payload.stop_loss,
+            comment=payload.comment,
+            source="tradingview",
+            raw_payload=payload.model_dump(mode="json"),
+        )
+        self.db.add(batch)
+        return batch
 
     async def _create_signal(
         self,
-        user: User,
+        batch: SignalBatch,
         account: MTAccount,
         payload: WebhookPayload,
+        ttl_seconds: int,
     ) -> Signal:
         """Create a single signal for an account."""
         # Get symbol mapping if exists
@@ -76,20 +162,13 @@ class SignalProcessor:
         symbol = mapping.mt_symbol if mapping else payload.symbol
 
         signal = Signal(
-            user_id=user.id,
+            batch=batch,
+            user_id=batch.user_id,
             account_id=account.id,
             symbol=symbol,
-            action=payload.action,
-            order_type=payload.order_type,
             quantity=quantity,
-            price=payload.price,
-            take_profit=payload.take_profit,
-            stop_loss=payload.stop_loss,
-            comment=payload.comment,
             status="pending",
-            source="tradingview",
-            raw_payload=payload.model_dump(mode="json"),
-            expires_at=datetime.now(timezone.utc) + timedelta(seconds=settings.SIGNAL_EXPIRY_SECONDS),
+            expires_at=datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds),
         )
 
         self.db.add(signal)
@@ -129,31 +208,45 @@ class SignalProcessor:
         tradingview_symbol: str,
     ) -> Optional[SymbolMapping]:
         """Get symbol mapping for an account."""
-        result = await self.db.execute(
-            select(SymbolMapping).where(
-                and_(
-                    SymbolMapping.account_id == account_id,
-                    SymbolMapping.tradingview_symbol == tradingview_symbol,
-                )
-            )
+        result = await hot_queries.symbol_mapping.execute(
+            self.db, {"account_id": account_id, "symbol": tradingview_symbol}
         )
         return result.scalar_one_or_none()
 
-    async def get_pending_signals(self, account_id: UUID) -> List[Signal]:
-        """Get pending signals for an account that haven't expired."""
-        now = datetime.now(timezone.utc)
+    async def get_pending_signals(self, account_id: UUID) -> List[Row]:
+        """
+        Get pending signals for an account that haven't expired.
 
-        result = await self.db.execute(
-            select(Signal).where(
-                and_(
-                    Signal.account_id == account_id,
-                    Signal.status == "pending",
-                    Signal.expires_at > now,
-                )
-            ).order_by(Signal.created_at.asc())
+        Returns rows of SIGNAL_DELIVERY_COLUMNS, not entities.
+        """
+        result = await hot_queries.pending_signals.execute(
+            self.db, {"account_id": account_id, "now": datetime.now(timezone.utc)}
         )
+        return list(result.all())
 
-        return list(result.scalars().all())
+    async def claim_pending_signals(self, account_ids: Sequence[UUID]) -> List[Row]:
+        """
+        Mark the unexpired pending signals of several accounts as sent and return them.
+
+        One UPDATE ... RETURNING claims the signals of all accounts, so a
+        signal is handed to exactly one poll even when polls race; their
+        delivery columns are then read joined to their batches.
+        Signals are returned oldest first, as rows of
+        SIGNAL_DELIVERY_COLUMNS.
+        """
+        if not account_ids:
+            return []
+
+        claimed = await hot_queries.claim_pending_signals.execute(
+            self.db, {"account_ids": list(account_ids), "now": datetime.now(timezone.utc)}
+        )
+        signal_ids = list(claimed.scalars().all())
+        if not signal_ids:
+            return []
+
+        # RETURNING cannot reach the batch columns (SQLite forbids it with UPDATE ... FROM)
+        result = await hot_queries.delivery_rows.execute(self.db, {"signal_ids": signal_ids})
+        return list(result.all())
 
     async def mark_signal_sent(self, signal_id: UUID) -> Optional[Signal]:
         """Mark a signal as sent to the EA."""
@@ -169,21 +262,62 @@ class SignalProcessor:
 
         return signal
 
+    async def mark_signals_sent(self, account_id: UUID, signal_ids: Sequence[UUID]) -> List[UUID]:
+        """
+        Mark several pending signals of an account as sent in one statement.
+
+        Returns the ids that were updated; others were not pending or
+        belong to another account.
+        """
+        if not signal_ids:
+            return []
+
+        result = await self.db.execute(
+            update(Signal)
+            .where(
+                and_(
+                    Signal.id.in_(signal_ids),
+                    Signal.account_id == account_id,
+                    Signal.status == "pending",
+                )
+            )
+            .values(status="sent", sent_at=datetime.now(timezone.utc))
+            .returning(Signal.id)
+            .execution_options(synchronize_session=False)
+        )
+        return list(result.scalars().all())
+
     async def update_signal_result(
         self,
         signal_id: UUID,
         result: SignalResult,
     ) -> Optional[Signal]:
         """Update signal with execution result."""
-        query_result = await self.db.execute(
-            select(Signal).where(Signal.id == signal_id)
-        )
-        signal = query_result.scalar_one_or_none()
+        signal = await self.get_signal_by_id(signal_id)
 
         if not signal:
             return None
 
+        return await self.apply_signal_result(signal, result)
+
+    async def apply_signal_result(
+        self,
+        signal: Signal,
+        result: SignalResult,
+    ) -> Signal:
+        """Apply an execution result to an already loaded signal."""
+        # Only the first report for a signal counts towards latency analytics
+        if signal.execution_result is None:
+            await AnalyticsService(self.db).record_signal_latency(
+                signal, result, datetime.now(timezone.utc)
+            )
+
         signal.execution_result = result.model_dump(mode="json")
+        signal.ticket = result.ticket
+        signal.executed_price = result.executed_price
+        signal.executed_quantity = result.executed_quantity
+        signal.execution_time_ms = result.execution_time_ms
+        signal.error_code = result.error_code
 
         if result.success:
             signal.status = "executed"
@@ -195,6 +329,68 @@ class SignalProcessor:
         await self.db.flush()
         return signal
 
+    async def update_signal_results(
+        self,
+        account_id: UUID,
+        items: Sequence[SignalResultItem],
+    ) -> BatchSignalResultResponse:
+        """
+        Apply a batch of execution results reported by one account.
+
+        Ownership is checked with one query over the batch, and all updates
+        go out as one bulk UPDATE by primary key. When a signal appears more
+        than once, its last result wins.
+        """
+        results = {item.signal_id: item for item in items}
+
+        query_result = await hot_queries.result_signals.execute(
+            self.db, {"signal_ids": list(results.keys())}
+        )
+        rows = {row.id: row for row in query_result.all()}
+
+        response = BatchSignalResultResponse(updated=0)
+        first_reports = []
+        updates = []
+        now = datetime.utcnow()
+
+        for signal_id, result in results.items():
+            row = rows.get(signal_id)
+            if row is None:
+                response.not_found.append(signal_id)
+                continue
+            if row.account_id != account_id:
+                response.forbidden.append(signal_id)
+                continue
+
+            if row.first_report:
+                first_reports.append((row, result))
+
+            values = {
+                "id": signal_id,
+                "execution_result": result.model_dump(mode="json", exclude={"signal_id"}),
+                "ticket": result.ticket,
+                "executed_price": result.executed_price,
+                "executed_quantity": result.executed_quantity,
+                "execution_time_ms": result.execution_time_ms,
+                "error_code": result.error_code,
+            }
+            if result.success:
+                values.update(status="executed", executed_at=now)
+            else:
+                values.update(status="failed", error_message=result.error_message)
+            updates.append(values)
+
+        if first_reports:
+            await AnalyticsService(self.db).record_signal_latencies(
+                first_reports, datetime.now(timezone.utc)
+            )
+
+        if updates:
+            await hot_queries.update_signal_results.execute(self.db, updates)
+
+        response.updated = len(updates)
+        return response
+
     async def cancel_signal(self, signal_id: UUID, user_id: UUID) -> bool:
         """Cancel a pending signal."""
         result = await self.db.execute(
@@ -213,6 +409,7 @@ class SignalProcessor:
 
         signal.status = "cancelled"
         await self.db.flush()
+        delivery_payloads.discard(signal.id)
         return True
 
     async def expire_old_signals(self) -> int:
@@ -237,8 +434,12 @@ class SignalProcessor:
         signal_id: UUID,
         user_id: Optional[UUID] = None,
     ) -> Optional[Signal]:
-        """Get a signal by ID, optionally filtering by user."""
-        query = select(Signal).where(Signal.id == signal_id)
+        """Get a signal by ID, optionally filtering by user, with its JSONB payloads."""
+        query = (
+            select(Signal)
+            .options(undefer_group("payload"), joinedload(Signal.batch).undefer_group("payload"))
+            .where(Signal.id == signal_id)
+        )
 
         if user_id:
             query = query.where(Signal.user_id == user_id)
@@ -256,9 +457,17 @@ class SignalProcessor:
         to_date: Optional[datetime] = None,
         page: int = 1,
         per_page: int = 50,
-    ) -> tuple[List[Signal], int]:
-        """Get paginated signals with filters."""
-        query = select(Signal).where(Signal.user_id == user_id)
+        columns: Sequence[InstrumentedAttribute] = SIGNAL_LIST_COLUMNS,
+    ) -> tuple[List[Row], int]:
+        """
+        Get paginated signals with filters.
+
+        Only `columns` (of Signal and SignalBatch) are selected, and rows
+        are returned rather than entities, so listing never loads the
+        JSONB payloads unless asked. The total is counted without the
+        batch join.
+        """
+        query = select(Signal.id).where(Signal.user_id == user_id)
 
         if account_id:
             query = query.where(Signal.account_id == account_id)
@@ -278,10 +487,11 @@ class SignalProcessor:
         total = total_result.scalar()
 
         # Get paginated results
+        query = query.with_only_columns(*columns).join(Signal.batch)
         query = query.order_by(Signal.created_at.desc())
         query = query.offset((page - 1) * per_page).limit(per_page)
 
         result = await self.db.execute(query)
-        signals = list(result.scalars().all())
+        signals = list(result.all())
 
         return signals, total
@@ -0,0 +1,118 @@
+"""
+Push delivery of signals to connected EAs.
+
+A push channel serves one WebSocket or SSE connection. It pushes the
+account's pending signals on connect and whenever the account's delivery
+sequence moves (local commits and the signal bus both advance it), and
+opens a short database session per delivery round, never holding one
+(or a delivery bulkhead slot) while the connection idles.
+"""
+import time
+from datetime import datetime, timezone
+from typing import Callable, List, Literal, Sequence, Set
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import db_bulkheads
+from app.services.auth_cache import AccountPrincipal
+from app.services.delivery_cache import RenderedSignal, delivery_payloads
+from app.services.delivery_sequence import delivery_sequences
+from app.services.signal_processor import SignalProcessor
+from app.schemas.signal import BatchSignalResultResponse, SignalResultItem
+from app.utils import metrics
+from app.utils.ea_protocol import render_json_poll_response, render_poll_response
+
+
+PushFormat = Literal["json", "compact"]
+
+# Pushed signal ids remembered per connection until acked, for the close log
+MAX_UNACKED_TRACKED = 1000
+
+
+def render_push_message(
+    rendered: Sequence[RenderedSignal],
+    format: PushFormat,
+    server_time: datetime,
+) -> bytes:
+    """
+    Render a batch of signals as one push message.
+
+    Compact messages are identical to a compact poll response; JSON
+    messages are a poll response with `"type": "signals"` added.
+    """
+    if format == "compact":
+        return render_poll_response([r.compact for r in rendered], server_time)
+    return b'{"type":"signals",' + render_json_poll_response(
+        [r.json for r in rendered], server_time
+    )[1:]
+
+
+def render_ping(format: PushFormat, server_time: datetime) -> bytes:
+    """Render a keepalive message."""
+    if format == "compact":
+        return f"P|{int(server_time.timestamp())}\n".encode("ascii")
+    return f'{{"type":"ping","server_time":"{server_time.isoformat()}"}}'.encode("ascii")
+
+
+class PushChannel:
+    """
+    Delivery state of one push connection.
+
+    Signals are claimed (marked sent) in the statement that selects them,
+    like a poll, so a signal is pushed at most once, to one connection.
+    Acks sent on a WebSocket are receipts only: a signal pushed into a
+    connection that drops is not delivered again, since an EA that
+    received and executed it but lost the ack would trade twice.
+    """
+
+    def __init__(
+        self,
+        account: AccountPrincipal,
+        session_factory: Callable[[], AsyncSession],
+    ):
+        self.account = account
+        self.session_factory = session_factory
+        self.sequence = delivery_sequences.current(account.id)
+        self.unacked: Set[UUID] = set()
+
+    async def fetch(self) -> List[RenderedSignal]:
+        """Claim and render the account's pending signals."""
+        # Captured before the query, like a poll, so a racing commit is never skipped
+        self.sequence = delivery_sequences.current(self.account.id)
+
+        async with db_bulkheads["delivery"].slot(), self.session_factory() as db:
+            signals = await SignalProcessor(db).claim_pending_signals([self.account.id])
+            await db.commit()
+
+        rendered = [delivery_payloads.get_or_render(s) for s in signals]
+        now = time.time()
+        for signal in signals:
+            delivery_payloads.discard(signal.id)
+            created_at = signal.created_at
+            if created_at is not None:
+                if created_at.tzinfo is None:
+                    created_at = created_at.replace(tzinfo=timezone.utc)
+                metrics.timing("push.fanout").observe(max(0.0, now - created_at.timestamp()))
+
+        # Bounded: receipts are informational, a client that never acks must not grow it
+        if len(self.unacked) < MAX_UNACKED_TRACKED:
+            self.unacked.update(s.id for s in signals)
+        return rendered
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait until a new signal may be available; False after `timeout` seconds."""
+        return await delivery_sequences.wait(self.account.id, self.sequence, timeout)
+
+    def ack(self, signal_ids: Sequence[UUID]) -> None:
+        """Record the client's receipt of pushed signals; they are already marked sent."""
+        self.unacked.difference_update(signal_ids)
+
+    async def report_results(self, items: Sequence[SignalResultItem]) -> BatchSignalResultResponse:
+        """Apply execution results sent on the connection; a result also acks its signal."""
+        self.ack([item.signal_id for item in items])
+
+        async with db_bulkheads["delivery"].slot(), self.session_factory() as db:
+            response = await SignalProcessor(db).update_signal_results(self.account.id, items)
+            await db.commit()
+        return response
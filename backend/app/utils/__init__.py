@@ -4,6 +4,8 @@ Utility modules.
 from app.utils.security import (
     hash_password,
     verify_password,
+    hash_password_async,
+    verify_password_async,
     generate_api_key,
     generate_webhook_secret,
     create_access_token,
@@ -14,6 +16,8 @@ from app.utils.security import (
 __all__ = [
     "hash_password",
     "verify_password",
+    "hash_password_async",
+    "verify_password_async",
     "generate_api_key",
     "generate_webhook_secret",
     "create_access_token",
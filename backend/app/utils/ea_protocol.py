@@ -0,0 +1,130 @@
+"""
+Compact line protocol for EA polling.
+
+A poll response is one header line followed by one line per signal,
+fields separated by "|" and lines by "\\n":
+
+    V1|<server unix time>|<signal count>
+    S|<id hex>|<symbol>|<action>|<order type>|<quantity>|<price>|<take profit>|<stop loss>|<comment>
+
+Missing values are empty fields. Signal ids are UUIDs without dashes,
+which the result endpoints accept as-is. The comment is always the last
+field and never contains "|" or line breaks.
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional, Sequence, Tuple
+from uuid import UUID
+
+
+COMPACT_MEDIA_TYPE = "text/plain"
+
+PROTOCOL_VERSION = "V1"
+
+FIELD_SEPARATOR = "|"
+
+_COMMENT_TRANSLATION = str.maketrans({"|": " ", "\n": " ", "\r": " "})
+
+
+def _decimal(value: Optional[Decimal]) -> str:
+    """Format a decimal without exponent or trailing zeros."""
+    if value is None:
+        return ""
+    text = format(value, "f")
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return text
+
+
+def render_signal_line(
+    signal_id: UUID,
+    symbol: str,
+    action: str,
+    order_type: str,
+    quantity: Optional[Decimal],
+    price: Optional[Decimal],
+    take_profit: Optional[Decimal],
+    stop_loss: Optional[Decimal],
+    comment: Optional[str],
+) -> str:
+    """Render one pending signal as a compact line (without line break)."""
+    return FIELD_SEPARATOR.join((
+        "S",
+        signal_id.hex,
+        symbol,
+        action,
+        order_type,
+        _decimal(quantity),
+        _decimal(price),
+        _decimal(take_profit),
+        _decimal(stop_loss),
+        comment.translate(_COMMENT_TRANSLATION) if comment else "",
+    ))
+
+
+def render_poll_response(signal_lines: Sequence[bytes], server_time: datetime) -> bytes:
+    """Render a compact poll response from pre-rendered, UTF-8 encoded signal lines."""
+    header = FIELD_SEPARATOR.join(
+        (PROTOCOL_VERSION, str(int(server_time.timestamp())), str(len(signal_lines)))
+    ).encode("ascii")
+    return b"\n".join([header, *signal_lines]) + b"\n"
+
+
+def render_json_poll_response(
+    signal_payloads: Sequence[bytes],
+    server_time: datetime,
+    next_poll_ms: Optional[int] = None,
+) -> bytes:
+    """
+    Render a JSON poll response from pre-rendered PendingSignal payloads.
+
+    The output matches a serialized PendingSignalsResponse; next_poll_ms
+    is left out when not given.
+    """
+    next_poll = b"" if next_poll_ms is None else b',"next_poll_ms":%d' % next_poll_ms
+    return b"".join((
+        b'{"signals":[',
+        b",".join(signal_payloads),
+        b'],"server_time":"',
+        server_time.isoformat().encode("ascii"),
+        b'"',
+        next_poll,
+        b"}",
+    ))
+
+
+def render_json_batch_poll_response(
+    accounts: Sequence[Tuple[Optional[UUID], Optional[Sequence[bytes]]]],
+    server_time: datetime,
+    next_poll_ms: Optional[int] = None,
+) -> bytes:
+    """
+    Render a JSON batch poll response from pre-rendered PendingSignal payloads.
+
+    `accounts` holds an (account id, signal payloads) pair per requested
+    API key; a missing account id marks an invalid key. The output matches
+    a serialized BatchPendingSignalsResponse.
+    """
+    entries = []
+    for account_id, signal_payloads in accounts:
+        if account_id is None:
+            entries.append(b'{"account_id":null,"signals":[],"error":"Invalid API key"}')
+            continue
+        entries.append(b"".join((
+            b'{"account_id":"',
+            str(account_id).encode("ascii"),
+            b'","signals":[',
+            b",".join(signal_payloads or ()),
+            b'],"error":null}',
+        )))
+
+    next_poll = b"" if next_poll_ms is None else b',"next_poll_ms":%d' % next_poll_ms
+    return b"".join((
+        b'{"accounts":[',
+        b",".join(entries),
+        b'],"server_time":"',
+        server_time.isoformat().encode("ascii"),
+        b'"',
+        next_poll,
+        b"}",
+    ))
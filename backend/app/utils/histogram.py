@@ -0,0 +1,112 @@
+"""
+Mergeable log-linear histogram for latency tracking.
+"""
+from typing import Dict, List, Optional
+
+
+class Histogram:
+    """
+    HDR-style histogram of non-negative integer values (e.g. milliseconds).
+
+    Values below 2**SUB_BUCKET_BITS are counted exactly. Larger values are
+    grouped into 2**SUB_BUCKET_BITS linear sub-buckets per power of two, which
+    bounds the relative error to about 3% at any magnitude. Counts are stored
+    sparsely, so histograms are cheap to serialize and two histograms merge by
+    adding counts bucket by bucket.
+    """
+
+    SUB_BUCKET_BITS = 5
+    SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.sum = 0
+        self.max = 0
+
+    @classmethod
+    def bucket_index(cls, value: int) -> int:
+        """Get the bucket index for a value."""
+        if value < cls.SUB_BUCKET_COUNT:
+            return value
+        shift = value.bit_length() - cls.SUB_BUCKET_BITS - 1
+        return (shift + 1) * cls.SUB_BUCKET_COUNT + (value >> shift) - cls.SUB_BUCKET_COUNT
+
+    @classmethod
+    def bucket_bounds(cls, index: int) -> tuple[int, int]:
+        """Get the (lowest, highest) value counted by a bucket index."""
+        if index < cls.SUB_BUCKET_COUNT:
+            return index, index
+        shift = index // cls.SUB_BUCKET_COUNT - 1
+        lowest = (index % cls.SUB_BUCKET_COUNT + cls.SUB_BUCKET_COUNT) << shift
+        return lowest, lowest + (1 << shift) - 1
+
+    def record(self, value: int, count: int = 1) -> None:
+        """Record a value, clamping negatives to zero."""
+        value = max(int(value), 0)
+        index = self.bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+        self.sum += value * count
+        self.max = max(self.max, value)
+
+    def merge(self, other: "Histogram") -> "Histogram":
+        """Add another histogram's counts into this one."""
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        return self
+
+    def percentile(self, percent: float) -> Optional[int]:
+        """
+        Get the value at a percentile (0-100).
+
+        Returns the highest value of the bucket containing the percentile,
+        capped at the recorded maximum, or None if the histogram is empty.
+        """
+        if self.total == 0:
+            return None
+
+        target = max(1, -(-self.total * percent // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self.bucket_bounds(index)[1], self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Get the mean of recorded values."""
+        return self.sum / self.total if self.total else None
+
+    def buckets(self) -> List[dict]:
+        """Get non-empty buckets in ascending order."""
+        result = []
+        for index in sorted(self.counts):
+            lowest, highest = self.bucket_bounds(index)
+            result.append({"lower": lowest, "upper": highest, "count": self.counts[index]})
+        return result
+
+    def to_dict(self) -> dict:
+        """Serialize to a JSON-compatible dict."""
+        return {
+            "counts": {str(index): count for index, count in self.counts.items()},
+            "total": self.total,
+            "sum": self.sum,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "Histogram":
+        """Deserialize from a dict produced by to_dict()."""
+        histogram = cls()
+        if not data:
+            return histogram
+        histogram.counts = {int(index): count for index, count in data.get("counts", {}).items()}
+        histogram.total = data.get("total", 0)
+        histogram.sum = data.get("sum", 0)
+        histogram.max = data.get("max", 0)
+        return histogram
@@ -0,0 +1,61 @@
+"""
+In-process timing metrics backed by mergeable histograms.
+"""
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from app.utils.histogram import Histogram
+
+
+class TimingMetric:
+    """Distribution of durations, recorded in microseconds and reported in milliseconds."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.histogram = Histogram()
+
+    def observe(self, seconds: float) -> None:
+        """Record a duration in seconds."""
+        self.histogram.record(int(seconds * 1_000_000))
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Record the duration of a block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def snapshot(self) -> dict:
+        """Summarize the recorded durations in milliseconds."""
+        histogram = self.histogram
+
+        def to_ms(value):
+            return round(value / 1000, 3) if value is not None else None
+
+        return {
+            "count": histogram.total,
+            "mean_ms": to_ms(histogram.mean),
+            "p50_ms": to_ms(histogram.percentile(50)),
+            "p90_ms": to_ms(histogram.percentile(90)),
+            "p99_ms": to_ms(histogram.percentile(99)),
+            "max_ms": to_ms(histogram.max if histogram.total else None),
+        }
+
+
+_timings: Dict[str, TimingMetric] = {}
+
+
+def timing(name: str) -> TimingMetric:
+    """Get or create the timing metric with the given name."""
+    metric = _timings.get(name)
+    if metric is None:
+        metric = _timings[name] = TimingMetric(name)
+    return metric
+
+
+def snapshot() -> Dict[str, dict]:
+    """Summarize all timing metrics of this worker process."""
+    return {name: metric.snapshot() for name, metric in sorted(_timings.items())}
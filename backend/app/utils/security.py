@@ -1,14 +1,20 @@
 """
 Security utilities for password hashing, token generation, and JWT handling.
 """
+import asyncio
 import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, List, Optional, TypeVar
 
 from jose import JWTError, jwt
 import bcrypt
 
 from app.config import settings
+from app.utils.metrics import timing
+
+T = TypeVar("T")
 
 # Password hashing
 
@@ -39,6 +45,69 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password, hashed_password)
 
 
+# bcrypt costs hundreds of milliseconds per call at BCRYPT_ROUNDS=12, so async
+# code runs it on a dedicated, bounded pool instead of the event loop. The
+# semaphore caps queued work so login bursts wait their turn without piling
+# unbounded jobs onto the pool.
+_password_executor: Optional[ThreadPoolExecutor] = None
+_password_semaphore: Optional[asyncio.Semaphore] = None
+
+
+async def _run_password_task(func: Callable[..., T], *args) -> T:
+    """Run a bcrypt call on the password hashing pool, recording queue and run time."""
+    global _password_executor, _password_semaphore
+
+    if _password_executor is None:
+        _password_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            thread_name_prefix="password-hash",
+        )
+    if _password_semaphore is None:
+        _password_semaphore = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_CONCURRENCY)
+
+    queued_at = time.perf_counter()
+    # Start and end times taken on the pool thread; the histograms are only
+    # touched on the event loop, as they are not thread-safe
+    marks: List[float] = []
+
+    def run() -> T:
+        marks.append(time.perf_counter())
+        try:
+            return func(*args)
+        finally:
+            marks.append(time.perf_counter())
+
+    async with _password_semaphore:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(_password_executor, run)
+        finally:
+            if marks:
+                timing("password_hash.queue").observe(marks[0] - queued_at)
+            if len(marks) == 2:
+                timing("password_hash.run").observe(marks[1] - marks[0])
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password without blocking the event loop."""
+    return await _run_password_task(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password without blocking the event loop."""
+    return await _run_password_task(verify_password, plain_password, hashed_password)
+
+
+def shutdown_password_executor() -> None:
+    """Shut down the password hashing pool."""
+    global _password_executor, _password_semaphore
+
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=False)
+    _password_executor = None
+    _password_semaphore = None
+
+
 def generate_api_key() -> str:
     """Generate a secure API key for MT accounts."""
     return secrets.token_hex(settings.API_KEY_LENGTH // 2)
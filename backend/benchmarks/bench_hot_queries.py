@@ -0,0 +1,82 @@
+"""
+Benchmark the per-call statement overhead of the hot queries.
+
+For each hot query compares building the statement inline on every call
+(construction plus cache key, as a cached compile costs) with the
+prebuilt statement (memoized cache key), and shows the full compile an
+uncached call would pay. Uses the asyncpg dialect; no database is
+needed:
+
+    python -m benchmarks.bench_hot_queries --repeat 5000
+"""
+import argparse
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable
+
+from sqlalchemy import and_, select, update
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+
+from app.models.account import MTAccount
+from app.models.signal import Signal
+from app.models.symbol_mapping import SymbolMapping
+from app.models.user import User
+from app.services.hot_queries import hot_queries
+
+
+ACCOUNT_ID = uuid.uuid4()
+NOW = datetime.now(timezone.utc)
+
+# The statements as they were built inline before
+INLINE = {
+    "user_by_webhook_secret": lambda: select(User).where(User.webhook_secret == "secret"),
+    "account_by_api_key": lambda: (
+        select(MTAccount.id, MTAccount.user_id, MTAccount.is_active, MTAccount.settings)
+        .join(User, User.id == MTAccount.user_id)
+        .where(and_(MTAccount.api_key == "key", MTAccount.is_active == True, User.is_active == True))
+    ),
+    "symbol_mapping": lambda: select(SymbolMapping).where(
+        and_(SymbolMapping.account_id == ACCOUNT_ID, SymbolMapping.tradingview_symbol == "XAUUSD")
+    ),
+    "pending_signals": lambda: select(Signal).where(
+        and_(Signal.account_id == ACCOUNT_ID, Signal.status == "pending", Signal.expires_at > NOW)
+    ).order_by(Signal.created_at.asc()),
+    "claim_pending_signals": lambda: (
+        update(Signal)
+        .where(and_(Signal.account_id.in_([ACCOUNT_ID]), Signal.status == "pending", Signal.expires_at > NOW))
+        .values(status="sent", sent_at=NOW)
+        .returning(Signal)
+    ),
+    "result_signals": lambda: select(
+        Signal.id, Signal.user_id, Signal.account_id, Signal.symbol,
+        Signal.created_at, Signal.sent_at, Signal.execution_result.is_(None).label("first_report"),
+    ).where(Signal.id.in_([ACCOUNT_ID])),
+}
+
+
+def median_us(fn: Callable[[], object], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1_000_000
+
+
+def main(args: argparse.Namespace) -> None:
+    dialect = asyncpg_dialect()
+    print(f"{'query':<24} {'inline us':>10} {'prebuilt us':>12} {'compile us':>11}")
+    for name, build in INLINE.items():
+        prebuilt = hot_queries[name].statement
+        inline_us = median_us(lambda: build()._generate_cache_key(), args.repeat)
+        prebuilt_us = median_us(lambda: prebuilt._generate_cache_key(), args.repeat)
+        compile_us = median_us(lambda: build().compile(dialect=dialect), max(1, args.repeat // 10))
+        print(f"{name:<24} {inline_us:>10.1f} {prebuilt_us:>12.1f} {compile_us:>11.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5000)
+    main(parser.parse_args())
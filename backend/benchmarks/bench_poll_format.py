@@ -0,0 +1,100 @@
+"""
+Benchmark EA poll response formats.
+
+Compares the JSON PendingSignalsResponse with the compact line protocol
+for a range of signals per poll, reporting bytes per poll and the median
+server-side serialization time. The "prerendered" rows time the poll
+path, which concatenates payloads rendered at signal creation. No
+database is needed:
+
+    python -m benchmarks.bench_poll_format --repeat 2000
+"""
+import argparse
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.schemas.signal import PendingSignal, PendingSignalsResponse
+from app.utils.ea_protocol import (
+    render_json_poll_response,
+    render_poll_response,
+    render_signal_line,
+)
+
+
+SIGNALS_PER_POLL = [0, 1, 5, 20]
+
+
+def synthetic_signal(index: int) -> PendingSignal:
+    """Build one pending signal shaped like a typical TradingView alert."""
+    return PendingSignal(
+        id=uuid.uuid4(),
+        symbol="XAUUSD",
+        action="buy" if index % 2 else "sell",
+        order_type="market",
+        quantity=Decimal("0.1000"),
+        price=None,
+        take_profit=Decimal("2050.00000000"),
+        stop_loss=Decimal("2020.00000000"),
+        comment=f"EMA_Cross #{index}",
+    )
+
+
+def render_json(signals) -> bytes:
+    """Serialize the way FastAPI does for the response_model path."""
+    response = PendingSignalsResponse(signals=signals, server_time=datetime.now(timezone.utc))
+    return JSONResponse(jsonable_encoder(response)).body
+
+
+def compact_line(signal: PendingSignal) -> bytes:
+    """Render the compact line of one signal."""
+    return render_signal_line(
+        signal.id, signal.symbol, signal.action, signal.order_type, signal.quantity,
+        signal.price, signal.take_profit, signal.stop_loss, signal.comment,
+    ).encode("utf-8")
+
+
+def render_compact(signals) -> bytes:
+    """Serialize with the compact line protocol."""
+    return render_poll_response([compact_line(s) for s in signals], datetime.now(timezone.utc))
+
+
+def time_render(render, signals, repeat: int) -> float:
+    """Return the median serialization time in microseconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        render(signals)
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'signals':>8} {'format':>8} {'bytes':>8} {'median us':>10} {'prerendered us':>15}")
+    for count in SIGNALS_PER_POLL:
+        signals = [synthetic_signal(i) for i in range(count)]
+        json_payloads = [s.model_dump_json().encode("utf-8") for s in signals]
+        compact_lines = [compact_line(s) for s in signals]
+
+        variants = [
+            ("json", render_json, lambda _: render_json_poll_response(json_payloads, datetime.utcnow())),
+            ("compact", render_compact, lambda _: render_poll_response(compact_lines, datetime.now(timezone.utc))),
+        ]
+        for name, render, concatenate in variants:
+            size = len(render(signals))
+            median_us = time_render(render, signals, args.repeat)
+            prerendered_us = time_render(concatenate, signals, args.repeat)
+            print(f"{count:>8} {name:>8} {size:>8} {median_us:>10.1f} {prerendered_us:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Load test for WebSocket signal push fan-out.
+
+Seeds one synthetic user with one MT account per connection in the
+server's database, opens a compact-format WebSocket per account against
+a running server, then fires webhooks and reports how long the
+connections took to receive the resulting signals. Every signal is
+acked, as an EA would:
+
+    uvicorn app.main:app --port 8000 &
+    DATABASE_URL=... python -m benchmarks.bench_push_fanout --connections 2000
+
+Large connection counts need a raised open file limit (ulimit -n) on
+both sides.
+"""
+import argparse
+import asyncio
+import secrets
+import statistics
+import time
+import uuid
+from typing import List
+
+import httpx
+import websockets
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.models.account import MTAccount
+from app.models.user import User
+
+
+BENCH_EMAIL_DOMAIN = "bench.signalbridge.dev"
+
+
+async def seed_accounts(session_factory, count: int) -> tuple[uuid.UUID, str, List[str]]:
+    """Insert a user with `count` active accounts; returns its id, webhook secret and API keys."""
+    user_id = uuid.uuid4()
+    webhook_secret = secrets.token_hex(32)
+    api_keys = [secrets.token_hex(32) for _ in range(count)]
+
+    async with session_factory() as session:
+        await session.execute(insert(User), [{
+            "id": user_id,
+            "email": f"push-fanout-{user_id.hex[:8]}@{BENCH_EMAIL_DOMAIN}",
+            "password_hash": "x",
+            "full_name": "Push Fanout",
+            "webhook_secret": webhook_secret,
+            "is_active": True,
+            "is_admin": False,
+            "tier": "free",
+            "is_approved": True,
+            "max_accounts": count,
+            "max_signals_per_day": 1_000_000,
+            "settings": {},
+        }])
+        for start in range(0, count, 5000):
+            await session.execute(insert(MTAccount), [
+                {
+                    "id": uuid.uuid4(),
+                    "user_id": user_id,
+                    "name": f"Fanout {i}",
+                    "platform": "mt5",
+                    "api_key": api_key,
+                    "is_active": True,
+                    "settings": {},
+                }
+                for i, api_key in enumerate(api_keys[start:start + 5000], start)
+            ])
+        await session.commit()
+
+    return user_id, webhook_secret, api_keys
+
+
+class Connection:
+    """One simulated EA holding a push connection."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.websocket = None
+        self.received: asyncio.Queue = asyncio.Queue()
+        self._reader = None
+
+    async def open(self) -> None:
+        self.websocket = await websockets.connect(self.url, open_timeout=30, max_queue=None)
+        self._reader = asyncio.create_task(self._read())
+
+    async def _read(self) -> None:
+        async for message in self.websocket:
+            if not message.startswith("V1|"):
+                continue
+            received_at = time.perf_counter()
+            ids = [line.split("|", 2)[1] for line in message.splitlines()[1:]]
+            await self.websocket.send("A|" + ",".join(ids))
+            await self.received.put(received_at)
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+        if self.websocket is not None:
+            await self.websocket.close()
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run_round(client: httpx.AsyncClient, connections: List[Connection], webhook_secret: str) -> None:
+    """Fire one webhook and print the fan-out latency distribution in milliseconds."""
+    started = time.perf_counter()
+    response = await client.post("/webhook/tradingview", json={
+        "secret": webhook_secret,
+        "symbol": "XAUUSD",
+        "action": "buy",
+        "order_type": "market",
+        "quantity": 0.1,
+        "comment": "Fanout",
+    })
+    webhook_ms = (time.perf_counter() - started) * 1000
+    response.raise_for_status()
+
+    results = await asyncio.gather(
+        *(asyncio.wait_for(c.received.get(), 60) for c in connections),
+        return_exceptions=True,
+    )
+    latencies = [(r - started) * 1000 for r in results if isinstance(r, float)]
+    missing = len(results) - len(latencies)
+
+    print(
+        f"{len(latencies):>8} {missing:>8} {webhook_ms:>10.1f} "
+        f"{statistics.median(latencies):>8.1f} {percentile(latencies, 0.95):>8.1f} "
+        f"{percentile(latencies, 0.99):>8.1f} {max(latencies):>8.1f}"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine = create_async_engine(args.database_url)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    print(f"Seeding {args.connections} accounts...")
+    user_id, webhook_secret, api_keys = await seed_accounts(session_factory, args.connections)
+
+    ws_base = args.base_url.replace("http", "ws", 1)
+    connections = [
+        Connection(f"{ws_base}/signals/ws?api_key={api_key}&format=compact") for api_key in api_keys
+    ]
+
+    try:
+        print(f"Opening {len(connections)} connections...")
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(args.connect_concurrency)
+
+        async def open_connection(connection: Connection) -> None:
+            async with semaphore:
+                await connection.open()
+
+        await asyncio.gather(*(open_connection(c) for c in connections))
+        print(f"Opened in {time.perf_counter() - started:.1f}s")
+
+        print(f"{'received':>8} {'missing':>8} {'webhook ms':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+            for _ in range(args.rounds):
+                await run_round(client, connections, webhook_secret)
+                await asyncio.sleep(args.pause)
+    finally:
+        await asyncio.gather(*(c.close() for c in connections), return_exceptions=True)
+        async with session_factory() as session:
+            await session.execute(delete(User).where(User.id == user_id))
+            await session.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--pause", type=float, default=1.0, help="Seconds between webhooks")
+    parser.add_argument("--connect-concurrency", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,164 @@
+"""
+Benchmark memory and time of loading signals as entities versus projected rows.
+
+Seeds one synthetic user with `--rows` signals carrying a realistic
+raw_payload and execution_result, then loads them the ways the list,
+export and poll paths can: full entities with the JSONB payloads (as
+before), entities with the payloads deferred, and rows of only the
+columns each path renders. Reports the Python memory held per 10k rows
+(tracemalloc) and the median load time:
+
+    DATABASE_URL=... python -m benchmarks.bench_signal_projection --rows 10000
+"""
+import argparse
+import asyncio
+import gc
+import statistics
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import joinedload, undefer_group
+
+from app.api.v1.signals import EXPORT_COLUMNS
+from app.config import settings
+from app.models.signal import Signal
+from app.models.signal_batch import SignalBatch
+from app.models.user import User
+from app.services.hot_queries import SIGNAL_DELIVERY_COLUMNS
+from app.services.signal_processor import SIGNAL_LIST_COLUMNS
+
+
+BENCH_EMAIL_DOMAIN = "bench.signalbridge.dev"
+
+
+def _batch(user_id: uuid.UUID, i: int, now: datetime) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "action": "buy" if i % 2 else "sell",
+        "order_type": "market",
+        "price": Decimal("2035.50"),
+        "take_profit": Decimal("2050.00"),
+        "stop_loss": Decimal("2020.00"),
+        "comment": f"EMA Cross {i}",
+        "source": "tradingview",
+        "raw_payload": {
+            "secret": "x" * 64, "symbol": "XAUUSD", "action": "buy", "order_type": "market",
+            "quantity": 0.1, "price": 2035.5, "take_profit": 2050.0, "stop_loss": 2020.0,
+            "comment": f"EMA Cross {i}", "strategy": "ema-cross-v2", "timeframe": "15",
+        },
+        "created_at": now - timedelta(seconds=i),
+    }
+
+
+def _signal(batch: dict, i: int, now: datetime) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "user_id": batch["user_id"],
+        "batch_id": batch["id"],
+        "symbol": "XAUUSD",
+        "quantity": Decimal("0.1"),
+        "status": "executed",
+        "execution_result": {
+            "success": True, "ticket": 100000 + i, "executed_price": 2035.6,
+            "executed_quantity": 0.1, "execution_time_ms": 120, "error_code": None,
+            "error_message": None,
+        },
+        "ticket": 100000 + i,
+        "executed_price": Decimal("2035.6"),
+        "executed_quantity": Decimal("0.1"),
+        "execution_time_ms": 120,
+        "created_at": now - timedelta(seconds=i),
+        "expires_at": now + timedelta(seconds=60),
+    }
+
+
+async def seed_signals(session_factory, rows: int) -> uuid.UUID:
+    """Insert a user with `rows` signals; returns the user id."""
+    user_id = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    async with session_factory() as session:
+        await session.execute(insert(User), [{
+            "id": user_id,
+            "email": f"projection-{user_id.hex[:8]}@{BENCH_EMAIL_DOMAIN}",
+            "password_hash": "x",
+            "full_name": "Projection",
+            "webhook_secret": uuid.uuid4().hex * 2,
+            "is_active": True,
+            "is_admin": False,
+            "tier": "free",
+            "is_approved": True,
+            "max_accounts": 1,
+            "max_signals_per_day": 1_000_000,
+            "settings": {},
+        }])
+        for start in range(0, rows, 5000):
+            # One single-account batch per signal: the worst case for the join
+            batches = [_batch(user_id, i, now) for i in range(start, min(rows, start + 5000))]
+            await session.execute(insert(SignalBatch), batches)
+            await session.execute(
+                insert(Signal), [_signal(batch, i, now) for i, batch in enumerate(batches, start)]
+            )
+        await session.commit()
+    return user_id
+
+
+async def measure(session_factory, statement, entities: bool, repeat: int) -> tuple[int, float]:
+    """Load the statement's results; returns bytes held by them and the median load seconds."""
+    timings = []
+    held = 0
+    for _ in range(repeat):
+        async with session_factory() as session:
+            gc.collect()
+            tracemalloc.start()
+            started = time.perf_counter()
+            result = await session.execute(statement)
+            loaded = result.scalars().all() if entities else result.all()
+            timings.append(time.perf_counter() - started)
+            held = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del loaded
+    return held, statistics.median(timings)
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine = create_async_engine(args.database_url)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    print(f"Seeding {args.rows} signals...")
+    user_id = await seed_signals(session_factory, args.rows)
+    where = Signal.user_id == user_id
+
+    payload = (undefer_group("payload"), joinedload(Signal.batch).undefer_group("payload"))
+    cases = [
+        ("entities + JSONB", select(Signal).options(*payload).where(where), True),
+        ("entities, deferred", select(Signal).where(where), True),
+        ("rows: list", select(*SIGNAL_LIST_COLUMNS).join(Signal.batch).where(where), False),
+        ("rows: export", select(*EXPORT_COLUMNS).join(Signal.batch).where(where), False),
+        ("rows: delivery", select(*SIGNAL_DELIVERY_COLUMNS).join(Signal.batch).where(where), False),
+    ]
+
+    try:
+        print(f"{'load':<20} {'MB per 10k':>11} {'ms per 10k':>11}")
+        for name, statement, entities in cases:
+            held, seconds = await measure(session_factory, statement, entities, args.repeat)
+            scale = 10_000 / args.rows
+            print(f"{name:<20} {held * scale / 1e6:>11.2f} {seconds * scale * 1000:>11.1f}")
+    finally:
+        async with session_factory() as session:
+            await session.execute(delete(User).where(User.id == user_id))
+            await session.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
@@ -2,16 +2,33 @@
 Pytest configuration and fixtures.
 """
 import asyncio
+from contextlib import asynccontextmanager
 from typing import AsyncGenerator, Generator
 
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.ext.compiler import compiles
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_read_db, get_session_factory
 from app.config import settings
+from app.services.auth_cache import auth_cache
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    """Render Postgres JSONB columns as JSON on the SQLite test database."""
+    return "JSON"
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_sqlite(type_, compiler, **kw):
+    """Render Postgres UUID columns as CHAR(32) on the SQLite test database."""
+    return "CHAR(32)"
+
 
 # Test database URL (use SQLite for testing)
 TEST_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
@@ -25,6 +42,14 @@ def event_loop() -> Generator:
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def clear_auth_cache() -> Generator:
+    """Start every test with empty auth caches, since each test gets a fresh database."""
+    auth_cache.clear()
+    yield
+    auth_cache.clear()
+
+
 @pytest_asyncio.fixture(scope="function")
 async def test_db() -> AsyncGenerator[AsyncSession, None]:
     """Create a test database and session."""
@@ -51,9 +76,21 @@ async def client(test_db: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
     """Create a test client with the test database."""
 
     async def override_get_db():
+        # Commit like get_db does, so after-commit hooks run in tests too
+        yield test_db
+        await test_db.commit()
+
+    async def override_get_read_db():
+        # Never commits, like get_read_db
+        yield test_db
+
+    @asynccontextmanager
+    async def override_session():
         yield test_db
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_read_db
+    app.dependency_overrides[get_session_factory] = lambda: override_session
 
     async with AsyncClient(app=app, base_url="http://test") as ac:
         yield ac
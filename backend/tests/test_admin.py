@@ -0,0 +1,161 @@
+"""
+Tests for admin endpoints.
+"""
+import uuid
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User
+from app.services.auth_cache import AuthCache, UserPrincipal, auth_cache
+
+
+async def create_admin(client: AsyncClient, test_db: AsyncSession, user_data: dict) -> str:
+    """Helper to register a user, promote them to admin, and return an access token."""
+    await client.post("/api/v1/auth/register", json=user_data)
+    await test_db.execute(
+        update(User).where(User.email == user_data["email"]).values(is_admin=True)
+    )
+    await test_db.commit()
+
+    login_response = await client.post(
+        "/api/v1/auth/login",
+        json={"email": user_data["email"], "password": user_data["password"]},
+    )
+    return login_response.json()["access_token"]
+
+
+@pytest.mark.asyncio
+async def test_list_users_counts(
+    client: AsyncClient,
+    test_db: AsyncSession,
+    user_data: dict,
+    account_data: dict,
+    webhook_payload: dict,
+):
+    """Test that user list counts accounts and signals per user."""
+    token = await create_admin(client, test_db, user_data)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    await client.post("/api/v1/accounts", json=account_data, headers=headers)
+    await client.post("/api/v1/accounts", json=account_data, headers=headers)
+
+    me = await client.get("/api/v1/auth/me", headers=headers)
+    webhook_payload["secret"] = me.json()["webhook_secret"]
+    await client.post("/api/v1/webhook/tradingview", json=webhook_payload)
+
+    other_user = {**user_data, "email": "other@example.com"}
+    await client.post("/api/v1/auth/register", json=other_user)
+
+    response = await client.get("/api/v1/admin/users", headers=headers)
+
+    assert response.status_code == 200
+    users = {u["email"]: u for u in response.json()["users"]}
+    assert users[user_data["email"]]["accounts_count"] == 2
+    assert users[user_data["email"]]["signals_count"] == 2
+    assert users["other@example.com"]["accounts_count"] == 0
+    assert users["other@example.com"]["signals_count"] == 0
+
+    user_id = users[user_data["email"]]["id"]
+    response = await client.get(f"/api/v1/admin/users/{user_id}", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["accounts_count"] == 2
+    assert response.json()["signals_count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_list_users_similar_search_fallback(
+    client: AsyncClient,
+    test_db: AsyncSession,
+    user_data: dict,
+):
+    """Test that similarity search falls back to substring matching on SQLite."""
+    token = await create_admin(client, test_db, user_data)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    await client.post(
+        "/api/v1/auth/register",
+        json={**user_data, "email": "jane.trader@example.com", "full_name": "Jane Trader"},
+    )
+
+    response = await client.get(
+        "/api/v1/admin/users",
+        params={"search": "trader", "search_mode": "similar"},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 1
+    assert data["users"][0]["email"] == "jane.trader@example.com"
+
+
+@pytest.mark.asyncio
+async def test_deactivated_user_rejected_while_cached(
+    client: AsyncClient,
+    test_db: AsyncSession,
+    user_data: dict,
+):
+    """Test that deactivating a user invalidates their cached principal."""
+    token = await create_admin(client, test_db, user_data)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    other_user = {**user_data, "email": "other@example.com"}
+    register_response = await client.post("/api/v1/auth/register", json=other_user)
+    other_id = register_response.json()["id"]
+    login_response = await client.post(
+        "/api/v1/auth/login",
+        json={"email": other_user["email"], "password": other_user["password"]},
+    )
+    other_headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+    response = await client.get("/api/v1/accounts", headers=other_headers)
+    assert response.status_code == 200
+
+    response = await client.put(
+        f"/api/v1/admin/users/{other_id}",
+        json={"is_active": False},
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+    response = await client.get("/api/v1/accounts", headers=other_headers)
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_user_invalidated_only_after_commit(test_db: AsyncSession):
+    """Test that a user is invalidated when the session commits, not before."""
+    user_id = uuid.uuid4()
+    version = auth_cache.user_version(user_id)
+
+    auth_cache.invalidate_user_after_commit(test_db, user_id)
+    assert auth_cache.user_version(user_id) == version
+
+    await test_db.commit()
+    assert auth_cache.user_version(user_id) != version
+
+
+def test_evicted_user_versions_still_reject_stale_principals():
+    """Test that bounding the version map never lets a principal loaded before an invalidation in."""
+    cache = AuthCache(max_tokens=10, max_users=2, user_ttl_seconds=60, max_api_keys=10, api_key_ttl_seconds=60)
+    user_id = uuid.uuid4()
+
+    # Loaded before the invalidation, cached after it and after its version was evicted
+    stale = UserPrincipal(id=user_id, email="a@example.com", is_active=True, is_admin=True,
+                          version=cache.user_version(user_id))
+    cache.invalidate_user(user_id)
+    for _ in range(3):
+        cache.invalidate_user(uuid.uuid4())
+    assert len(cache._versions) == 2
+
+    cache.put_user(stale)
+    assert cache.get_user(user_id) is None
+
+    fresh = UserPrincipal(id=user_id, email="a@example.com", is_active=False, is_admin=False,
+                          version=cache.user_version(user_id))
+    cache.put_user(fresh)
+    assert cache.get_user(user_id) == fresh
@@ -0,0 +1,125 @@
+"""
+Tests for analytics endpoints.
+"""
+import pytest
+from httpx import AsyncClient
+
+from app.services.analytics import summarize_fill_quality
+from tests.test_webhook import create_user_with_account
+
+
+@pytest.mark.asyncio
+async def test_latency_report(client: AsyncClient, user_data: dict, account_data: dict, webhook_payload: dict):
+    """Test that reported results feed the latency report."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    webhook_payload["secret"] = webhook_secret
+    await client.post("/api/v1/webhook/tradingview", json=webhook_payload)
+
+    pending = await client.get("/api/v1/signals/pending", params={"api_key": api_key})
+    signal_id = pending.json()["signals"][0]["id"]
+
+    result = {"success": True, "ticket": 1001, "executed_price": 2030.5, "execution_time_ms": 120}
+    response = await client.post(
+        f"/api/v1/signals/{signal_id}/result", params={"api_key": api_key}, json=result
+    )
+    assert response.status_code == 200
+    assert response.json()["ticket"] == 1001
+    assert response.json()["execution_time_ms"] == 120
+
+    # A repeated report must not be counted twice
+    await client.post(f"/api/v1/signals/{signal_id}/result", params={"api_key": api_key}, json=result)
+
+    response = await client.get(
+        "/api/v1/analytics/latency", params={"group_by": "symbol"}, headers=headers
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["group_by"] == "symbol"
+    assert len(data["groups"]) == 1
+    group = data["groups"][0]
+    assert group["key"] == webhook_payload["symbol"]
+    assert group["metrics"]["ea_execution_ms"]["count"] == 1
+    assert 116 <= group["metrics"]["ea_execution_ms"]["p50_ms"] <= 120
+    assert group["metrics"]["total_ms"]["count"] == 1
+    assert set(group["metrics"]) == {"delivery_ms", "execution_ms", "total_ms", "ea_execution_ms"}
+
+
+def test_summarize_fill_quality():
+    """Test slippage direction, fill ratio and failure code grouping."""
+    summaries = summarize_fill_quality(
+        keys=["A", "A", "A", "B", "B"],
+        actions=["buy", "sell", "buy", "buy_limit", "sell"],
+        requested_price=[100, 100, None, 50, 20],
+        executed_price=[100.1, 99.9, 101, 50, None],
+        requested_quantity=[1, 1, 2, 1, 1],
+        executed_quantity=[1, 0.5, 2, 1, None],
+        success=[True, True, True, True, False],
+        error_codes=[None, None, None, None, 134],
+    )
+
+    a, b = summaries
+    assert a["key"] == "A"
+    assert a["results"] == 3
+    assert a["filled"] == 3
+    assert a["slippage_samples"] == 2
+    # Buy filled 0.1 higher and sell filled 0.1 lower: both 10 bps adverse
+    assert a["avg_slippage_bps"] == 10.0
+    assert a["avg_fill_ratio"] == round((1 + 0.5 + 1) / 3, 4)
+    assert a["failure_codes"] == {}
+
+    assert b["key"] == "B"
+    assert b["failed"] == 1
+    assert b["fill_rate"] == 0.5
+    assert b["avg_slippage_bps"] == 0.0
+    assert b["failure_codes"] == {"134": 1}
+
+
+def test_fill_quality_ignores_slippage_of_close_and_modify():
+    """Test that close and modify results count as fills but not towards slippage."""
+    (summary,) = summarize_fill_quality(
+        keys=["A", "A", "A"],
+        actions=["close", "modify", "sell_stop"],
+        requested_price=[100, 100, 100],
+        executed_price=[101, 90, 99.9],
+        requested_quantity=[1, 1, 1],
+        executed_quantity=[1, 1, 1],
+        success=[True, True, True],
+        error_codes=[None, None, None],
+    )
+
+    assert summary["filled"] == 3
+    assert summary["slippage_samples"] == 1
+    assert summary["avg_slippage_bps"] == 10.0
+
+
+@pytest.mark.asyncio
+async def test_fill_quality_report(client: AsyncClient, user_data: dict, account_data: dict, webhook_payload: dict):
+    """Test the fill quality report endpoint."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+
+    webhook_payload.update(secret=webhook_secret, order_type="limit", action="buy_limit", price=2000)
+    await client.post("/api/v1/webhook/tradingview", json=webhook_payload)
+
+    pending = await client.get("/api/v1/signals/pending", params={"api_key": api_key})
+    signal_id = pending.json()["signals"][0]["id"]
+    await client.post(
+        f"/api/v1/signals/{signal_id}/result",
+        params={"api_key": api_key},
+        json={"success": True, "executed_price": 2001, "executed_quantity": 0.1},
+    )
+
+    response = await client.get(
+        "/api/v1/analytics/fill-quality",
+        params={"group_by": "broker"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 200
+    group = response.json()["groups"][0]
+    assert group["key"] == account_data["broker"]
+    assert group["filled"] == 1
+    assert group["avg_slippage_bps"] == 5.0
+    assert group["avg_fill_ratio"] == 1.0
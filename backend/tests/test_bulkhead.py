@@ -0,0 +1,64 @@
+"""
+Tests for per-route-class database bulkheads.
+"""
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from app.database import Bulkhead, BulkheadFull, db_bulkheads
+from app.utils import metrics
+from tests.test_webhook import create_user_with_account
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_limits_concurrency():
+    """Test that waiters queue for a slot, and give up after the timeout."""
+    bulkhead = Bulkhead("test", limit=1, timeout=0.05)
+
+    await bulkhead.acquire()
+    waiter = asyncio.create_task(bulkhead.acquire())
+    await asyncio.sleep(0)
+    assert bulkhead.stats() == {"limit": 1, "in_use": 1, "waiting": 1, "rejected": 0}
+
+    bulkhead.release()
+    await asyncio.wait_for(waiter, 1)
+
+    with pytest.raises(BulkheadFull):
+        await bulkhead.acquire()
+    assert bulkhead.stats() == {"limit": 1, "in_use": 1, "waiting": 0, "rejected": 1}
+    assert metrics.timing("db.wait.test").histogram.total == 3
+
+
+@pytest.mark.asyncio
+async def test_saturated_bulk_class_does_not_block_delivery(
+    client: AsyncClient,
+    user_data: dict,
+    account_data: dict,
+):
+    """Test that exports get 503 while the bulk class is full, and EA polls still go through."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+    bulk = db_bulkheads["bulk"]
+    timeout = bulk.timeout
+    bulk.timeout = 0.05
+
+    for _ in range(bulk.limit):
+        await bulk.acquire()
+    try:
+        response = await client.get(
+            "/api/v1/signals/export", headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+
+        response = await client.get("/api/v1/signals/pending", params={"api_key": api_key})
+        assert response.status_code == 200
+    finally:
+        for _ in range(bulk.limit):
+            bulk.release()
+        bulk.timeout = timeout
+
+    response = await client.get("/api/v1/signals/export", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert db_bulkheads["bulk"].in_use == 0
+    assert db_bulkheads["delivery"].in_use == 0
@@ -0,0 +1,61 @@
+"""
+Tests for coalesced EA heartbeats.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.account import MTAccount
+from app.services.heartbeat import HeartbeatTracker, heartbeats
+from tests.test_webhook import create_user_with_account
+
+
+def test_record_coalesces_within_resolution():
+    """Test that heartbeats within the resolution are not queued again."""
+    tracker = HeartbeatTracker(resolution_seconds=30, flush_interval_seconds=10)
+    account_id = object()
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    tracker.record(account_id, now)
+    tracker._persisted[account_id] = tracker._dirty.pop(account_id)
+
+    tracker.record(account_id, now + timedelta(seconds=10))
+    assert tracker.pending == 0
+    assert tracker.last_seen(account_id) == now + timedelta(seconds=10)
+
+    tracker.record(account_id, now + timedelta(seconds=30))
+    assert tracker.pending == 1
+
+
+@pytest.mark.asyncio
+async def test_poll_heartbeat_flushed_in_bulk(
+    client: AsyncClient,
+    test_db: AsyncSession,
+    user_data: dict,
+    account_data: dict,
+):
+    """Test that polls are recorded in memory and written by a flush."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.get("/api/v1/signals/pending", params={"api_key": api_key})
+    assert response.status_code == 200
+
+    result = await test_db.execute(select(MTAccount.id, MTAccount.last_connected_at))
+    account_id, last_connected_at = result.one()
+    assert last_connected_at is None
+
+    response = await client.get(f"/api/v1/accounts/{account_id}", headers=headers)
+    assert response.json()["last_connected_at"] is not None
+
+    await test_db.commit()
+    written = await heartbeats.flush(async_sessionmaker(test_db.bind, expire_on_commit=False))
+    assert written >= 1
+
+    result = await test_db.execute(
+        select(MTAccount.last_connected_at).where(MTAccount.id == account_id)
+    )
+    assert result.scalar_one() is not None
@@ -0,0 +1,53 @@
+"""
+Tests for the mergeable latency histogram.
+"""
+from app.utils.histogram import Histogram
+
+
+def test_bucket_bounds_contain_value():
+    """Test that every value falls inside its bucket bounds."""
+    for value in list(range(0, 2000)) + [10**6, 10**9 + 7]:
+        lowest, highest = Histogram.bucket_bounds(Histogram.bucket_index(value))
+        assert lowest <= value <= highest
+        # Relative bucket width stays within ~3%
+        assert highest - lowest <= max(1, value * 0.04)
+
+
+def test_percentiles():
+    """Test percentiles over a uniform distribution."""
+    histogram = Histogram()
+    for value in range(1, 1001):
+        histogram.record(value)
+
+    assert histogram.total == 1000
+    assert abs(histogram.percentile(50) - 500) <= 500 * 0.04
+    assert abs(histogram.percentile(99) - 990) <= 990 * 0.04
+    assert histogram.percentile(100) == 1000
+    assert histogram.mean == 500.5
+
+
+def test_merge_and_roundtrip():
+    """Test that merged histograms equal one histogram of all values."""
+    first, second, combined = Histogram(), Histogram(), Histogram()
+    for value in range(0, 500):
+        first.record(value)
+        combined.record(value)
+    for value in range(500, 5000, 7):
+        second.record(value)
+        combined.record(value)
+
+    merged = Histogram.from_dict(first.to_dict()).merge(Histogram.from_dict(second.to_dict()))
+
+    assert merged.counts == combined.counts
+    assert merged.total == combined.total
+    assert merged.max == combined.max
+    assert merged.percentile(90) == combined.percentile(90)
+
+
+def test_empty_histogram():
+    """Test that an empty histogram has no percentiles."""
+    histogram = Histogram.from_dict(None)
+
+    assert histogram.percentile(50) is None
+    assert histogram.mean is None
+    assert histogram.buckets() == []
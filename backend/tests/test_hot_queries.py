@@ -0,0 +1,42 @@
+"""
+Tests for the prebuilt hot query statements.
+"""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.hot_queries import hot_queries, prepare_hot_queries
+from app.utils import metrics
+from tests.test_webhook import create_user_with_account
+
+
+@pytest.mark.asyncio
+async def test_prepare_hot_queries(test_db: AsyncSession):
+    """Test that warming runs every hot query without touching data, and records compile timings."""
+    await prepare_hot_queries(test_db.bind, connections=2)
+
+    timings = metrics.snapshot()
+    for name, query in hot_queries.items():
+        if query.warm_params is not None:
+            assert timings[f"db.compile.{name}"]["count"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_hot_queries_hit_compiled_cache(
+    client: AsyncClient,
+    user_data: dict,
+    account_data: dict,
+    webhook_payload: dict,
+):
+    """Test that repeated webhooks and polls reuse the compiled statements."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+    webhook_payload["secret"] = webhook_secret
+    before = {name: q.cache_hits for name, q in hot_queries.items()}
+
+    for _ in range(3):
+        await client.post("/api/v1/webhook/tradingview", json=webhook_payload)
+        await client.get("/api/v1/signals/pending", params={"api_key": api_key})
+
+    for name in ("user_by_webhook_secret", "symbol_mapping"):
+        assert hot_queries[name].cache_hits - before[name] >= 2
+    assert metrics.snapshot()["db.query.user_by_webhook_secret"]["count"] >= 3
@@ -0,0 +1,103 @@
+"""
+Tests for server-assigned EA poll scheduling.
+"""
+import uuid
+
+import pytest
+from httpx import AsyncClient
+
+from app.services.delivery_sequence import delivery_sequences
+from app.services.poll_schedule import PollScheduler
+from tests.test_webhook import create_user_with_account
+
+
+def make_scheduler(load: float = 0.0, **kwargs) -> PollScheduler:
+    options = dict(
+        slots=10,
+        base_interval_ms=2000,
+        max_interval_ms=10000,
+        idle_seconds=0,
+        load_threshold=0.5,
+        release_seconds=60,
+        load=lambda: load,
+    )
+    options.update(kwargs)
+    return PollScheduler(**options)
+
+
+def test_accounts_spread_across_slots():
+    """Test that accounts fill every slot before any slot is shared, and release idle slots."""
+    scheduler = make_scheduler()
+    accounts = [uuid.uuid4() for _ in range(25)]
+
+    for account_id in accounts:
+        scheduler.slot(account_id, now=1000.0)
+    assert sorted(scheduler.occupancy()) == [2] * 5 + [3] * 5
+
+    # Polling again keeps the slot
+    assert scheduler.slot(accounts[0], now=1030.0) == scheduler.slot(accounts[0], now=1031.0)
+
+    # Accounts that stopped polling release theirs
+    scheduler.slot(uuid.uuid4(), now=1070.0)
+    assert len(scheduler) == 2
+    assert sum(scheduler.occupancy()) == 2
+
+
+def test_next_poll_lands_on_slot():
+    """Test that the delay points at the account's phase, at least a quarter interval ahead."""
+    scheduler = make_scheduler()
+    account_id = uuid.uuid4()
+    phase_ms = scheduler.slot(account_id, now=1000.0) * 200
+
+    for now_ms in (1_000_000, 1_000_450, 1_001_999):
+        delay, interval = scheduler.next_poll(account_id, now=now_ms / 1000)
+        assert interval == 2000
+        assert (now_ms + delay) % interval == phase_ms
+        assert interval // 4 <= delay < interval + interval // 4
+
+
+def test_interval_stretches_for_load_and_idle_accounts():
+    """Test declared, idle and load adjustments of the interval and its cap."""
+    account_id = uuid.uuid4()
+    sequence = delivery_sequences.advance(account_id)
+    now = sequence / 1000
+
+    assert make_scheduler().interval_ms(account_id, now=now) == 2000
+    assert make_scheduler().interval_ms(account_id, declared_interval=5, now=now) == 5000
+    assert make_scheduler(load=0.75).interval_ms(account_id, now=now) == 3000
+    assert make_scheduler(load=1.0).interval_ms(account_id, now=now) == 4000
+
+    idle = make_scheduler(idle_seconds=60)
+    assert idle.interval_ms(account_id, now=now + 30) == 2000
+    assert idle.interval_ms(account_id, now=now + 61) == 4000
+    assert make_scheduler(load=1.0, idle_seconds=60).interval_ms(
+        account_id, declared_interval=5, now=now + 61
+    ) == 10000
+
+
+@pytest.mark.asyncio
+async def test_poll_responses_carry_next_poll(
+    client: AsyncClient,
+    user_data: dict,
+    account_data: dict,
+):
+    """Test that full and unchanged polls tell the EA when to poll next."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+
+    response = await client.get("/api/v1/signals/pending", params={"api_key": api_key})
+    next_poll_ms = int(response.headers["x-next-poll-ms"])
+    assert response.json()["next_poll_ms"] == next_poll_ms
+    assert 0 < next_poll_ms < 2500
+
+    response = await client.get(
+        "/api/v1/signals/pending",
+        params={"api_key": api_key, "since": response.headers["x-delivery-sequence"]},
+        headers={"X-EA-Poll-Interval": "5"},
+    )
+    assert response.status_code == 304
+    assert 0 < int(response.headers["x-next-poll-ms"]) < 6250
+
+    response = await client.get(
+        "/api/v1/signals/pending", params={"api_key": api_key, "format": "compact"}
+    )
+    assert "x-next-poll-ms" in response.headers
@@ -0,0 +1,87 @@
+"""
+Tests for the EA presence registry and endpoints.
+"""
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.presence import PresenceRegistry
+from tests.test_admin import create_admin
+from tests.test_webhook import create_user_with_account
+
+
+def test_status_follows_poll_interval():
+    """Test that EAs turn stale after missing a few polls and offline later."""
+    registry = PresenceRegistry(min_online_seconds=10, online_poll_multiplier=3, offline_seconds=300)
+    account_id = uuid.uuid4()
+
+    registry.touch(account_id, uuid.uuid4(), now=1000.0)
+    registry.touch(account_id, uuid.uuid4(), now=1005.0)
+    registry.touch(account_id, uuid.uuid4(), now=1010.0)
+
+    assert registry.get(account_id).poll_interval == pytest.approx(5.0)
+    assert registry.status(account_id, now=1024.0) == "online"
+    assert registry.status(account_id, now=1026.0) == "stale"
+    assert registry.status(account_id, now=1311.0) == "offline"
+    assert registry.status(uuid.uuid4()) == "offline"
+
+
+def test_account_status_prefers_newer_stored_timestamp():
+    """Test that a newer last_connected_at flushed by another worker wins over a stale local record."""
+    registry = PresenceRegistry(min_online_seconds=10, online_poll_multiplier=3, offline_seconds=300)
+    account_id = uuid.uuid4()
+    registry.touch(account_id, uuid.uuid4(), now=1000.0)
+
+    stored = datetime.fromtimestamp(1995.0, tz=timezone.utc)
+    assert registry.status(account_id, now=2000.0) == "offline"
+    assert registry.account_status(account_id, stored, now=2000.0) == "online"
+    assert registry.account_status(account_id, None, now=2000.0) == "offline"
+    # An older stored timestamp does not override the local record
+    assert registry.account_status(account_id, datetime.fromtimestamp(900.0, tz=timezone.utc), now=1005.0) == "online"
+
+
+@pytest.mark.asyncio
+async def test_account_presence_from_polls(
+    client: AsyncClient,
+    test_db: AsyncSession,
+    user_data: dict,
+    account_data: dict,
+):
+    """Test that polling marks an account online for its user and for admins."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    await client.post("/api/v1/accounts", json={**account_data, "name": "Idle"}, headers=headers)
+
+    response = await client.get(
+        "/api/v1/signals/pending",
+        params={"api_key": api_key},
+        headers={"X-EA-Version": "MT5/2.00", "X-EA-Poll-Interval": "2"},
+    )
+    assert response.status_code == 200
+
+    response = await client.get("/api/v1/accounts/presence", headers=headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["online"] == 1
+    assert data["offline"] == 1
+    online = next(a for a in data["accounts"] if a["status"] == "online")
+    assert online["name"] == account_data["name"]
+    assert online["client_version"] == "MT5/2.00"
+    assert online["poll_interval_seconds"] == 2
+
+    admin_token = await create_admin(
+        client, test_db, {**user_data, "email": "admin@example.com"}
+    )
+    response = await client.get(
+        "/api/v1/admin/presence",
+        params={"status": "online", "user_id": online["user_id"]},
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+
+    assert response.status_code == 200
+    assert [a["account_id"] for a in response.json()["accounts"]] == [online["account_id"]]
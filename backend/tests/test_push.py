@@ -0,0 +1,196 @@
+"""
+Tests for WebSocket and SSE signal push.
+"""
+import asyncio
+import json
+from typing import List
+from urllib.parse import urlencode
+
+import pytest
+from httpx import AsyncClient
+
+from app.main import app
+from tests.test_webhook import create_user_with_account
+
+
+class WebSocketSession:
+    """Minimal in-process WebSocket client driving the ASGI app directly."""
+
+    def __init__(self, path: str, params: dict):
+        self.scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": urlencode(params).encode(),
+            "headers": [(b"host", b"test"), (b"x-ea-version", b"MT5/2.00")],
+            "client": ("127.0.0.1", 50000),
+            "server": ("test", 80),
+            "subprotocols": [],
+        }
+        self._incoming: asyncio.Queue = asyncio.Queue()
+        self._outgoing: asyncio.Queue = asyncio.Queue()
+        self._task = None
+
+    async def _receive(self) -> dict:
+        return await self._incoming.get()
+
+    async def _send(self, message: dict) -> None:
+        await self._outgoing.put(message)
+
+    async def connect(self) -> dict:
+        self._task = asyncio.create_task(app(self.scope, self._receive, self._send))
+        await self._incoming.put({"type": "websocket.connect"})
+        return await asyncio.wait_for(self._outgoing.get(), 5)
+
+    async def send_text(self, text: str) -> None:
+        await self._incoming.put({"type": "websocket.receive", "text": text})
+
+    async def receive_text(self, timeout: float = 5) -> str:
+        message = await asyncio.wait_for(self._outgoing.get(), timeout)
+        assert message["type"] == "websocket.send", message
+        return message["text"]
+
+    async def close(self) -> None:
+        await self._incoming.put({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(self._task, 5)
+
+
+async def _signal_status(client: AsyncClient, token: str) -> List[str]:
+    response = await client.get("/api/v1/signals", headers={"Authorization": f"Bearer {token}"})
+    return [s["status"] for s in response.json()["signals"]]
+
+
+@pytest.mark.asyncio
+async def test_websocket_rejects_invalid_api_key(client: AsyncClient):
+    """Test that an unknown API key closes the WebSocket before accepting it."""
+    ws = WebSocketSession("/api/v1/signals/ws", {"api_key": "invalid"})
+    message = await ws.connect()
+    assert message["type"] == "websocket.close"
+    assert message["code"] == 1008
+
+
+@pytest.mark.asyncio
+async def test_websocket_push_and_ack(
+    client: AsyncClient,
+    user_data: dict,
+    account_data: dict,
+    webhook_payload: dict,
+):
+    """Test that signals are pushed on commit and marked sent when pushed."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+    webhook_payload["secret"] = webhook_secret
+
+    # Queued before connecting: pushed on connect
+    await client.post("/api/v1/webhook/tradingview", json=webhook_payload)
+
+    ws = WebSocketSession("/api/v1/signals/ws", {"api_key": api_key})
+    assert (await ws.connect())["type"] == "websocket.accept"
+
+    message = json.loads(await ws.receive_text())
+    assert message["type"] == "signals"
+    assert len(message["signals"]) == 1
+    first_id = message["signals"][0]["id"]
+
+    # Committed while connected: pushed without polling
+    await client.post("/api/v1/webhook/tradingview", json=webhook_payload)
+    message = json.loads(await ws.receive_text())
+    assert [s["id"] for s in message["signals"]] != [first_id]
+    second_id = message["signals"][0]["id"]
+
+    assert await _signal_status(client, token) == ["sent", "sent"]
+
+    await ws.send_text(json.dumps({"type": "ack", "signal_ids": [first_id]}))
+    await ws.send_text(json.dumps({
+        "type": "results",
+        "results": [{"signal_id": second_id, "success": True, "ticket": 42, "executed_price": 2035.5}],
+    }))
+    message = json.loads(await ws.receive_text())
+    assert message["type"] == "results"
+    assert message["updated"] == 1
+
+    await ws.send_text("not json")
+    message = json.loads(await ws.receive_text())
+    assert message["type"] == "error"
+
+    await ws.close()
+    assert sorted(await _signal_status(client, token)) == ["executed", "sent"]
+
+
+@pytest.mark.asyncio
+async def test_websocket_compact_lost_ack_not_redelivered(
+    client: AsyncClient,
+    user_data: dict,
+    account_data: dict,
+    webhook_payload: dict,
+):
+    """Test the compact format, and that a push whose ack was lost is not delivered again."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+    webhook_payload["secret"] = webhook_secret
+
+    ws = WebSocketSession("/api/v1/signals/ws", {"api_key": api_key, "format": "compact"})
+    assert (await ws.connect())["type"] == "websocket.accept"
+    assert (await ws.receive_text()).startswith("P|")
+
+    await client.post("/api/v1/webhook/tradingview", json=webhook_payload)
+    header, line = (await ws.receive_text()).splitlines()
+    assert header.startswith("V1|") and header.endswith("|1")
+    assert line.startswith("S|")
+
+    # The EA executed the signal, but the connection dropped before its ack arrived
+    await ws.close()
+
+    ws = WebSocketSession("/api/v1/signals/ws", {"api_key": api_key, "format": "compact"})
+    assert (await ws.connect())["type"] == "websocket.accept"
+    assert (await ws.receive_text()).startswith("P|")
+    await ws.close()
+
+    response = await client.get("/api/v1/signals/pending", params={"api_key": api_key, "format": "compact"})
+    assert response.text.splitlines()[1:] == []
+    assert await _signal_status(client, token) == ["sent"]
+
+
+@pytest.mark.asyncio
+async def test_sse_stream_pushes_signal(
+    client: AsyncClient,
+    user_data: dict,
+    account_data: dict,
+    webhook_payload: dict,
+):
+    """Test that the SSE stream delivers a pending signal and marks it sent."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+    webhook_payload["secret"] = webhook_secret
+    await client.post("/api/v1/webhook/tradingview", json=webhook_payload)
+
+    incoming: asyncio.Queue = asyncio.Queue()
+    outgoing: asyncio.Queue = asyncio.Queue()
+    await incoming.put({"type": "http.request", "body": b"", "more_body": False})
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/v1/signals/stream",
+        "raw_path": b"/api/v1/signals/stream",
+        "query_string": urlencode({"api_key": api_key}).encode(),
+        "headers": [(b"host", b"test")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("test", 80),
+    }
+    task = asyncio.create_task(app(scope, incoming.get, outgoing.put))
+
+    start = await asyncio.wait_for(outgoing.get(), 5)
+    assert start["status"] == 200
+    assert (b"content-type", b"text/event-stream; charset=utf-8") in start["headers"]
+
+    body = await asyncio.wait_for(outgoing.get(), 5)
+    event, data = body["body"].decode().split("\n")[:2]
+    assert event == "event: signals"
+    assert len(json.loads(data[len("data: "):])["signals"]) == 1
+
+    await incoming.put({"type": "http.disconnect"})
+    await asyncio.wait_for(task, 5)
+
+    assert await _signal_status(client, token) == ["sent"]
@@ -0,0 +1,130 @@
+"""
+Tests for read-only sessions and read replica routing.
+"""
+from typing import List, Optional, Tuple
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.requests import Request
+
+from app import database
+from app.database import ReadReplica, ReadReplicaSet, RecentWrites, get_read_db
+
+
+class FakeReplica(ReadReplica):
+    """Replica whose lag measurements are scripted."""
+
+    def __init__(self, lags: List[Optional[float]]):
+        super().__init__(create_async_engine("sqlite+aiosqlite://"), max_lag_seconds=5, check_timeout=1)
+        self.lags = lags
+
+    async def check(self) -> Optional[float]:
+        self.lag = self.lags.pop(0)
+        return self.lag
+
+
+def _request(token: Optional[str] = None) -> Request:
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+@pytest.mark.asyncio
+async def test_replica_set_round_robin_skips_unhealthy():
+    """Test that reads rotate over healthy replicas and fall back to the primary when none is."""
+    replicas = [FakeReplica([1.0, 1.0]), FakeReplica([0.0, None]), FakeReplica([30.0, 2.0])]
+    replica_set = ReadReplicaSet(replicas, check_seconds=5)
+
+    # Nothing is used before the first check
+    assert replica_set.pick() is None
+
+    await replica_set.check_all()
+    assert [replica_set.pick() for _ in range(4)] == [replicas[0], replicas[1], replicas[0], replicas[1]]
+
+    await replica_set.check_all()
+    assert [replica_set.pick() for _ in range(4)] == [replicas[2], replicas[0], replicas[2], replicas[0]]
+
+    for replica in replicas:
+        replica.mark_failed(OSError("connection refused"))
+    assert replica_set.pick() is None
+    assert [r["failures"] for r in replica_set.stats()] == [1, 1, 1]
+
+    # SQLite has no replication functions: measured as unreachable
+    assert await ReadReplica(replicas[0].engine, 5, 1).check() is None
+
+    for replica in replicas:
+        await replica.engine.dispose()
+
+
+class ProbedReplica(ReadReplica):
+    """Replica whose lag probe answers are scripted."""
+
+    def __init__(self, probes: List[Tuple[bool, float]]):
+        super().__init__(create_async_engine("sqlite+aiosqlite://"), max_lag_seconds=5, check_timeout=1)
+        self.probes = probes
+
+    async def _probe(self) -> Tuple[bool, float]:
+        return self.probes.pop(0)
+
+
+@pytest.mark.asyncio
+async def test_replica_with_disconnected_wal_receiver_is_unhealthy():
+    """Test that a replica not streaming from the primary is skipped although its lag reads 0."""
+    replica = ProbedReplica([(True, 1.0), (False, 0.0), (True, 0.0)])
+
+    assert await replica.check() == 1.0
+    assert replica.healthy
+
+    assert await replica.check() is None
+    assert not replica.healthy
+
+    assert await replica.check() == 0.0
+    assert replica.healthy
+    await replica.engine.dispose()
+
+
+def test_recent_writes_window():
+    """Test that a write is remembered for the window, and the oldest clients are dropped past the cap."""
+    writes = RecentWrites(window_seconds=10, max_entries=2)
+    writes.record("a", now=100)
+    assert writes.recent("a", now=105)
+    assert not writes.recent("a", now=111)
+    assert not writes.recent(None)
+
+    writes.record("a", now=200)
+    writes.record("b", now=200)
+    writes.record("c", now=200)
+    assert not writes.recent("a", now=201)
+    assert writes.recent("c", now=201)
+
+
+@pytest.mark.asyncio
+async def test_get_read_db_routing(monkeypatch):
+    """Test that read sessions use replicas, except after the client's own write or a replica failure."""
+    replica = FakeReplica([1.0])
+    monkeypatch.setattr(database, "read_replicas", ReadReplicaSet([replica], check_seconds=5))
+    monkeypatch.setattr(database, "recent_writes", RecentWrites(window_seconds=10))
+    await database.read_replicas.check_all()
+    database.recent_writes.record("writer")
+
+    for request, expected in (
+        (_request("reader"), replica.engine),
+        (_request(), replica.engine),
+        (_request("writer"), database.primary_read_engine),
+    ):
+        sessions = get_read_db(request)
+        session = await sessions.__anext__()
+        assert session.bind is expected
+        await sessions.aclose()
+
+    sessions = get_read_db(_request())
+    await sessions.__anext__()
+    with pytest.raises(OperationalError):
+        await sessions.athrow(OperationalError("SELECT 1", {}, OSError("connection reset")))
+    assert not replica.healthy
+
+    sessions = get_read_db(_request())
+    assert (await sessions.__anext__()).bind is database.primary_read_engine
+    await sessions.aclose()
+
+    await replica.engine.dispose()
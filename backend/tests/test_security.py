@@ -0,0 +1,34 @@
+"""
+Tests for security utilities.
+"""
+import asyncio
+
+import pytest
+
+from app.utils import metrics
+from app.utils.security import hash_password_async, verify_password_async
+
+
+@pytest.mark.asyncio
+async def test_password_hashing_runs_off_event_loop():
+    """Test that async hashing works and the event loop keeps running meanwhile."""
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.001)
+
+    task = asyncio.create_task(ticker())
+    try:
+        hashed = await hash_password_async("TestPass123")
+        assert await verify_password_async("TestPass123", hashed)
+        assert not await verify_password_async("WrongPass123", hashed)
+    finally:
+        task.cancel()
+
+    # bcrypt takes far longer than a few milliseconds, so a blocked loop would not tick
+    assert ticks > 3
+    assert metrics.snapshot()["password_hash.queue"]["count"] >= 3
+    assert metrics.snapshot()["password_hash.run"]["count"] >= 3
@@ -0,0 +1,145 @@
+"""
+Tests for cross-worker signal wakeups.
+"""
+import asyncio
+import uuid
+from typing import List
+
+import pytest
+
+from app.services.delivery_sequence import delivery_sequences
+from app.services.signal_bus import (
+    PostgresSignalBus,
+    RedisSignalBus,
+    SignalBus,
+    decode_message,
+    encode_message,
+)
+
+
+class MemorySignalBus(SignalBus):
+    """Bus whose broker is a list of peers in the same process."""
+
+    backend = "memory"
+
+    def __init__(self, peers: List["MemorySignalBus"]):
+        super().__init__("test", reconnect_seconds=0.01)
+        self.peers = peers
+        self.peers.append(self)
+        self._closed = asyncio.Event()
+
+    async def _connect(self) -> None:
+        self._closed = asyncio.Event()
+
+    async def _wait_closed(self) -> None:
+        await self._closed.wait()
+
+    async def _send(self, payload: str) -> None:
+        for peer in self.peers:
+            if peer.connected:
+                peer._receive(payload)
+
+    async def _disconnect(self) -> None:
+        pass
+
+    def _fail(self) -> None:
+        self._closed.set()
+
+
+def test_message_round_trip():
+    """Test encoding and decoding of account and rebase messages."""
+    account_ids = [uuid.uuid4(), uuid.uuid4()]
+
+    origin, sent_at, decoded = decode_message(encode_message("w1", account_ids, sent_at=12.5))
+    assert (origin, sent_at, decoded) == ("w1", 12.5, account_ids)
+
+    origin, _, decoded = decode_message(encode_message("w1", None))
+    assert origin == "w1"
+    assert decoded is None
+
+
+@pytest.mark.asyncio
+async def test_receive_wakes_waiting_poll():
+    """Test that another worker's message advances the sequence and wakes waiters."""
+    bus = SignalBus()
+    account_id = uuid.uuid4()
+    sequence = delivery_sequences.current(account_id)
+
+    waiter = asyncio.create_task(delivery_sequences.wait(account_id, sequence, timeout=5))
+    await asyncio.sleep(0)
+    assert delivery_sequences.waiting >= 1
+
+    # Own messages are ignored
+    bus._receive(encode_message(bus.worker_id, [account_id]))
+    assert delivery_sequences.current(account_id) == sequence
+
+    bus._receive(encode_message("other-worker", [account_id]))
+    assert await asyncio.wait_for(waiter, 1) is True
+    assert delivery_sequences.current(account_id) > sequence
+
+
+@pytest.mark.asyncio
+async def test_commit_published_to_other_workers():
+    """Test that a local commit reaches a peer, and a dropped publish rebases everyone."""
+    peers: List[MemorySignalBus] = []
+    publisher, subscriber = MemorySignalBus(peers), MemorySignalBus(peers)
+    publisher.start()
+    subscriber._task = asyncio.create_task(subscriber._run())
+    await asyncio.sleep(0.01)
+
+    try:
+        account_id = uuid.uuid4()
+        sequence = delivery_sequences.current(account_id)
+
+        publisher.publish({account_id})
+        await asyncio.sleep(0)
+        await asyncio.gather(*publisher._sends)
+        assert subscriber.received == 1
+
+        # Publish while disconnected, then reconnect: peers are asked to rebase
+        publisher._fail()
+        await asyncio.sleep(0)
+        publisher.publish({uuid.uuid4()})
+        assert publisher._missed
+
+        await asyncio.sleep(0.05)
+        assert publisher.connected
+        assert not publisher._missed
+        assert subscriber.received == 2
+        assert delivery_sequences.current(account_id) > sequence
+    finally:
+        await publisher.stop()
+        await subscriber.stop()
+
+
+class HalfOpenConnection:
+    """asyncpg connection whose peer vanished: queries never return."""
+
+    async def fetchval(self, query: str):
+        await asyncio.Event().wait()
+
+
+class SilentPubSub:
+    """Redis pub/sub whose peer vanished: pings are sent, nothing arrives."""
+
+    async def listen(self):
+        await asyncio.Event().wait()
+        yield
+
+    async def ping(self):
+        return True
+
+
+@pytest.mark.asyncio
+async def test_half_open_connections_are_failed():
+    """Test that the liveness probes end _wait_closed on a connection that stopped answering."""
+    postgres = PostgresSignalBus("postgresql://unused", "test", ping_seconds=0.02)
+    postgres._connection = HalfOpenConnection()
+    await asyncio.wait_for(postgres._wait_closed(), 1)
+    assert postgres._closed.is_set()
+
+    redis = RedisSignalBus("redis://unused", "test", ping_seconds=0.02)
+    redis._pubsub = SilentPubSub()
+    await asyncio.wait_for(redis._wait_closed(), 1)
+    assert redis._failed
+    assert redis._listener is None
@@ -0,0 +1,372 @@
+"""
+Tests for EA signal endpoints.
+"""
+import asyncio
+import uuid
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.main import app
+from app.schemas.signal import PendingSignalsResponse
+from app.services.auth_cache import AccountPrincipal, auth_cache
+from tests.test_webhook import create_user_with_account
+
+
+@pytest.mark.asyncio
+async def test_regenerated_api_key_rejects_cached_key(
+    client: AsyncClient,
+    user_data: dict,
+    account_data: dict,
+):
+    """Test that regenerating an API key retires the cached old key."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.get("/api/v1/signals/pending", params={"api_key": api_key})
+    assert response.status_code == 200
+
+    accounts_response = await client.get("/api/v1/accounts", headers=headers)
+    account_id = accounts_response.json()["accounts"][0]["id"]
+
+    response = await client.post(f"/api/v1/accounts/{account_id}/regenerate-key", headers=headers)
+    assert response.status_code == 200
+    new_api_key = response.json()["api_key"]
+
+    response = await client.get("/api/v1/signals/pending", params={"api_key": api_key})
+    assert response.status_code == 401
+
+    response = await client.get("/api/v1/signals/pending", params={"api_key": new_api_key})
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_api_key_cached_before_commit_retired_on_commit(test_db: AsyncSession):
+    """Test that a key loaded while an account change is uncommitted is retired when it commits."""
+    account = AccountPrincipal(id=uuid.uuid4(), user_id=uuid.uuid4(), is_active=True, settings={})
+    auth_cache.invalidate_account_after_commit(test_db, account.id)
+
+    # A poll racing the change reads the old, still committed row
+    auth_cache.put_account("old-key", account, auth_cache.generation)
+    assert auth_cache.get_account("old-key") == account
+
+    await test_db.commit()
+    assert auth_cache.get_account("old-key") is None
+
+
+@pytest.mark.asyncio
+async def test_deactivated_account_rejected_while_cached(
+    client: AsyncClient,
+    user_data: dict,
+    account_data: dict,
+):
+    """Test that deactivating an account invalidates its cached API key."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.get("/api/v1/signals/pending", params={"api_key": api_key})
+    assert response.status_code == 200
+
+    accounts_response = await client.get("/api/v1/accounts", headers=headers)
+    account_id = accounts_response.json()["accounts"][0]["id"]
+
+    response = await client.put(
+        f"/api/v1/accounts/{account_id}",
+        json={"is_active": False},
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+    response = await client.get("/api/v1/signals/pending", params={"api_key": api_key})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_batch_signal_results(
+    client: AsyncClient,
+    user_data: dict,
+    account_data: dict,
+    webhook_payload: dict,
+):
+    """Test reporting several results in one request, including foreign signals."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    webhook_payload["secret"] = webhook_secret
+    await client.post("/api/v1/webhook/tradingview", json=webhook_payload)
+    await client.post("/api/v1/webhook/tradingview", json=webhook_payload)
+
+    response = await client.get("/api/v1/signals/pending", params={"api_key": api_key})
+    executed_id, failed_id = [s["id"] for s in response.json()["signals"]]
+
+    other_user = {**user_data, "email": "other@example.com"}
+    _, other_secret, other_api_key = await create_user_with_account(client, other_user, account_data)
+    await client.post("/api/v1/webhook/tradingview", json={**webhook_payload, "secret": other_secret})
+    response = await client.get("/api/v1/signals/pending", params={"api_key": other_api_key})
+    foreign_id = response.json()["signals"][0]["id"]
+
+    missing_id = "00000000-0000-0000-0000-000000000000"
+    response = await client.post(
+        "/api/v1/signals/results",
+        params={"api_key": api_key},
+        json={
+            "results": [
+                {"signal_id": executed_id, "success": True, "ticket": 1001, "executed_price": 2035.5},
+                {"signal_id": failed_id, "success": False, "error_code": 10019, "error_message": "No money"},
+                {"signal_id": foreign_id, "success": True},
+                {"signal_id": missing_id, "success": True},
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["updated"] == 2
+    assert data["forbidden"] == [foreign_id]
+    assert data["not_found"] == [missing_id]
+
+    executed = (await client.get(f"/api/v1/signals/{executed_id}", headers=headers)).json()
+    assert executed["status"] == "executed"
+    assert executed["ticket"] == 1001
+
+    failed = (await client.get(f"/api/v1/signals/{failed_id}", headers=headers)).json()
+    assert failed["status"] == "failed"
+    assert failed["error_code"] == 10019
+    assert failed["error_message"] == "No money"
+
+
+@pytest.mark.asyncio
+async def test_pending_signals_compact_format(
+    client: AsyncClient,
+    user_data: dict,
+    account_data: dict,
+    webhook_payload: dict,
+):
+    """Test the line-protocol poll format and reporting results with its ids."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+
+    webhook_payload["secret"] = webhook_secret
+    webhook_payload["comment"] = "EMA Cross"
+    await client.post("/api/v1/webhook/tradingview", json=webhook_payload)
+
+    response = await client.get(
+        "/api/v1/signals/pending",
+        params={"api_key": api_key, "format": "compact"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    header, line = response.text.rstrip("\n").split("\n")
+    version, server_time, count = header.split("|")
+    assert version == "V1"
+    assert count == "1"
+
+    fields = line.split("|")
+    assert len(fields) == 10
+    assert fields[0] == "S"
+    assert len(fields[1]) == 32
+    assert fields[2:6] == ["XAUUSD", "buy", "market", "0.1"]
+    assert fields[6] == ""
+    assert fields[7:9] == ["2050", "2020"]
+    assert fields[9] == "EMA Cross"
+
+    response = await client.post(
+        f"/api/v1/signals/{fields[1]}/result",
+        params={"api_key": api_key},
+        json={"success": True, "ticket": 1},
+    )
+    assert response.status_code == 200
+
+    response = await client.get(
+        "/api/v1/signals/pending",
+        params={"api_key": api_key, "format": "compact"},
+    )
+    assert response.text.startswith("V1|")
+    assert response.text.endswith("|0\n")
+
+
+@pytest.mark.asyncio
+async def test_pending_signals_prerendered_json(
+    client: AsyncClient,
+    user_data: dict,
+    account_data: dict,
+    webhook_payload: dict,
+):
+    """Test that the concatenated JSON poll payload is a valid PendingSignalsResponse."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+
+    webhook_payload["secret"] = webhook_secret
+    webhook_payload["comment"] = "Ünicode EMA-Cross"
+    await client.post("/api/v1/webhook/tradingview", json=webhook_payload)
+    await client.post("/api/v1/webhook/tradingview", json=webhook_payload)
+
+    response = await client.get("/api/v1/signals/pending", params={"api_key": api_key})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    data = PendingSignalsResponse.model_validate(response.json())
+    assert len(data.signals) == 2
+    assert data.signals[0].comment == "Ünicode EMA-Cross"
+    assert float(data.signals[0].take_profit) == 2050.0
+
+
+@pytest.mark.asyncio
+async def test_conditional_poll(
+    client: AsyncClient,
+    user_data: dict,
+    account_data: dict,
+    webhook_payload: dict,
+):
+    """Test that unchanged polls get 304 without a session until a signal arrives."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+
+    response = await client.get("/api/v1/signals/pending", params={"api_key": api_key})
+    assert response.status_code == 200
+    sequence = response.headers["x-delivery-sequence"]
+    assert response.headers["etag"] == f'"{sequence}"'
+
+    # An unchanged poll must not open a database session
+    override_get_db = app.dependency_overrides[get_db]
+
+    async def fail_get_db():
+        raise AssertionError("Unchanged poll opened a database session")
+        yield
+
+    app.dependency_overrides[get_db] = fail_get_db
+    try:
+        response = await client.get(
+            "/api/v1/signals/pending", params={"api_key": api_key, "since": sequence}
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["x-delivery-sequence"] == sequence
+
+        response = await client.get(
+            "/api/v1/signals/pending",
+            params={"api_key": api_key},
+            headers={"If-None-Match": f'W/"{sequence}"'},
+        )
+        assert response.status_code == 304
+    finally:
+        app.dependency_overrides[get_db] = override_get_db
+
+    webhook_payload["secret"] = webhook_secret
+    await client.post("/api/v1/webhook/tradingview", json=webhook_payload)
+
+    response = await client.get(
+        "/api/v1/signals/pending", params={"api_key": api_key, "since": sequence}
+    )
+    assert response.status_code == 200
+    assert len(response.json()["signals"]) == 1
+    new_sequence = response.headers["x-delivery-sequence"]
+    assert int(new_sequence) > int(sequence)
+
+    response = await client.get(
+        "/api/v1/signals/pending", params={"api_key": api_key, "since": new_sequence}
+    )
+    assert response.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_long_poll_woken_by_new_signal(
+    client: AsyncClient,
+    user_data: dict,
+    account_data: dict,
+    webhook_payload: dict,
+):
+    """Test that a waiting poll returns as soon as a signal is committed."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+
+    response = await client.get("/api/v1/signals/pending", params={"api_key": api_key})
+    sequence = response.headers["x-delivery-sequence"]
+
+    response = await client.get(
+        "/api/v1/signals/pending", params={"api_key": api_key, "since": sequence, "wait": 1}
+    )
+    assert response.status_code == 304
+
+    poll = asyncio.create_task(client.get(
+        "/api/v1/signals/pending", params={"api_key": api_key, "since": sequence, "wait": 10}
+    ))
+    await asyncio.sleep(0.1)
+    assert not poll.done()
+
+    webhook_payload["secret"] = webhook_secret
+    await client.post("/api/v1/webhook/tradingview", json=webhook_payload)
+
+    response = await asyncio.wait_for(poll, 5)
+    assert response.status_code == 200
+    assert len(response.json()["signals"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_poll_claims_signals_of_all_accounts(
+    client: AsyncClient,
+    user_data: dict,
+    account_data: dict,
+    webhook_payload: dict,
+):
+    """Test that one batch poll returns and claims the signals of every listed account."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+    response = await client.post(
+        "/api/v1/accounts",
+        json={**account_data, "name": "Second Account", "account_number": "654321"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 201, response.text
+    second = response.json()
+
+    webhook_payload["secret"] = webhook_secret
+    await client.post("/api/v1/webhook/tradingview", json=webhook_payload)
+
+    response = await client.post(
+        "/api/v1/signals/pending/batch",
+        json={"api_keys": [api_key, "invalid", second["api_key"]]},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [a["error"] for a in data["accounts"]] == [None, "Invalid API key", None]
+    assert data["accounts"][2]["account_id"] == second["id"]
+    assert [len(a["signals"]) for a in data["accounts"]] == [1, 0, 1]
+    assert data["next_poll_ms"] > 0
+
+    # Claimed: neither a batch nor a single poll returns them again
+    response = await client.post(
+        "/api/v1/signals/pending/batch", json={"api_keys": [api_key, second["api_key"]]}
+    )
+    assert [a["signals"] for a in response.json()["accounts"]] == [[], []]
+    response = await client.get("/api/v1/signals/pending", params={"api_key": api_key})
+    assert response.json()["signals"] == []
+
+    response = await client.post("/api/v1/signals/pending/batch", json={"api_keys": ["invalid"]})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_signal_list_omits_payload_unless_requested(
+    client: AsyncClient,
+    user_data: dict,
+    account_data: dict,
+    webhook_payload: dict,
+):
+    """Test that listing skips the JSONB payloads by default, while a single signal has them."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+    webhook_payload["secret"] = webhook_secret
+    await client.post("/api/v1/webhook/tradingview", json=webhook_payload)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.get("/api/v1/signals", headers=headers)
+    signal = response.json()["signals"][0]
+    assert signal["raw_payload"] is None
+    assert signal["symbol"] == webhook_payload["symbol"]
+
+    response = await client.get("/api/v1/signals", params={"include_payload": True}, headers=headers)
+    assert response.json()["signals"][0]["raw_payload"]["symbol"] == webhook_payload["symbol"]
+
+    response = await client.get(f"/api/v1/signals/{signal['id']}", headers=headers)
+    assert response.json()["raw_payload"]["symbol"] == webhook_payload["symbol"]
+
+    response = await client.get("/api/v1/signals/export", headers=headers)
+    assert response.text.splitlines()[1].startswith(signal["id"])
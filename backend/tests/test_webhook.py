@@ -1,8 +1,16 @@
 """
 Tests for webhook endpoints.
 """
+from decimal import Decimal
+from uuid import UUID
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.signal import Signal
+from app.models.signal_batch import SignalBatch
 
 
 async def create_user_with_account(client: AsyncClient, user_data: dict, account_data: dict) -> tuple:
@@ -45,6 +53,47 @@ async def test_webhook_success(client: AsyncClient, user_data: dict, account_dat
     assert data["signals_created"] >= 1
 
 
+@pytest.mark.asyncio
+async def test_webhook_fanout_shares_one_batch(
+    client: AsyncClient,
+    test_db: AsyncSession,
+    user_data: dict,
+    account_data: dict,
+    webhook_payload: dict,
+):
+    """Test that a webhook fanned out to several accounts stores its payload once."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+    headers = {"Authorization": f"Bearer {token}"}
+    await client.post(
+        "/api/v1/accounts",
+        json={**account_data, "name": "Second Account", "account_number": "654321"},
+        headers=headers,
+    )
+    accounts = (await client.get("/api/v1/accounts", headers=headers)).json()["accounts"]
+    account_ids = {UUID(a["id"]) for a in accounts}
+    assert len(account_ids) == 2
+
+    webhook_payload["secret"] = webhook_secret
+    response = await client.post("/api/v1/webhook/tradingview", json=webhook_payload)
+    data = response.json()
+    assert data["signals_created"] == 2
+    batch_id = UUID(data["batch_id"])
+
+    assert await test_db.scalar(select(func.count()).select_from(SignalBatch)) == 1
+    signals = (await test_db.execute(select(Signal))).scalars().all()
+    assert {s.account_id for s in signals} == account_ids
+    for signal in signals:
+        assert signal.batch_id == batch_id
+        assert signal.action == webhook_payload["action"]
+        assert signal.comment == webhook_payload["comment"]
+        assert signal.symbol == webhook_payload["symbol"]
+        assert signal.quantity == Decimal(str(webhook_payload["quantity"]))
+
+    listed = (await client.get("/api/v1/signals", headers=headers)).json()["signals"]
+    assert {UUID(s["account_id"]) for s in listed} == account_ids
+    assert [s["action"] for s in listed] == [webhook_payload["action"]] * 2
+
+
 @pytest.mark.asyncio
 async def test_webhook_invalid_secret(client: AsyncClient, webhook_payload: dict):
     """Test webhook with invalid secret."""
@@ -116,3 +165,32 @@ async def test_webhook_no_active_accounts(client: AsyncClient, user_data: dict,
     data = response.json()
     assert data["success"] is False
     assert data["signals_created"] == 0
+
+
+@pytest.mark.asyncio
+async def test_webhook_offline_policy(client: AsyncClient, user_data: dict, account_data: dict, webhook_payload: dict):
+    """Test that offline EAs get their offline policy applied during fan-out."""
+    token, webhook_secret, api_key = await create_user_with_account(client, user_data, account_data)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # The first account's EA is online
+    await client.get("/api/v1/signals/pending", params={"api_key": api_key})
+
+    # Two accounts whose EAs never connected
+    for policy in ["skip", "queue"]:
+        await client.post(
+            "/api/v1/accounts",
+            json={**account_data, "name": policy, "settings": {"offline_policy": policy}},
+            headers=headers,
+        )
+
+    webhook_payload["secret"] = webhook_secret
+
+    response = await client.post("/api/v1/webhook/tradingview", json=webhook_payload)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is True
+    assert data["signals_created"] == 2
+    assert data["signals_skipped"] == 1
+    assert data["signals_short_ttl"] == 1